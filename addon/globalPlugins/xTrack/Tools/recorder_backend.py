@@ -20,13 +20,17 @@ class WasapiSoundRecorder:
                  recording_mode="system audio and microphone",
                  ffmpeg_path="",
                  system_gain=0,
-                 microphone_gain=0):
+                 microphone_gain=0,
+                 resource_policy=None):
         self.recording_format = recording_format.strip().lower()
         self.recording_folder = recording_folder.strip()
         self.recording_mode = recording_mode.strip().lower()
         self.ffmpeg_path = ffmpeg_path.strip()
         self.system_gain = max(0, min(10, system_gain))
         self.microphone_gain = max(0, min(10, microphone_gain))
+        # Optional object with prepare(cmd), creationflags(base) and apply(process)
+        # controlling encoder priority, thread cap and CPU affinity
+        self.resource_policy = resource_policy
         self.audio_interface = pyaudio.PyAudio()
         self.recording = 0
         self.stream_mic = None
@@ -223,8 +227,14 @@ class WasapiSoundRecorder:
         ] + extra_args + ["-f", format_arg, output_file]
 
         creationflags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
-        return subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
-                                stderr=subprocess.DEVNULL, creationflags=creationflags)
+        if self.resource_policy is not None:
+            cmd = self.resource_policy.prepare(cmd)
+            creationflags = self.resource_policy.creationflags(creationflags)
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.DEVNULL, creationflags=creationflags)
+        if self.resource_policy is not None:
+            self.resource_policy.apply(process)
+        return process
 
     def open_system_audio_stream(self):
         if not hasattr(self, 'default_speakers') or self.default_speakers is None:
@@ -2,21 +2,26 @@
 
 import wx
 import os
-import subprocess
 import re
 import threading
 import tones
 import time
 from gui import guiHelper
 import ui
-import json
 from logHandler import log
 import addonHandler
+from .xTrackCore import get_file_duration, probe_media, run_process
+from .dialogMixins import load_file_info
+from .profiling import profiled
+from .configStore import get_config_store
+from .engine import TrimSpec
+from .engine.commands import build_trim_command
 
 addonHandler.initTranslation()
 
 class TrimAudioVideoDialog(wx.Dialog):
     """Dialog for trimming audio and video files using FFmpeg."""
+    @profiled("trim.open")
     def __init__(self, parent, selected_files, tools_path):
         super().__init__(parent, title=_("Trim Audio/Video File"))
         if not selected_files:
@@ -26,7 +31,6 @@ class TrimAudioVideoDialog(wx.Dialog):
         self.file_duration = ""
         self.file_duration_seconds = 0
         self.output_path = os.path.dirname(self.selected_file)
-        self.config_path = os.path.join(os.path.expanduser("~"), "AppData", "Roaming", "nvda", "config", "xTrack.json")
         self.temp_preview_file = ""
         self.init_ui()
         self.SetTitle(_("Trim Audio/Video: {}").format(os.path.basename(self.selected_file)))
@@ -34,31 +38,9 @@ class TrimAudioVideoDialog(wx.Dialog):
         # Always reset end time to empty to force recalculation
         self.end_time_ctrl.SetValue("")
         
-        threading.Thread(target=self.get_file_duration, daemon=True).start()
+        load_file_info(self.selected_file, self.get_file_duration)
         self.Bind(wx.EVT_CLOSE, self.on_close)
         
-    def load_config(self):
-        try:
-            if os.path.exists(self.config_path):
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return {}
-        except Exception as e:
-            log.error(f"Failed to load configuration: {str(e)}")
-            ui.message(_("Failed to load configuration: {}").format(str(e)))
-            return {}
-            
-    def save_config(self, config_data):
-        try:
-            config_dir = os.path.dirname(self.config_path)
-            if not os.path.exists(config_dir):
-                os.makedirs(config_dir)
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump(config_data, f, indent=4)
-        except Exception as e:
-            log.error(f"Failed to save configuration: {str(e)}")
-            ui.message(_("Failed to save configuration: {}").format(str(e)))
-            
     def init_ui(self):
         main_sizer = wx.BoxSizer(wx.VERTICAL)
         file_sizer = wx.StaticBoxSizer(wx.VERTICAL, self, label=_("Selected File"))
@@ -248,15 +230,15 @@ class TrimAudioVideoDialog(wx.Dialog):
         self.fade_out_end_ctrl.Bind(wx.EVT_TEXT, self.on_fade_text)
         self.fade_checkbox.Bind(wx.EVT_CHECKBOX, self.on_fade_checkbox)
         
-        config_data = self.load_config()
-        last_output_type = config_data.get("TrimLastOutputType", "audio")
-        last_format = config_data.get("TrimLastFormat", "mp3")
-        last_quality = config_data.get("TrimLastQuality", "320")
-        last_video_format = config_data.get("TrimLastVideoFormat", "MP4 (Copy Original Quality)")
-        last_sample_rate = config_data.get("TrimLastSampleRate", "Keep Original")
-        last_channels = config_data.get("TrimLastChannels", "Keep Original")
-        last_audio_codec = config_data.get("TrimLastAudioCodec", "AAC (Recommended)")
-        last_fade_enabled = config_data.get("TrimLastFadeEnabled", False)
+        config_store = get_config_store()
+        last_output_type = config_store.get("TrimLastOutputType", "audio")
+        last_format = config_store.get("TrimLastFormat", "mp3")
+        last_quality = config_store.get("TrimLastQuality", "320")
+        last_video_format = config_store.get("TrimLastVideoFormat", "MP4 (Copy Original Quality)")
+        last_sample_rate = config_store.get("TrimLastSampleRate", "Keep Original")
+        last_channels = config_store.get("TrimLastChannels", "Keep Original")
+        last_audio_codec = config_store.get("TrimLastAudioCodec", "AAC (Recommended)")
+        last_fade_enabled = config_store.get("TrimLastFadeEnabled", False)
         
         if last_output_type == "video":
             self.video_radio.SetValue(True)
@@ -315,39 +297,19 @@ class TrimAudioVideoDialog(wx.Dialog):
         if not os.path.exists(ffprobe_path):
             wx.CallAfter(wx.MessageBox, _("ffprobe.exe not found"), _("Error"), wx.OK | wx.ICON_ERROR)
             return
-        cmd = [
-            ffprobe_path,
-            "-v", "error",
-            "-show_entries", "format=duration",
-            "-of", "default=noprint_wrappers=1:nokey=1",
-            self.selected_file,
-        ]
         try:
-            result = subprocess.run(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                creationflags=subprocess.CREATE_NO_WINDOW,
-                encoding='utf-8',
-                errors='ignore'
-            )
-            if result.returncode == 0:
-                duration_sec = float(result.stdout.strip())
-                self.file_duration_seconds = duration_sec
-                hours = int(duration_sec // 3600)
-                minutes = int((duration_sec % 3600) // 60)
-                seconds = int(duration_sec % 60)
-                self.file_duration = f"{hours}:{minutes:02d}:{seconds:02d}" if hours > 0 else f"{minutes}:{seconds:02d}"
-                # Always set end time to file duration, don't use saved values
-                wx.CallAfter(self.end_time_ctrl.SetValue, self.file_duration)
-                config_data = self.load_config()
-                config_data["TrimLastFile"] = self.selected_file
-                config_data["TrimLastDuration"] = self.file_duration
-                self.save_config(config_data)
-                wx.CallAfter(self.update_duration_label)
-            else:
-                raise RuntimeError(result.stderr)
+            duration_sec, duration_str = get_file_duration(self.tools_path, self.selected_file)
+            if duration_sec <= 0:
+                raise RuntimeError(_("ffprobe could not read the duration of {}").format(os.path.basename(self.selected_file)))
+            self.file_duration_seconds = duration_sec
+            self.file_duration = duration_str
+            # Always set end time to file duration, don't use saved values
+            wx.CallAfter(self.end_time_ctrl.SetValue, self.file_duration)
+            get_config_store().update({
+                "TrimLastFile": self.selected_file,
+                "TrimLastDuration": self.file_duration,
+            })
+            wx.CallAfter(self.update_duration_label)
         except Exception as e:
             log.error(f"Failed to get file duration: {str(e)}")
             wx.CallAfter(
@@ -500,14 +462,7 @@ class TrimAudioVideoDialog(wx.Dialog):
         
         def run_preview():
             try:
-                result = subprocess.run(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    creationflags=subprocess.CREATE_NO_WINDOW,
-                    encoding='utf-8',
-                    errors='ignore'
-                )
+                result = run_process(cmd, operation="trim").wait()
                 if result.returncode == 0:
                     time.sleep(0.5)
                     if os.path.exists(self.temp_preview_file) and os.path.getsize(self.temp_preview_file) > 1024:
@@ -525,6 +480,7 @@ class TrimAudioVideoDialog(wx.Dialog):
         
         threading.Thread(target=run_preview, daemon=True).start()
     
+    @profiled("trim.on_trim")
     def on_trim(self, event):
         # DEBUG: Log current state with more details
         log.info(f"=== DEBUG TRIM START ===")
@@ -630,119 +586,50 @@ class TrimAudioVideoDialog(wx.Dialog):
         self.status_label.SetLabel(_("Starting trim operation..."))
         self.progress_bar.SetValue(0)
         
-        cmd = [
-            ffmpeg_path,
-            "-y",
-            "-i", self.selected_file,
-            "-ss", str(start_seconds),
-            "-to", str(end_seconds),
-        ]
+        fade_in = fade_out = None
+        if is_audio_mode and self.fade_checkbox.GetValue():
+            fade_in_start = self.time_to_seconds(self.fade_in_start_ctrl.GetValue()) if self.fade_in_start_ctrl.GetValue() else None
+            fade_in_end = self.time_to_seconds(self.fade_in_end_ctrl.GetValue()) if self.fade_in_end_ctrl.GetValue() else None
+            fade_out_start = self.time_to_seconds(self.fade_out_start_ctrl.GetValue()) if self.fade_out_start_ctrl.GetValue() else None
+            fade_out_end = self.time_to_seconds(self.fade_out_end_ctrl.GetValue()) if self.fade_out_end_ctrl.GetValue() else None
+            if fade_in_start is not None and fade_in_end is not None:
+                fade_in = [fade_in_start, fade_in_end]
+            if fade_out_start is not None and fade_out_end is not None:
+                fade_out = [fade_out_start, fade_out_end]
+        
+        spec = TrimSpec(
+            input=self.selected_file,
+            start=start_seconds,
+            end=end_seconds,
+            output_path=output_path,
+            mode="audio" if is_audio_mode else "video",
+            format=output_format,
+            bitrate_kbps=quality_kbps or 192,
+            fade_in=fade_in,
+            fade_out=fade_out,
+            sample_rate=int(sample_rate) if not is_audio_mode and sample_rate.isdigit() else None,
+            channels=int(audio_channels) if not is_audio_mode and audio_channels else None,
+        )
         
-        # FIXED: Use explicit condition checking to avoid audio processing in video mode
-        if is_audio_mode:
-            # Audio processing
-            log.info("Building command for AUDIO processing")
-            
-            # Only apply fade filter if fade is enabled
-            filter_complex = None
-            if self.fade_checkbox.GetValue():
-                filter_complex = self.build_fade_filter(
-                    self.time_to_seconds(self.fade_in_start_ctrl.GetValue()) if self.fade_in_start_ctrl.GetValue() else None,
-                    self.time_to_seconds(self.fade_in_end_ctrl.GetValue()) if self.fade_in_end_ctrl.GetValue() else None,
-                    self.time_to_seconds(self.fade_out_start_ctrl.GetValue()) if self.fade_out_start_ctrl.GetValue() else None,
-                    self.time_to_seconds(self.fade_out_end_ctrl.GetValue()) if self.fade_out_end_ctrl.GetValue() else None,
-                    trim_duration
-                )
-            
-            if filter_complex:
-                cmd.extend(["-af", filter_complex])
-            
-            if output_format == "mp3":
-                cmd.extend([
-                    "-c:a", "libmp3lame",
-                    "-b:a", f"{quality_kbps}k",
-                    "-ar", "44100",
-                ])
+        source_audio_codec = None
+        if not is_audio_mode:
+            # Detect the source audio codec: PCM audio must be re-encoded for MP4
+            media = probe_media(self.tools_path, self.selected_file)
+            source_audio_codec = media.audio_codec if media else None
+            if source_audio_codec:
+                log.info(f"Detected source audio codec: {source_audio_codec}")
             else:
-                cmd.extend([
-                    "-c:a", "pcm_s16le",
-                    "-ar", "44100",
-                ])
-        else:
-            # Video processing - COMPLETELY REWRITTEN: Force proper MKV to MP4 conversion
-            log.info("Building command for VIDEO processing")
-            # Always detect source audio codec first
-            source_audio_codec = None
-            try:
-                ffprobe_path = os.path.join(self.tools_path, "ffprobe.exe")
-                probe_cmd = [
-                    ffprobe_path,
-                    "-v", "error",
-                    "-select_streams", "a:0",
-                    "-show_entries", "stream=codec_name",
-                    "-of", "default=noprint_wrappers=1:nokey=1",
-                    self.selected_file
-                ]
-                result = subprocess.run(
-                    probe_cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    creationflags=subprocess.CREATE_NO_WINDOW,
-                    encoding='utf-8',
-                    errors='ignore'
-                )
-                if result.returncode == 0:
-                    source_audio_codec = result.stdout.strip().lower()
-                    log.info(f"Detected source audio codec: {source_audio_codec}")
-                else:
-                    log.error(f"FFprobe error: {result.stderr}")
-            except Exception as e:
-                log.error(f"Failed to detect audio codec: {e}")
-
-            # FIXED: Use explicit stream mapping with proper codec selection
-            cmd.extend(["-c:v", "copy"])  # Always copy video stream
-            
-            # Handle audio based on source codec and output format
-            if output_format == "mp4":
-                if source_audio_codec and self.is_pcm_audio(source_audio_codec):
-                    log.info("PCM audio detected, re-encoding to AAC for MP4 compatibility")
-                    cmd.extend(["-c:a", "aac"])
-                    cmd.extend(["-b:a", "192k"])
-                    
-                    # Set sample rate if specified, otherwise use 48000
-                    if sample_rate != "Keep Original":
-                        cmd.extend(["-ar", sample_rate])
-                    else:
-                        cmd.extend(["-ar", "48000"])
-                    
-                    # Set audio channels if specified
-                    if audio_channels is not None:
-                        cmd.extend(["-ac", audio_channels])
-                    else:
-                        cmd.extend(["-ac", "2"])  # Default to stereo
-                else:
-                    # For non-PCM audio, use copy if compatible
-                    log.info("Using copy for audio stream")
-                    cmd.extend(["-c:a", "copy"])
-            else:
-                # For non-MP4 formats, use copy for audio
-                cmd.extend(["-c:a", "copy"])
+                log.error(f"Failed to detect audio codec for {self.selected_file}")
         
-        cmd.append(output_path)
+        cmd = build_trim_command(ffmpeg_path, spec, source_audio_codec)
         
         # Log the command for debugging
         log.info(f"FFmpeg command: {' '.join(cmd)}")
         
+        @profiled("trim.run")
         def run_ffmpeg():
             try:
-                result = subprocess.run(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    creationflags=subprocess.CREATE_NO_WINDOW,
-                    encoding='utf-8',
-                    errors='ignore'
-                )
+                result = run_process(cmd, operation="trim").wait()
                 if result.returncode == 0:
                     try:
                         tones.beep(1000, 300)
@@ -751,7 +638,7 @@ class TrimAudioVideoDialog(wx.Dialog):
                     wx.CallAfter(self.progress_bar.SetValue, 100)
                     wx.CallAfter(self.status_label.SetLabel, _("Trim complete!"))
                     wx.CallAfter(ui.message, _("Trimmed file saved as {}").format(output_path))
-                    config_data = self.load_config()
+                    config_data = {}
                     config_data["TrimLastOutputType"] = "audio" if is_audio_mode else "video"
                     config_data["TrimLastFadeEnabled"] = self.fade_checkbox.GetValue()
                     if is_audio_mode:
@@ -770,7 +657,7 @@ class TrimAudioVideoDialog(wx.Dialog):
                     config_data["TrimLastFadeInEnd"] = self.fade_in_end_ctrl.GetValue()
                     config_data["TrimLastFadeOutStart"] = self.fade_out_start_ctrl.GetValue()
                     config_data["TrimLastFadeOutEnd"] = self.fade_out_end_ctrl.GetValue()
-                    self.save_config(config_data)
+                    get_config_store().update(config_data)
                     wx.CallAfter(self.EndModal, wx.ID_OK)
                 else:
                     error_msg = result.stderr.strip() or _("Unknown error")
@@ -788,11 +675,6 @@ class TrimAudioVideoDialog(wx.Dialog):
                 
         threading.Thread(target=run_ffmpeg, daemon=True).start()
         
-    def is_pcm_audio(self, codec_name):
-        """Check if the audio codec is PCM (uncompressed audio)."""
-        pcm_codecs = ['pcm_s16le', 'pcm_s24le', 'pcm_s32le', 'pcm_f32le', 'pcm_f64le']
-        return codec_name in pcm_codecs
-        
     def on_cancel(self, event):
         self.cleanup_temp_file()
         self.EndModal(wx.ID_CANCEL)
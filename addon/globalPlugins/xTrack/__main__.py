@@ -0,0 +1,211 @@
+# __main__.py
+# Command-line entry point for the headless engine. Run from addon/globalPlugins:
+#   python -m xTrack convert-audio song.wav --format mp3 --bitrate 192
+#   python -m xTrack run jobs.json --json
+#   python -m xTrack --estimate convert-audio *.wav --format mp3
+# ffmpeg and ffprobe are taken from XTRACK_FFMPEG / XTRACK_FFPROBE, --tools or the PATH.
+
+import sys
+import json
+import argparse
+
+from .xTrackCore import probe_media, time_to_seconds, ResourcePolicy, DEFAULT_JOB_PRIORITY, PRIORITY_CLASSES
+from .engine import (
+    ConvertAudioSpec,
+    ConvertVideoSpec,
+    MergeSpec,
+    SplitSpec,
+    TrimSpec,
+    ResizeImageSpec,
+    spec_from_dict,
+    run_spec,
+    estimate_spec,
+)
+from .scheduler import get_default_worker_count
+from .probeCache import get_probe_cache
+from .engine.specs import AUDIO_FORMATS, ENCODER_PROFILES
+from .engine.commands import VIDEO_CONTAINERS, IMAGE_QUALITY_MAP
+
+
+def parse_time(value):
+    """Seconds as a number, MM:SS or HH:MM:SS."""
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return float(time_to_seconds(value))
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid time: {value}")
+
+
+def parse_audio_codec(value):
+    return None if value == "copy" else value
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m xTrack", description="xTrack media engine without NVDA.")
+    parser.add_argument("--tools", help="folder containing ffmpeg.exe and ffprobe.exe")
+    parser.add_argument("--workers", type=int, default=None, help="parallel ffmpeg processes (default: cores - 1)")
+    parser.add_argument("--priority", choices=sorted(PRIORITY_CLASSES), default=DEFAULT_JOB_PRIORITY)
+    parser.add_argument("--threads", type=int, default=0, help="-threads cap per ffmpeg process (0 = automatic)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--estimate", action="store_true",
+        help="predict time and output size from short sample encodes instead of running the job")
+    sub = parser.add_subparsers(dest="command")
+    sub.required = True
+
+    p = sub.add_parser("probe", help="print MediaInfo of files")
+    p.add_argument("inputs", nargs="+")
+
+    p = sub.add_parser("run", help="run job specs from a JSON file (an object or a list of objects)")
+    p.add_argument("spec_file")
+
+    p = sub.add_parser("convert-audio")
+    p.add_argument("inputs", nargs="+")
+    p.add_argument("-o", "--output-dir")
+    p.add_argument("--format", choices=AUDIO_FORMATS, default="mp3",
+                   help="original copies the source's audio stream without re-encoding (.m4a, .opus, .mp3, .flac...)")
+    p.add_argument("--bitrate", type=int, default=320, help="MP3, Opus or AAC bitrate in kbps")
+    p.add_argument("--sample-rate", type=int, default=48000)
+    p.add_argument("--volume", type=float, default=1.0)
+    p.add_argument("--also", nargs="+", default=[], metavar="PROFILE",
+                   help="more outputs from the same decode, e.g. mp3:128 opus:64 flac")
+    p.add_argument("--incremental", action="store_true", help="skip files already converted with these settings")
+    p.add_argument("--loudness", type=float, metavar="LUFS", help="normalize to this integrated loudness, e.g. -16")
+    p.add_argument("--profile", choices=ENCODER_PROFILES, default="balanced", help="encoder speed against size")
+    p.add_argument("--flac-level", type=int, choices=range(13), metavar="0-12",
+                   help="FLAC compression level (default: from --profile)")
+    p.add_argument("--opus-application", choices=["audio", "voip"], default="audio")
+
+    p = sub.add_parser("convert-video")
+    p.add_argument("inputs", nargs="+")
+    p.add_argument("-o", "--output-dir")
+    p.add_argument("--container", choices=VIDEO_CONTAINERS, default="mp4")
+    p.add_argument("--audio-codec", type=parse_audio_codec, default="aac", help="aac, libmp3lame, libvorbis or copy")
+    p.add_argument("--sample-rate", type=int)
+    p.add_argument("--channels", type=int)
+    p.add_argument("--incremental", action="store_true", help="skip files already converted with these settings")
+
+    p = sub.add_parser("merge")
+    p.add_argument("inputs", nargs="+")
+    p.add_argument("-o", "--output", required=True)
+    p.add_argument("--reencode", action="store_true")
+    p.add_argument("--bitrate", type=int, default=192)
+    p.add_argument("--crossfade", type=float, default=0.0, help="seconds, implies --reencode")
+    p.add_argument("--fade-in", type=float, default=0.0)
+
+    p = sub.add_parser("split")
+    p.add_argument("input")
+    p.add_argument("--end-times", type=parse_time, nargs="+", required=True)
+    p.add_argument("-o", "--output-dir")
+
+    p = sub.add_parser("trim")
+    p.add_argument("input")
+    p.add_argument("--start", type=parse_time, required=True)
+    p.add_argument("--end", type=parse_time, required=True)
+    p.add_argument("-o", "--output", required=True)
+    p.add_argument("--mode", choices=["audio", "video"], default="audio")
+    p.add_argument("--format", default="mp3")
+    p.add_argument("--bitrate", type=int, default=192)
+    p.add_argument("--fade-in", type=parse_time, nargs=2, metavar=("START", "END"))
+    p.add_argument("--fade-out", type=parse_time, nargs=2, metavar=("START", "END"))
+
+    p = sub.add_parser("resize-image")
+    p.add_argument("inputs", nargs="+")
+    p.add_argument("-o", "--output-dir", required=True)
+    p.add_argument("--width", type=int, required=True)
+    p.add_argument("--height", type=int, required=True)
+    p.add_argument("--no-keep-aspect", action="store_true")
+    p.add_argument("--crop", type=int, nargs=4, metavar=("TOP", "BOTTOM", "LEFT", "RIGHT"))
+    p.add_argument("--format", choices=["jpeg", "png", "webp", "bmp", "tiff", "gif"], default="jpeg")
+    p.add_argument("--quality", choices=list(IMAGE_QUALITY_MAP), default="normal")
+    p.add_argument("--name", help="output file name without extension (single input only)")
+    return parser
+
+
+DEFAULT_BITRATES = {"mp3": 320, "opus": 64, "aac": 192}
+
+
+def parse_audio_profile(text):
+    """"mp3:128", "opus:64" or "flac" as a ConvertAudioSpec extra output."""
+    output_format, _sep, bitrate = text.lower().partition(":")
+    if output_format not in AUDIO_FORMATS:
+        raise SystemExit(f"unknown output profile: {text}")
+    return {"format": output_format, "bitrate_kbps": int(bitrate) if bitrate else DEFAULT_BITRATES.get(output_format, 0)}
+
+
+def build_specs(args):
+    if args.command == "run":
+        with open(args.spec_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return [spec_from_dict(item) for item in (data if isinstance(data, list) else [data])]
+    if args.command == "convert-audio":
+        return [ConvertAudioSpec(args.inputs, args.output_dir, args.format, args.bitrate, args.sample_rate, args.volume,
+                                 [parse_audio_profile(profile) for profile in args.also], args.incremental,
+                                 args.loudness, args.profile, args.flac_level, args.opus_application)]
+    if args.command == "convert-video":
+        return [ConvertVideoSpec(args.inputs, args.output_dir, args.container, args.audio_codec, args.sample_rate, args.channels,
+                                 args.incremental)]
+    if args.command == "merge":
+        return [MergeSpec(args.inputs, args.output, args.reencode or args.crossfade > 0, args.bitrate, args.crossfade, args.fade_in)]
+    if args.command == "split":
+        return [SplitSpec(args.input, args.end_times, args.output_dir)]
+    if args.command == "trim":
+        return [TrimSpec(args.input, args.start, args.end, args.output, args.mode, args.format, args.bitrate,
+            args.fade_in, args.fade_out)]
+    if args.command == "resize-image":
+        return [ResizeImageSpec(args.inputs, args.output_dir, args.width, args.height, not args.no_keep_aspect,
+            args.crop, args.format, args.quality, args.name)]
+    raise ValueError(args.command)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.command == "probe":
+        results = {}
+        for path in args.inputs:
+            media = probe_media(args.tools, path)
+            results[path] = media.to_dict() if media else None
+        print(json.dumps(results, indent=2))
+        return 0 if all(results.values()) else 1
+
+    policy = ResourcePolicy(args.priority, args.threads)
+    if args.estimate:
+        estimates = []
+        for spec in build_specs(args):
+            estimate = estimate_spec(spec, tools_path=args.tools, workers=args.workers or get_default_worker_count(),
+                policy=policy)
+            estimates.append(estimate.to_dict() if estimate else None)
+        if args.json:
+            print(json.dumps(estimates, indent=2))
+        else:
+            for estimate in estimates:
+                if estimate is None:
+                    print("estimate failed: no sample could be encoded", file=sys.stderr)
+                else:
+                    print(f"{estimate['seconds']:.1f}s\t{estimate['bytes'] / (1024 * 1024):.1f} MB\t"
+                        f"{estimate['files']} files, {estimate['sampled']} sampled")
+        return 0 if all(estimates) else 1
+
+    results = []
+    for spec in build_specs(args):
+        results.extend(run_spec(spec, tools_path=args.tools, max_workers=args.workers, policy=policy))
+
+    if args.json:
+        print(json.dumps([result.to_dict() for result in results], indent=2))
+    else:
+        for result in results:
+            status = "skipped" if result.skipped else "ok" if result.ok else "FAILED"
+            print(f"{status}\t{result.elapsed:.2f}s\t{result.input} -> {result.output}")
+            if not result.ok and result.error:
+                print(result.error.splitlines()[-1] if result.error.splitlines() else result.error, file=sys.stderr)
+    return 0 if all(result.ok for result in results) else 1
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    finally:
+        # Keep probe results and loudness measurements for the next run
+        get_probe_cache().flush()
@@ -0,0 +1,248 @@
+# catalog.py
+# Optional SQLite catalog of media files in frequently used folders (the recordings folder
+# and any configured in "CatalogFolders"). A background indexer keeps it up to date by size
+# and mtime, and probe lookups consult it before running ffprobe.
+
+import os
+import json
+import time
+import logging
+import threading
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+from .xTrackCore import get_config_dir, MediaInfo, ResourcePolicy, find_tool, probe_media
+from .mediaFiles import iter_media_files
+
+CATALOG_FILE_NAME = "xTrackCatalog.sqlite3"
+SCHEMA_VERSION = 2
+COMMIT_EVERY = 50  # indexed files per transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    folder TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    duration REAL,
+    format_name TEXT,
+    audio_codec TEXT,
+    video_codec TEXT,
+    bit_rate INTEGER,
+    sample_rate INTEGER,
+    channels INTEGER,
+    width INTEGER,
+    height INTEGER,
+    loudnorm TEXT,
+    media TEXT NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_folder ON files (folder);
+"""
+
+
+def _key(file_path):
+    return os.path.normcase(os.path.abspath(file_path))
+
+
+class MediaCatalog:
+    """SQLite table of MediaInfo per file, valid while the file's size and mtime are unchanged."""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.path.join(get_config_dir(), CATALOG_FILE_NAME)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                self._connection.execute("DROP TABLE IF EXISTS files")
+                self._connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            self._connection.executescript(SCHEMA)
+            self._connection.commit()
+
+    def lookup(self, file_path):
+        """MediaInfo of file_path if it is catalogued and unchanged on disk, else None."""
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT size, mtime, media FROM files WHERE path = ?", (_key(file_path),)).fetchone()
+        if row is None or row[0] != st.st_size or row[1] != st.st_mtime:
+            return None
+        try:
+            return MediaInfo.from_dict(file_path, json.loads(row[2]))
+        except Exception:
+            return None
+
+    def get_loudness(self, file_path):
+        """Catalogued loudnorm measurement (see engine/loudness.py) of an unchanged file, or None."""
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT size, mtime, loudnorm FROM files WHERE path = ?", (_key(file_path),)).fetchone()
+        if row is None or row[0] != st.st_size or row[1] != st.st_mtime or row[2] is None:
+            return None
+        try:
+            return json.loads(row[2])
+        except ValueError:
+            return None
+
+    def set_loudness(self, file_path, loudness):
+        """Store the loudnorm measurement of a catalogued file that is unchanged on disk."""
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return
+        with self._lock:
+            self._connection.execute(
+                "UPDATE files SET loudnorm = ? WHERE path = ? AND size = ? AND mtime = ?",
+                (json.dumps(loudness), _key(file_path), st.st_size, st.st_mtime))
+            self._connection.commit()
+
+    def signatures(self, folder):
+        """{path key: (size, mtime)} of everything catalogued under folder."""
+        prefix = _key(folder).rstrip(os.sep) + os.sep
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT path, size, mtime FROM files WHERE folder = ? OR substr(folder, 1, ?) = ?",
+                (_key(folder), len(prefix), prefix)).fetchall()
+        return {path: (size, mtime) for path, size, mtime in rows}
+
+    def store(self, file_path, size, mtime, media, loudness=None):
+        """Insert or replace one file; loudness is its loudnorm measurement or None. Committed by commit()."""
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO files (path, folder, size, mtime, duration, format_name, audio_codec, "
+                "video_codec, bit_rate, sample_rate, channels, width, height, loudnorm, media, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    _key(file_path), _key(os.path.dirname(file_path)), size, mtime,
+                    media.duration, media.format_name, media.audio_codec, media.video_codec,
+                    media.bit_rate, media.sample_rate, media.channels, media.width, media.height,
+                    json.dumps(loudness) if loudness else None, json.dumps(media.to_dict()), time.time(),
+                ))
+
+    def remove(self, path_keys):
+        with self._lock:
+            self._connection.executemany("DELETE FROM files WHERE path = ?", [(key,) for key in path_keys])
+
+    def commit(self):
+        with self._lock:
+            self._connection.commit()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class CatalogIndexer:
+    """Brings the catalog up to date for a list of folders on a daemon thread."""
+
+    def __init__(self, catalog, tools_path, folders, with_loudness=False):
+        self.catalog = catalog
+        self.tools_path = tools_path
+        self.ffmpeg_path = find_tool(tools_path, "ffmpeg") if with_loudness else None
+        self.folders = folders
+        self.with_loudness = with_loudness
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name="xTrackCatalogIndexer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self):
+        start = time.perf_counter()
+        indexed = 0
+        for folder in self.folders:
+            if not os.path.isdir(folder):
+                continue
+            known = self.catalog.signatures(folder)
+            seen = set()
+            for file_path, _kind in iter_media_files(folder, recursive=True):
+                if self._stop.is_set():
+                    self.catalog.commit()
+                    return
+                key = _key(file_path)
+                seen.add(key)
+                try:
+                    st = os.stat(file_path)
+                except OSError:
+                    continue
+                if known.get(key) == (st.st_size, st.st_mtime):
+                    continue
+                media = probe_media(self.tools_path, file_path, low_priority=True, cache=False)
+                if media is None:
+                    continue
+                loudness = None
+                if self.ffmpeg_path and media.audio_streams:
+                    from .engine.loudness import measure_loudness
+                    # The measurement the loudness normalization of Convert Audio uses; like the
+                    # probe it is kept in the catalog rather than the probe cache
+                    loudness = measure_loudness(self.ffmpeg_path, file_path, policy=ResourcePolicy("idle"),
+                        cache=False)
+                self.catalog.store(file_path, st.st_size, st.st_mtime, media, loudness)
+                indexed += 1
+                if indexed % COMMIT_EVERY == 0:
+                    self.catalog.commit()
+            # Files deleted or moved since the last run
+            self.catalog.remove(set(known) - seen)
+            self.catalog.commit()
+        logging.info(f"xTrack: catalog indexed {indexed} changed files in {time.perf_counter() - start:.1f} s")
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_media_catalog():
+    """The add-on-wide catalog, or None when it is disabled or SQLite is unavailable."""
+    global _catalog
+    from .configStore import get_config_store
+    if sqlite3 is None or not get_config_store().get("CatalogEnabled", False):
+        return None
+    with _catalog_lock:
+        if _catalog is None:
+            try:
+                _catalog = MediaCatalog()
+            except Exception as e:
+                logging.error(f"xTrack: failed to open the media catalog: {e}")
+                return None
+        return _catalog
+
+
+def get_catalog_folders():
+    """Folders to index: "CatalogFolders" plus the recordings folder."""
+    from .configStore import get_config_store
+    config_store = get_config_store()
+    folders = list(config_store.get("CatalogFolders", []))
+    destination = (config_store.get("record") or {}).get("destinationFolder")
+    if destination and destination not in folders:
+        folders.append(destination)
+    return folders
+
+
+def start_catalog_indexer(tools_path):
+    """Start indexing the catalog folders in the background; returns the indexer or None."""
+    from .configStore import get_config_store
+    catalog = get_media_catalog()
+    if catalog is None:
+        return None
+    indexer = CatalogIndexer(catalog, tools_path, get_catalog_folders(),
+        with_loudness=bool(get_config_store().get("CatalogMeasureLoudness", False)))
+    indexer.start()
+    return indexer
@@ -0,0 +1,111 @@
+# configStore.py
+# The add-on's settings (xTrack.json), kept in memory and shared by the plugin and all dialogs.
+
+import os
+import copy
+import json
+import logging
+import threading
+
+from .xTrackCore import get_config_path
+
+SAVE_DELAY = 1.0
+
+
+class ConfigStore:
+    """Parsed xTrack.json, loaded once and written back in the background.
+
+    Reads never touch the disk after the first one. Changes are coalesced by a short
+    timer and written atomically (temporary file + os.replace) on the timer thread,
+    so saving settings never blocks the UI thread.
+    """
+    def __init__(self, config_path=None):
+        self.config_path = config_path or get_config_path()
+        self._data = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._loaded = False
+        self._dirty = False
+        self._save_timer = None
+
+    def _load(self):
+        # Called with self._lock held.
+        self._loaded = True
+        try:
+            if not os.path.exists(self.config_path):
+                return
+            with open(self.config_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._data = data
+        except Exception as e:
+            logging.error(f"xTrack: failed to load configuration: {e}")
+
+    def get(self, key, default=None):
+        """Return a copy of the value of key, or default."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if key not in self._data:
+                return default
+            return copy.deepcopy(self._data[key])
+
+    def set(self, key, value):
+        self.update({key: value})
+
+    def update(self, values):
+        """Set several keys at once; they are saved together."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            for key, value in values.items():
+                self._data[key] = copy.deepcopy(value)
+            self._dirty = True
+            self._schedule_save()
+
+    def _schedule_save(self):
+        # Called with self._lock held.
+        if self._save_timer is not None:
+            return
+        self._save_timer = threading.Timer(SAVE_DELAY, self.flush)
+        self._save_timer.daemon = True
+        self._save_timer.start()
+
+    def flush(self):
+        """Write pending changes to disk now."""
+        # The write lock keeps concurrent flushes from writing an older snapshot last
+        with self._write_lock:
+            with self._lock:
+                if self._save_timer is not None:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                text = json.dumps(self._data, indent=4, ensure_ascii=False)
+            self._write(text)
+
+    def _write(self, text):
+        try:
+            config_dir = os.path.dirname(self.config_path)
+            if not os.path.exists(config_dir):
+                os.makedirs(config_dir)
+            temp_path = self.config_path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(temp_path, self.config_path)
+        except Exception as e:
+            logging.error(f"xTrack: failed to save configuration: {e}")
+
+
+_config_store = None
+_config_store_lock = threading.Lock()
+
+
+def get_config_store():
+    """Return the add-on-wide configuration store."""
+    global _config_store
+    with _config_store_lock:
+        if _config_store is None:
+            _config_store = ConfigStore()
+        return _config_store
@@ -5,18 +5,57 @@ import os
 import subprocess
 import threading
 import ui
-import tones
 import json
-import queue
 import time
 from gui import guiHelper
-from .xTrackCore import load_config, save_config, get_file_duration
+from .xTrackCore import get_file_duration, probe_media, ProgressReader, run_process
+from .profiling import profiled
+from .configStore import get_config_store
+from .scheduler import get_scheduler
+from .engine.specs import AUDIO_FORMATS, ENCODER_PROFILES, BITRATE_FORMATS
+from .engine import ConvertAudioSpec, measure_loudness, get_cached_loudness
+from .engine.chunking import chunk_count, convert_chunked
+from .engine.commands import convert_audio_command
+from .dialogMixins import MediaListMixin, EstimateMixin, ConversionBatchMixin
 import addonHandler
 
 addonHandler.initTranslation()
 
-class ConvertAudioDialog(wx.Dialog):
-    """Dialog for converting various audio/video formats to MP3 or WAV, including same-format re-encoding."""
+# Further outputs the same ffmpeg run can write: (label, format, bitrate_kbps)
+EXTRA_OUTPUT_CHOICES = [
+    ("MP3 320 kbps", "mp3", 320),
+    ("MP3 256 kbps", "mp3", 256),
+    ("MP3 192 kbps", "mp3", 192),
+    ("MP3 128 kbps", "mp3", 128),
+    ("WAV", "wav", 0),
+    ("FLAC", "flac", 0),
+    ("Opus 64 kbps", "opus", 64),
+    ("AAC 192 kbps", "aac", 192),
+]
+OPUS_APPLICATIONS = ["audio", "voip"]
+
+# Loudness normalization targets in LUFS, None = use the Volume setting
+LOUDNESS_TARGETS = [None, -14.0, -16.0, -18.0, -23.0]
+
+def get_encoder_profile_labels():
+    return [_("Fast"), _("Balanced"), _("Best")]
+
+def get_opus_application_labels():
+    return [_("Audio (music)"), _("VoIP (speech)")]
+
+def get_loudness_labels():
+    return [
+        _("Off (use Volume)"),
+        _("-14 LUFS (streaming)"),
+        _("-16 LUFS (podcasts)"),
+        _("-18 LUFS"),
+        _("-23 LUFS (EBU R128 broadcast)"),
+    ]
+
+class ConvertAudioDialog(MediaListMixin, EstimateMixin, ConversionBatchMixin, wx.Dialog):
+    """Dialog for converting various audio/video formats to MP3, WAV, FLAC, Opus or AAC, including same-format re-encoding,
+    or extracting the original audio of videos without re-encoding."""
+    @profiled("convert_audio.open")
     def __init__(self, parent, selected_files, tools_path):
         super().__init__(parent, title=_("Convert Audio"))
         self.selected_files = selected_files
@@ -24,24 +63,30 @@ class ConvertAudioDialog(wx.Dialog):
         self.current_file_index = 0
         self.file_duration_seconds = 0
         self.output_path = os.path.dirname(self.selected_files[0]) if self.selected_files else os.getcwd()
-        self.config_path = os.path.join(os.path.expanduser("~"), "AppData", "Roaming", "nvda", "config", "xTrack.json")
-        self.ffmpeg_process = None
         self.is_paused = False
-        self.conversion_queue = queue.Queue()
-        self.currently_processing = False
+        self.job_group = f"convertAudio-{id(self)}"
+        self.init_batch()
+        self.total_outputs = 0
+        self.chunk_workers = 1  # processes one long file may be split across
         self.file_durations = {}
+        self.show_cached_media()
         self.init_ui()
         self.SetTitle(_("Convert Audio: {} files").format(len(self.selected_files)))
         self.load_settings()
         self.Bind(wx.EVT_CLOSE, self.on_close)
-        threading.Thread(target=self.load_file_durations, daemon=True).start()
+        threading.Thread(target=self.probe_remaining_files, daemon=True).start()
 
-    def load_file_durations(self):
-        """Load durations for all selected files."""
-        for file_path in self.selected_files:
-            duration_sec, duration_str = get_file_duration(self.tools_path, file_path)
-            self.file_durations[file_path] = self.format_duration(duration_sec)
-        wx.CallAfter(self.update_file_listbox)
+    def store_file_info(self, file_path, media):
+        self.file_durations[file_path] = self.format_duration(media.duration if media else 0)
+
+    def update_file_entry(self, file_path):
+        """Refresh one listbox entry and the current file info if it is affected."""
+        if not self or file_path not in self.selected_files:
+            return
+        index = self.selected_files.index(file_path)
+        self.file_listbox.SetString(index, self.get_file_display_name(file_path))
+        if index == self.current_file_index:
+            self.duration_label.SetLabel(_("File Duration: {}").format(self.file_durations[file_path]))
 
     def format_duration(self, seconds):
         """Format duration in seconds to HhMMminSSsec format."""
@@ -82,7 +127,8 @@ class ConvertAudioDialog(wx.Dialog):
         format_sizer = wx.BoxSizer(wx.HORIZONTAL)
         format_label = wx.StaticText(self, label=_("Output Format:"))
         format_sizer.Add(format_label, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALL, 5)
-        format_choices = ["MP3", "WAV"]
+        # In the order of AUDIO_FORMATS
+        format_choices = ["MP3", "WAV", "FLAC", "Opus", "AAC", _("Original Audio (no re-encoding)")]
         self.format_ctrl = wx.ComboBox(self, choices=format_choices, style=wx.CB_READONLY)
         self.format_ctrl.SetStringSelection("MP3")
         format_sizer.Add(self.format_ctrl, 1, wx.EXPAND | wx.ALL, 5)
@@ -90,13 +136,38 @@ class ConvertAudioDialog(wx.Dialog):
         
         # Quality setting
         quality_sizer = wx.BoxSizer(wx.HORIZONTAL)
-        quality_label = wx.StaticText(self, label=_("MP3 Quality:"))
+        quality_label = wx.StaticText(self, label=_("Bitrate:"))
         quality_sizer.Add(quality_label, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALL, 5)
-        quality_choices = ["320 kbps", "256 kbps", "192 kbps", "128 kbps"]
+        quality_choices = ["320 kbps", "256 kbps", "192 kbps", "128 kbps", "96 kbps", "64 kbps", "48 kbps", "32 kbps"]
         self.quality_ctrl = wx.ComboBox(self, choices=quality_choices, style=wx.CB_READONLY)
         quality_sizer.Add(self.quality_ctrl, 1, wx.EXPAND | wx.ALL, 5)
         settings_sizer.Add(quality_sizer, 0, wx.EXPAND | wx.ALL, 5)
         
+        # Encoder speed profile
+        profile_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        profile_label = wx.StaticText(self, label=_("Encoder Profile:"))
+        profile_sizer.Add(profile_label, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALL, 5)
+        self.encoder_profile_ctrl = wx.ComboBox(self, choices=get_encoder_profile_labels(), style=wx.CB_READONLY)
+        profile_sizer.Add(self.encoder_profile_ctrl, 1, wx.EXPAND | wx.ALL, 5)
+        settings_sizer.Add(profile_sizer, 0, wx.EXPAND | wx.ALL, 5)
+        
+        # FLAC compression level
+        flac_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        flac_label = wx.StaticText(self, label=_("FLAC Compression Level:"))
+        flac_sizer.Add(flac_label, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALL, 5)
+        flac_choices = [_("From encoder profile")] + [str(level) for level in range(13)]
+        self.flac_level_ctrl = wx.ComboBox(self, choices=flac_choices, style=wx.CB_READONLY)
+        flac_sizer.Add(self.flac_level_ctrl, 1, wx.EXPAND | wx.ALL, 5)
+        settings_sizer.Add(flac_sizer, 0, wx.EXPAND | wx.ALL, 5)
+        
+        # Opus application
+        opus_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        opus_label = wx.StaticText(self, label=_("Opus Tuned For:"))
+        opus_sizer.Add(opus_label, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALL, 5)
+        self.opus_application_ctrl = wx.ComboBox(self, choices=get_opus_application_labels(), style=wx.CB_READONLY)
+        opus_sizer.Add(self.opus_application_ctrl, 1, wx.EXPAND | wx.ALL, 5)
+        settings_sizer.Add(opus_sizer, 0, wx.EXPAND | wx.ALL, 5)
+        
         # Sample rate setting
         samplerate_sizer = wx.BoxSizer(wx.HORIZONTAL)
         samplerate_label = wx.StaticText(self, label=_("Sample Rate:"))
@@ -115,6 +186,23 @@ class ConvertAudioDialog(wx.Dialog):
         volume_sizer.Add(self.volume_ctrl, 1, wx.EXPAND | wx.ALL, 5)
         settings_sizer.Add(volume_sizer, 0, wx.EXPAND | wx.ALL, 5)
         
+        # Two-pass loudness normalization, replacing the fixed volume
+        loudness_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        loudness_label = wx.StaticText(self, label=_("Normalize Loudness:"))
+        loudness_sizer.Add(loudness_label, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALL, 5)
+        self.loudness_ctrl = wx.ComboBox(self, choices=get_loudness_labels(), style=wx.CB_READONLY)
+        self.loudness_ctrl.SetSelection(0)
+        loudness_sizer.Add(self.loudness_ctrl, 1, wx.EXPAND | wx.ALL, 5)
+        settings_sizer.Add(loudness_sizer, 0, wx.EXPAND | wx.ALL, 5)
+        
+        # Further output profiles, written from the same decode of each file
+        extra_label = wx.StaticText(self, label=_("Also Create:"))
+        settings_sizer.Add(extra_label, 0, wx.ALL, 5)
+        self.extra_outputs_ctrl = wx.CheckListBox(self, choices=[label for label, _format, _bitrate in EXTRA_OUTPUT_CHOICES])
+        settings_sizer.Add(self.extra_outputs_ctrl, 0, wx.EXPAND | wx.ALL, 5)
+        
+        self.add_incremental_checkbox(settings_sizer)
+        
         # Add same-format conversion note
         note_sizer = wx.BoxSizer(wx.HORIZONTAL)
         note_label = wx.StaticText(self, label=_("Note: You can now convert files to the same format (e.g., MP3 to MP3) to change quality, volume, or sample rate."))
@@ -132,6 +220,8 @@ class ConvertAudioDialog(wx.Dialog):
         self.status_label = wx.StaticText(self, label="")
         main_sizer.Add(self.status_label, 0, wx.EXPAND | wx.ALL, 5)
         
+        self.add_estimate_button(main_sizer)
+        
         # Buttons
         btn_sizer = wx.StdDialogButtonSizer()
         self.convert_btn = wx.Button(self, wx.ID_OK, label=_("Convert"))
@@ -150,6 +240,7 @@ class ConvertAudioDialog(wx.Dialog):
         
         # Bind format change event
         self.format_ctrl.Bind(wx.EVT_COMBOBOX, self.on_format_change)
+        self.loudness_ctrl.Bind(wx.EVT_COMBOBOX, self.on_loudness_change)
         
         # Update current file info
         if self.selected_files:
@@ -166,8 +257,42 @@ class ConvertAudioDialog(wx.Dialog):
         self.file_listbox.Set([self.get_file_display_name(f) for f in self.selected_files])
 
     def on_format_change(self, event):
-        """Enable/disable quality control based on format selection."""
-        self.quality_ctrl.Enable(self.format_ctrl.GetStringSelection() == "MP3")
+        """Enable the controls that apply to the selected format."""
+        output_format = self.get_output_format()
+        self.quality_ctrl.Enable(output_format in BITRATE_FORMATS)
+        self.flac_level_ctrl.Enable(output_format == "flac")
+        self.opus_application_ctrl.Enable(output_format == "opus")
+        # Original audio is copied as is: no encoder, sample rate or level settings apply
+        encoded = output_format != "original"
+        self.encoder_profile_ctrl.Enable(encoded)
+        self.samplerate_ctrl.Enable(encoded)
+        self.loudness_ctrl.Enable(encoded)
+        self.on_loudness_change(event)
+
+    def on_loudness_change(self, event):
+        """Volume has no effect when loudness is normalized."""
+        self.volume_ctrl.Enable(self.get_output_format() != "original" and self.get_loudness_target() is None)
+
+    def get_output_format(self):
+        index = self.format_ctrl.GetSelection()
+        return AUDIO_FORMATS[index] if 0 <= index < len(AUDIO_FORMATS) else "mp3"
+
+    def get_encoder_profile(self):
+        index = self.encoder_profile_ctrl.GetSelection()
+        return ENCODER_PROFILES[index] if 0 <= index < len(ENCODER_PROFILES) else "balanced"
+
+    def get_flac_level(self):
+        """FLAC compression level, or None to follow the encoder profile."""
+        index = self.flac_level_ctrl.GetSelection()
+        return index - 1 if index > 0 else None
+
+    def get_opus_application(self):
+        index = self.opus_application_ctrl.GetSelection()
+        return OPUS_APPLICATIONS[index] if 0 <= index < len(OPUS_APPLICATIONS) else "audio"
+
+    def get_loudness_target(self):
+        index = self.loudness_ctrl.GetSelection()
+        return LOUDNESS_TARGETS[index] if 0 <= index < len(LOUDNESS_TARGETS) else None
 
     def update_current_file_info(self, index):
         if index < len(self.selected_files):
@@ -176,28 +301,39 @@ class ConvertAudioDialog(wx.Dialog):
             self.file_listbox.SetSelection(index)
             duration = self.file_durations.get(self.selected_files[index], _("Calculating..."))
             self.duration_label.SetLabel(_("File Duration: {}").format(duration))
-            self.file_duration_seconds = self.get_duration_seconds(self.selected_files[index])
-
-    def get_duration_seconds(self, file_path):
-        """Get duration in seconds for a file."""
-        duration_sec, _ = get_file_duration(self.tools_path, file_path)
-        return duration_sec
 
     def load_settings(self):
-        config_data = load_config(self.config_path)
-        self.format_ctrl.SetStringSelection(config_data.get("ConvertAudioFormat", "MP3"))
-        self.quality_ctrl.SetStringSelection(config_data.get("ConvertAudioQuality", "320 kbps"))
-        self.samplerate_ctrl.SetStringSelection(config_data.get("ConvertAudioSampleRate", "48 kHz"))
-        self.volume_ctrl.SetStringSelection(config_data.get("ConvertAudioVolume", "100%"))
+        config_store = get_config_store()
+        self.format_ctrl.SetStringSelection(config_store.get("ConvertAudioFormat", "MP3"))
+        self.quality_ctrl.SetStringSelection(config_store.get("ConvertAudioQuality", "320 kbps"))
+        self.samplerate_ctrl.SetStringSelection(config_store.get("ConvertAudioSampleRate", "48 kHz"))
+        self.volume_ctrl.SetStringSelection(config_store.get("ConvertAudioVolume", "100%"))
+        extra_outputs = config_store.get("ConvertAudioExtraOutputs", [])
+        self.extra_outputs_ctrl.SetCheckedStrings([label for label in extra_outputs if self.extra_outputs_ctrl.FindString(label) != wx.NOT_FOUND])
+        self.incremental_ctrl.SetValue(config_store.get("ConvertAudioIncremental", False))
+        encoder_profile = config_store.get("ConvertAudioEncoderProfile", "balanced")
+        self.encoder_profile_ctrl.SetSelection(ENCODER_PROFILES.index(encoder_profile) if encoder_profile in ENCODER_PROFILES else 1)
+        flac_level = config_store.get("ConvertAudioFlacLevel", None)
+        self.flac_level_ctrl.SetSelection(flac_level + 1 if isinstance(flac_level, int) and 0 <= flac_level <= 12 else 0)
+        opus_application = config_store.get("ConvertAudioOpusApplication", "audio")
+        self.opus_application_ctrl.SetSelection(OPUS_APPLICATIONS.index(opus_application) if opus_application in OPUS_APPLICATIONS else 0)
+        loudness_target = config_store.get("ConvertAudioLoudnessTarget", None)
+        self.loudness_ctrl.SetSelection(LOUDNESS_TARGETS.index(loudness_target) if loudness_target in LOUDNESS_TARGETS else 0)
         self.on_format_change(None)
 
     def save_settings(self):
-        config_data = load_config(self.config_path)
+        config_data = {}
         config_data["ConvertAudioFormat"] = self.format_ctrl.GetStringSelection()
         config_data["ConvertAudioQuality"] = self.quality_ctrl.GetStringSelection()
         config_data["ConvertAudioSampleRate"] = self.samplerate_ctrl.GetStringSelection()
         config_data["ConvertAudioVolume"] = self.volume_ctrl.GetStringSelection()
-        save_config(self.config_path, config_data)
+        config_data["ConvertAudioExtraOutputs"] = list(self.extra_outputs_ctrl.GetCheckedStrings())
+        config_data["ConvertAudioIncremental"] = self.incremental_ctrl.GetValue()
+        config_data["ConvertAudioLoudnessTarget"] = self.get_loudness_target()
+        config_data["ConvertAudioEncoderProfile"] = self.get_encoder_profile()
+        config_data["ConvertAudioFlacLevel"] = self.get_flac_level()
+        config_data["ConvertAudioOpusApplication"] = self.get_opus_application()
+        get_config_store().update(config_data)
 
     def get_file_duration(self):
         if self.current_file_index < len(self.selected_files):
@@ -207,204 +343,118 @@ class ConvertAudioDialog(wx.Dialog):
             wx.CallAfter(self.duration_label.SetLabel, _("File Duration: {}").format(self.format_duration(duration_sec)))
 
     def on_convert_or_pause(self, event):
-        if self.ffmpeg_process and self.ffmpeg_process.poll() is None:
+        if self.currently_processing:
             self.toggle_pause()
         else:
             self.on_convert(event)
 
+    def running_processes(self):
+        """Return the ffmpeg processes of this dialog that are still running."""
+        return [job.process for job in self.jobs if job.process is not None and job.process.poll() is None]
+
     def toggle_pause(self):
-        if not self.ffmpeg_process:
+        processes = self.running_processes()
+        if not processes:
             return
         
         if self.is_paused:
-            self.ffmpeg_process.send_signal(subprocess.signal.SIGCONT)
+            for process in processes:
+                process.send_signal(subprocess.signal.SIGCONT)
             self.is_paused = False
             self.convert_btn.SetLabel(_("Pause"))
             self.status_label.SetLabel(_("Resuming..."))
         else:
-            self.ffmpeg_process.send_signal(subprocess.signal.SIGSTOP)
+            for process in processes:
+                process.send_signal(subprocess.signal.SIGSTOP)
             self.is_paused = True
             self.convert_btn.SetLabel(_("Resume"))
             self.status_label.SetLabel(_("Paused."))
         
         ui.message(self.status_label.GetLabel())
 
+    def get_conversion_settings(self):
+        """Read the conversion settings from the controls (UI thread only)."""
+        output_format = self.get_output_format()
+        checked = set(self.extra_outputs_ctrl.GetCheckedStrings())
+        extra_outputs = [{"format": extra_format, "bitrate_kbps": bitrate}
+            for label, extra_format, bitrate in EXTRA_OUTPUT_CHOICES if label in checked]
+        return ConvertAudioSpec(
+            inputs=list(self.selected_files),
+            output_dir=self.output_path,
+            format=output_format,
+            bitrate_kbps=int(self.quality_ctrl.GetStringSelection().split()[0]),
+            sample_rate=int(float(self.samplerate_ctrl.GetStringSelection().replace(' kHz', '')) * 1000),
+            volume=int(self.volume_ctrl.GetStringSelection().replace('%', '')) / 100,
+            extra_outputs=extra_outputs,
+            incremental=self.incremental_ctrl.GetValue(),
+            loudness_target=self.get_loudness_target(),
+            encoder_profile=self.get_encoder_profile(),
+            flac_level=self.get_flac_level(),
+            opus_application=self.get_opus_application(),
+        )
+
+    @profiled("convert_audio.on_convert")
     def on_convert(self, event):
         self.save_settings()
-        
-        # Add all files to queue (including those with same format)
-        for file_path in self.selected_files:
-            self.conversion_queue.put(file_path)
-        
-        # Start processing
-        self.currently_processing = True
-        self.process_next_file()
-
-    def process_next_file(self):
-        if self.conversion_queue.empty():
-            self.currently_processing = False
-            wx.CallAfter(self.on_all_conversions_complete)
-            return
-            
-        file_path = self.conversion_queue.get()
-        self.update_current_file_info(self.selected_files.index(file_path))
-        
-        output_format = self.format_ctrl.GetStringSelection().lower()
-        quality_kbps = self.quality_ctrl.GetStringSelection().split()[0] if output_format == "mp3" else None
-        samplerate_str = self.samplerate_ctrl.GetStringSelection().replace(' kHz', '000')
-        volume_percent = int(self.volume_ctrl.GetStringSelection().replace('%', '')) / 100
-        
-        base_name = os.path.splitext(os.path.basename(file_path))[0]
-        input_ext = os.path.splitext(file_path)[1].lower()
-        input_format = input_ext[1:] if input_ext else ""  # Remove the dot
-        
-        # Create output filename based on input format and output format
-        # If input format is same as output format, append "_converted" to avoid overwriting
-        if input_format == output_format:
-            output_file = f"{base_name}_converted.{output_format}"
-        else:
-            output_file = f"{base_name}.{output_format}"
-        
-        output_path = os.path.join(self.output_path, output_file)
-        
-        ffmpeg_path = os.path.join(self.tools_path, "ffmpeg.exe")
-        if not os.path.exists(ffmpeg_path):
-            ui.message(_("ffmpeg.exe not found"))
-            return
-        
-        # Build command based on format
-        cmd = [
-            ffmpeg_path,
-            "-i", file_path,
-            "-vn",  # No video
-            "-ar", samplerate_str,
-            "-af", f"volume={volume_percent}",
-            "-progress", "pipe:1",
-            "-nostats",
-            "-y",  # Overwrite output file if exists
-        ]
-        
-        if output_format == "mp3":
-            cmd.extend([
-                "-c:a", "libmp3lame",
-                "-b:a", f"{quality_kbps}k",
-            ])
-        else:  # WAV
-            cmd.extend([
-                "-c:a", "pcm_s16le",
-            ])
-        
-        cmd.append(output_path)
-        
-        wx.CallAfter(self.convert_btn.SetLabel, _("Pause"))
-        wx.CallAfter(self.cancel_btn.Enable, False)
-        wx.CallAfter(self.status_label.SetLabel, _("Starting conversion..."))
-        wx.CallAfter(self.progress_bar.SetValue, 0)
-        
-        def run_conversion():
-            self.ffmpeg_process = None
-            try:
-                self.ffmpeg_process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    creationflags=subprocess.CREATE_NO_WINDOW,
-                    cwd=self.output_path,
-                    text=True,
-                    encoding='utf-8',
-                    errors='ignore'
-                )
-                
-                while True:
-                    line = self.ffmpeg_process.stdout.readline()
-                    if not line:
-                        break
-                    if "out_time_ms=" in line:
-                        try:
-                            time_ms = int(line.split("=")[1])
-                            current_time_seconds = time_ms / 1000000
-                            if self.file_duration_seconds > 0:
-                                progress = int((current_time_seconds / self.file_duration_seconds) * 100)
-                                if progress >= 0 and progress <= 100:
-                                    wx.CallAfter(self.update_progress, progress)
-                        except (ValueError, IndexError):
-                            continue
-                
-                self.ffmpeg_process.wait()
-                
-                if self.ffmpeg_process.returncode == 0:
-                    wx.CallAfter(self.on_success)
-                else:
-                    stderr_output = self.ffmpeg_process.stderr.read()
-                    wx.CallAfter(self.on_failure, stderr_output)
-                    
-            except Exception as e:
-                wx.CallAfter(self.on_failure, str(e))
-            finally:
-                if self.ffmpeg_process:
-                    self.ffmpeg_process.stdout.close()
-                    self.ffmpeg_process.stderr.close()
-                self.ffmpeg_process = None
-                # Process next file
-                if self.currently_processing:
-                    self.process_next_file()
-        
-        threading.Thread(target=run_conversion, daemon=True).start()
-
-    def update_progress(self, progress):
-        self.progress_bar.SetValue(progress)
-        self.status_label.SetLabel(_("Converting: {}%").format(progress))
-
-    def on_success(self):
-        self.progress_bar.SetValue(100)
-        self.status_label.SetLabel(_("Conversion complete!"))
-        try:
-            tones.beep(1000, 300)  # High tone for success
-        except Exception:
-            pass
-        ui.message(_("Conversion complete for {}").format(os.path.basename(self.selected_files[self.current_file_index])))
-
-    def on_all_conversions_complete(self):
-        self.convert_btn.SetLabel(_("Convert"))
-        self.cancel_btn.Enable(True)
-        self.status_label.SetLabel(_("All conversions complete!"))
-        ui.message(_("All conversions complete!"))
-        self.EndModal(wx.ID_OK)
-
-    def on_failure(self, error_message):
-        self.status_label.SetLabel(_("Conversion failed."))
-        ui.message(_("Conversion failed: {}").format(error_message))
+        self.start_batch()
+
+    def prepare_batch(self, settings, files):
+        self.is_paused = False
+        # Workers left over when there are fewer files than workers go to chunks of long files
+        self.chunk_workers = max(1, get_scheduler().max_workers // len(files))
+        self.total_outputs = len(files) * len(settings.profiles())
+        self.convert_btn.SetLabel(_("Pause"))
+
+    def reset_convert_button(self):
         self.convert_btn.SetLabel(_("Convert"))
-        self.cancel_btn.Enable(True)
-        # Stop processing further files
-        self.currently_processing = False
-
-    def on_cancel(self, event):
-        if self.ffmpeg_process and self.ffmpeg_process.poll() is None:
-            try:
-                self.ffmpeg_process.terminate()
-            except Exception:
-                pass
-        # Clear queue
-        while not self.conversion_queue.empty():
-            try:
-                self.conversion_queue.get_nowait()
-            except queue.Empty:
-                break
-        self.currently_processing = False
-        self.EndModal(wx.ID_CANCEL)
-
-    def on_close(self, event):
-        if self.ffmpeg_process and self.ffmpeg_process.poll() is None:
-            try:
-                self.ffmpeg_process.terminate()
-            except Exception:
-                pass
-        # Clear queue
-        while not self.conversion_queue.empty():
-            try:
-                self.conversion_queue.get_nowait()
-            except queue.Empty:
-                break
-        self.currently_processing = False
-        self.EndModal(wx.ID_CANCEL)
+
+    @profiled("convert_audio.job")
+    def run_conversion(self, job, file_path, ffmpeg_path, settings):
+        """Convert one file to every selected output profile with a single ffmpeg run.
+        Runs on a scheduler worker thread. Returns the number of outputs whose audio already
+        matched the settings and was copied without re-encoding."""
+        wx.CallAfter(self.update_current_file_info, self.selected_files.index(file_path))
+        # Usually answered from the probe cache filled when the dialog opened
+        media = probe_media(self.tools_path, file_path)
+        duration_seconds = media.duration if media else 0
+        # Loudness analysis pass, skipped when this file was measured before; files are
+        # analyzed in parallel as the scheduler runs several conversions at once
+        loudness = None
+        progress_start, progress_share = 0, 100
+        if settings.loudness_target is not None and settings.transcodes():
+            loudness = get_cached_loudness(file_path)
+            if loudness is None:
+                reader = ProgressReader(duration_seconds, lambda snapshot: self.on_job_snapshot(job, snapshot, 0, 50))
+                loudness = measure_loudness(ffmpeg_path, file_path, on_stdout_line=reader.feed, job=job)
+                if job.cancelled:
+                    return 0
+                progress_start, progress_share = 50, 50
+        cmd, outputs, copied = convert_audio_command(ffmpeg_path, settings, file_path, media, loudness)
+        
+        on_snapshot = lambda snapshot: self.on_job_snapshot(job, snapshot, progress_start, progress_share)
+        chunks = chunk_count(settings, duration_seconds, self.chunk_workers, copied, loudness)
+        if chunks:
+            # Long file: time ranges are encoded in parallel and joined afterwards
+            result = convert_chunked(ffmpeg_path, settings, file_path, outputs[0], duration_seconds, chunks,
+                on_snapshot, loudness=loudness, job=job, paused=self.is_paused)
+        else:
+            reader = ProgressReader(duration_seconds, on_snapshot)
+            process = run_process(cmd, on_stdout_line=reader.feed, cwd=self.output_path, operation="convert_audio")
+            job.process = process
+            if self.is_paused:
+                process.send_signal(subprocess.signal.SIGSTOP)
+            result = process.wait()
+        if result.returncode != 0 and not job.cancelled:
+            raise RuntimeError(result.stderr)
+        if self.manifests and result.returncode == 0:
+            self.manifests.record(file_path, outputs)
+        return copied
+
+    def completion_message(self):
+        message = super().completion_message()
+        # Outputs whose audio already matched the settings and was copied, not re-encoded
+        copied = sum(job.result or 0 for job in self.jobs if job.state == job.DONE)
+        if copied:
+            message += " " + _("{copied} of {total} outputs already matched and were copied without re-encoding.").format(
+                copied=copied, total=self.total_outputs)
+        return message
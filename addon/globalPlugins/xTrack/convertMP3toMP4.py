@@ -7,15 +7,19 @@ import threading
 import ui
 import tones
 import tempfile
-import queue
 from gui import guiHelper
-from .xTrackCore import get_file_duration
+from .xTrackCore import get_file_duration, ProgressReader, format_eta, run_process
+from .profiling import profiled
+from .engine import Mp3ToMp4Spec
+from .engine.commands import write_photo_list, build_mp3_to_mp4_command
+from .dialogMixins import EstimateMixin, load_file_info
 import addonHandler
 
 addonHandler.initTranslation()
 
-class ConvertMP3toMP4Dialog(wx.Dialog):
+class ConvertMP3toMP4Dialog(EstimateMixin, wx.Dialog):
     """Dialog for converting an MP3 file and a photo to an MP4 video."""
+    @profiled("mp3_to_mp4.open")
     def __init__(self, parent, selected_file, tools_path):
         super().__init__(parent, title=_("Convert MP3 to MP4"))
         self.selected_mp3 = selected_file
@@ -26,10 +30,9 @@ class ConvertMP3toMP4Dialog(wx.Dialog):
         self.ffmpeg_process = None
         self.is_paused = False
         self.loop_duration = 5  # Default loop duration in seconds
-        self.stderr_queue = queue.Queue()
         self.init_ui()
         self.SetTitle(_("Convert MP3 to MP4: {}").format(os.path.basename(self.selected_mp3)))
-        threading.Thread(target=self.get_mp3_duration, daemon=True).start()
+        load_file_info(self.selected_mp3, self.get_mp3_duration)
         self.Bind(wx.EVT_CLOSE, self.on_close)
 
     def init_ui(self):
@@ -95,6 +98,8 @@ class ConvertMP3toMP4Dialog(wx.Dialog):
         self.status_label = wx.StaticText(self, label="")
         main_sizer.Add(self.status_label, 0, wx.EXPAND | wx.ALL, 5)
         
+        self.add_estimate_button(main_sizer)
+        
         # Buttons
         btn_sizer = wx.StdDialogButtonSizer()
         self.convert_btn = wx.Button(self, wx.ID_OK, label=_("Convert"))
@@ -180,178 +185,95 @@ class ConvertMP3toMP4Dialog(wx.Dialog):
         
         ui.message(self.status_label.GetLabel())
 
-    def on_convert(self, event):
+    def get_conversion_spec(self):
+        """Build the Mp3ToMp4Spec from the controls, or announce what is missing and return None."""
         self.loop_duration = self.loop_duration_ctrl.GetValue()
         selected_color = self.color_ctrl.GetStringSelection()
         
         # If no photos selected but a background color is chosen, use color background
         if not self.selected_photos and selected_color == _("None"):
             ui.message(_("Please select at least one photo or choose a background color."))
-            return
+            return None
         
         base_name = os.path.splitext(os.path.basename(self.selected_mp3))[0]
         output_file = f"{base_name}.mp4"
         output_path = os.path.join(self.output_path, output_file)
         
+        color_map = {
+            _("Black"): "000000",
+            _("White"): "FFFFFF",
+            _("Red"): "FF0000",
+            _("Green"): "00FF00",
+            _("Blue"): "0000FF",
+            _("Yellow"): "FFFF00",
+            _("Magenta"): "FF00FF",
+            _("Cyan"): "00FFFF",
+            _("Gray"): "808080",
+            _("Orange"): "FFA500",
+            _("Purple"): "800080"
+        }
+        return Mp3ToMp4Spec(
+            input=self.selected_mp3,
+            output_path=output_path,
+            photos=list(self.selected_photos),
+            photo_duration=self.loop_duration,
+            color=color_map.get(selected_color, "000000"),
+            fit_1080p=self.crop_checkbox.GetValue(),
+            audio_duration=self.mp3_duration_seconds,
+        )
+
+    @property
+    def currently_processing(self):
+        return self.ffmpeg_process is not None and self.ffmpeg_process.poll() is None
+
+    def get_estimate_spec(self):
+        return self.get_conversion_spec()
+
+    @profiled("mp3_to_mp4.on_convert")
+    def on_convert(self, event):
+        spec = self.get_conversion_spec()
+        if spec is None:
+            return
+        
         ffmpeg_path = os.path.join(self.tools_path, "ffmpeg.exe")
         if not os.path.exists(ffmpeg_path):
             ui.message(_("ffmpeg.exe not found"))
             return
         
-        # Build FFmpeg command based on whether we have photos or just a background color
-        if self.selected_photos:
-            # For single photo, use it for the entire duration with proper video encoding
-            if len(self.selected_photos) == 1:
-                photo = self.selected_photos[0]
-                cmd = [
-                    ffmpeg_path,
-                    "-loop", "1",
-                    "-i", photo,
-                    "-i", self.selected_mp3,
-                    "-c:v", "libx264",
-                    "-preset", "medium",
-                    "-tune", "stillimage",
-                    "-c:a", "aac",
-                    "-b:a", "192k",
-                    "-pix_fmt", "yuv420p",
-                    "-shortest",
-                    "-movflags", "+faststart"
-                ]
-                
-                # Add crop filter if enabled
-                if self.crop_checkbox.GetValue():
-                    cmd.extend(["-vf", "scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2"])
-            else:
-                # For multiple photos, use proper concat with image2 demuxer
-                temp_dir = tempfile.gettempdir()
-                concat_file = os.path.join(temp_dir, f"xtrack_concat_{id(self)}.txt")
-                try:
-                    with open(concat_file, 'w', encoding='utf-8') as f:
-                        for photo in self.selected_photos:
-                            escaped_photo = photo.replace("'", "'\\''")
-                            f.write(f"file '{escaped_photo}'\n")
-                            f.write(f"duration {self.loop_duration}\n")
-                except Exception as e:
-                    ui.message(_("Failed to create file list: {}").format(str(e)))
-                    return
-                
-                cmd = [
-                    ffmpeg_path,
-                    "-f", "concat",
-                    "-safe", "0",
-                    "-protocol_whitelist", "file,pipe,crypto,data",
-                    "-i", concat_file,
-                    "-i", self.selected_mp3,
-                    "-c:v", "libx264",
-                    "-preset", "medium",
-                    "-c:a", "aac",
-                    "-b:a", "192k",
-                    "-pix_fmt", "yuv420p",
-                    "-shortest",
-                    "-movflags", "+faststart"
-                ]
-                
-                # Add crop filter if enabled
-                if self.crop_checkbox.GetValue():
-                    cmd.extend(["-vf", "scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2"])
-        else:
-            # Use color background
-            color_map = {
-                _("Black"): "000000",
-                _("White"): "FFFFFF",
-                _("Red"): "FF0000",
-                _("Green"): "00FF00",
-                _("Blue"): "0000FF",
-                _("Yellow"): "FFFF00",
-                _("Magenta"): "FF00FF",
-                _("Cyan"): "00FFFF",
-                _("Gray"): "808080",
-                _("Orange"): "FFA500",
-                _("Purple"): "800080"
-            }
-            
-            color_hex = color_map.get(selected_color, "000000")
-            duration = self.mp3_duration_seconds
-            
-            cmd = [
-                ffmpeg_path,
-                "-f", "lavfi",
-                "-i", f"color=c={color_hex}:s=1920x1080:d={duration}",
-                "-i", self.selected_mp3,
-                "-c:v", "libx264",
-                "-preset", "medium",
-                "-c:a", "aac",
-                "-b:a", "192k",
-                "-shortest",
-                "-movflags", "+faststart"
-            ]
-        
-        # Add common parameters
-        cmd.extend([
-            "-progress", "pipe:1",
-            "-nostats",
-            "-y",
-            output_path
-        ])
+        concat_file = None
+        if len(spec.photos) > 1:
+            # For multiple photos, use the concat demuxer with a duration per photo
+            concat_file = os.path.join(tempfile.gettempdir(), f"xtrack_concat_{id(self)}.txt")
+            try:
+                write_photo_list(spec.photos, spec.photo_duration, concat_file)
+            except Exception as e:
+                ui.message(_("Failed to create file list: {}").format(str(e)))
+                return
+        cmd = build_mp3_to_mp4_command(ffmpeg_path, spec, concat_file)
         
         wx.CallAfter(self.convert_btn.SetLabel, _("Pause"))
         wx.CallAfter(self.cancel_btn.Enable, False)
         wx.CallAfter(self.status_label.SetLabel, _("Starting conversion..."))
         wx.CallAfter(self.progress_bar.SetValue, 0)
         
+        @profiled("mp3_to_mp4.run")
         def run_conversion():
             self.ffmpeg_process = None
             try:
-                self.ffmpeg_process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    creationflags=subprocess.CREATE_NO_WINDOW,
-                    cwd=self.output_path,
-                    text=True,
-                    encoding='utf-8',
-                    errors='ignore'
-                )
-                
-                # Start thread to read stderr to prevent buffer overflow
-                def read_stderr():
-                    for line in iter(self.ffmpeg_process.stderr.readline, ''):
-                        self.stderr_queue.put(line)
-                
-                stderr_thread = threading.Thread(target=read_stderr, daemon=True)
-                stderr_thread.start()
-                
-                while True:
-                    line = self.ffmpeg_process.stdout.readline()
-                    if not line:
-                        break
-                    if "out_time_ms=" in line:
-                        try:
-                            time_ms = int(line.split("=")[1])
-                            current_time_seconds = time_ms / 1000000
-                            if self.mp3_duration_seconds > 0:
-                                progress = int((current_time_seconds / self.mp3_duration_seconds) * 100)
-                                if progress >= 0 and progress <= 100:
-                                    wx.CallAfter(self.update_progress, progress)
-                        except (ValueError, IndexError):
-                            continue
-                
-                self.ffmpeg_process.wait()
-                
-                # Join stderr thread
-                stderr_thread.join(timeout=5)
-                stderr_output = ''.join(list(self.stderr_queue.queue))
+                reader = ProgressReader(self.mp3_duration_seconds, lambda snapshot: wx.CallAfter(self.update_progress, snapshot))
+                self.ffmpeg_process = run_process(cmd, on_stdout_line=reader.feed, cwd=self.output_path, operation="mp3_to_mp4")
+                result = self.ffmpeg_process.wait()
+                stderr_output = result.stderr
                 
                 # Clean up temporary file if it exists
-                if self.selected_photos and len(self.selected_photos) > 1:
+                if concat_file:
                     try:
-                        concat_file = os.path.join(tempfile.gettempdir(), f"xtrack_concat_{id(self)}.txt")
                         if os.path.exists(concat_file):
                             os.remove(concat_file)
                     except Exception:
                         pass
                 
-                if self.ffmpeg_process.returncode == 0:
+                if result.returncode == 0:
                     wx.CallAfter(self.on_success)
                 else:
                     wx.CallAfter(self.on_failure, stderr_output)
@@ -359,16 +281,20 @@ class ConvertMP3toMP4Dialog(wx.Dialog):
             except Exception as e:
                 wx.CallAfter(self.on_failure, str(e))
             finally:
-                if self.ffmpeg_process:
-                    self.ffmpeg_process.stdout.close()
-                    self.ffmpeg_process.stderr.close()
                 self.ffmpeg_process = None
         
         threading.Thread(target=run_conversion, daemon=True).start()
 
-    def update_progress(self, progress):
+    def update_progress(self, snapshot):
+        if not self:
+            return
+        progress = snapshot.percent
         self.progress_bar.SetValue(progress)
-        self.status_label.SetLabel(_("Converting: {}%").format(progress))
+        if snapshot.speed > 0 and snapshot.eta is not None:
+            self.status_label.SetLabel(_("Converting: {progress}% at {speed:.1f}x, {eta} remaining").format(
+                progress=progress, speed=snapshot.speed, eta=format_eta(snapshot.eta)))
+        else:
+            self.status_label.SetLabel(_("Converting: {}%").format(progress))
 
     def on_success(self):
         self.progress_bar.SetValue(100)
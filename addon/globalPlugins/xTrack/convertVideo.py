@@ -4,19 +4,24 @@ import wx
 import os
 import subprocess
 import threading
-import ui
 import tones
 import json
-import queue
 import time
 from gui import guiHelper
-from .xTrackCore import load_config, save_config, get_file_duration, get_file_size
+from .xTrackCore import get_file_duration, get_file_size, ProgressReader, run_process
+from .profiling import profiled
+from .configStore import get_config_store
+from .engine import ConvertVideoSpec
+from .dialogMixins import MediaListMixin, EstimateMixin, ConversionBatchMixin
+from .engine.commands import convert_video_output_path, build_convert_video_command
 import addonHandler
 
 addonHandler.initTranslation()
 
-class ConvertVideoDialog(wx.Dialog):
+class ConvertVideoDialog(MediaListMixin, EstimateMixin, ConversionBatchMixin, wx.Dialog):
     """Dialog for converting various video formats to different output formats with quality preservation."""
+    announce_progress = True
+    @profiled("convert_video.open")
     def __init__(self, parent, selected_files, tools_path):
         super().__init__(parent, title=_("Convert Video"))
         self.selected_files = selected_files
@@ -25,27 +30,31 @@ class ConvertVideoDialog(wx.Dialog):
         self.file_duration_seconds = 0
         self.file_size_bytes = 0
         self.output_path = os.path.dirname(self.selected_files[0]) if self.selected_files else os.getcwd()
-        self.config_path = os.path.join(os.path.expanduser("~"), "AppData", "Roaming", "nvda", "config", "xTrack.json")
-        self.ffmpeg_process = None
-        self.is_paused = False
-        self.conversion_queue = queue.Queue()
-        self.currently_processing = False
+        self.job_group = f"convertVideo-{id(self)}"
+        self.init_batch()
         self.file_durations = {}
         self.file_sizes = {}
+        self.show_cached_media()
         self.init_ui()
         self.SetTitle(_("Convert Video: {} files").format(len(self.selected_files)))
         self.load_settings()
         self.Bind(wx.EVT_CLOSE, self.on_close)
-        threading.Thread(target=self.load_file_info, daemon=True).start()
+        threading.Thread(target=self.probe_remaining_files, daemon=True).start()
 
-    def load_file_info(self):
-        """Load durations and sizes for all selected files."""
-        for file_path in self.selected_files:
-            duration_sec, duration_str = get_file_duration(self.tools_path, file_path)
-            size_bytes, size_str = get_file_size(file_path)
-            self.file_durations[file_path] = self.format_duration(duration_sec)
-            self.file_sizes[file_path] = size_str
-        wx.CallAfter(self.update_file_listbox)
+    def store_file_info(self, file_path, media):
+        size_bytes, size_str = get_file_size(file_path)
+        self.file_durations[file_path] = self.format_duration(media.duration if media else 0)
+        self.file_sizes[file_path] = size_str
+
+    def update_file_entry(self, file_path):
+        """Refresh one listbox entry and the current file info if it is affected."""
+        if not self or file_path not in self.selected_files:
+            return
+        index = self.selected_files.index(file_path)
+        self.file_listbox.SetString(index, self.get_file_display_name(file_path))
+        if index == self.current_file_index:
+            self.duration_label.SetLabel(_("Duration: {}").format(self.file_durations[file_path]))
+            self.size_label.SetLabel(_("Size: {}").format(self.file_sizes[file_path]))
 
     def format_duration(self, seconds):
         """Format duration in seconds to HhMMminSSsec format."""
@@ -133,6 +142,8 @@ class ConvertVideoDialog(wx.Dialog):
         
         settings_sizer.Add(video_audio_sizer, 0, wx.EXPAND | wx.ALL, 5)
         
+        self.add_incremental_checkbox(settings_sizer)
+        
         # Quality preservation note
         quality_note = wx.StaticText(self, label=_("Note: Video conversion preserves original quality by default. No re-encoding is performed."))
         quality_note.Wrap(400)
@@ -148,6 +159,8 @@ class ConvertVideoDialog(wx.Dialog):
         self.status_label = wx.StaticText(self, label="")
         main_sizer.Add(self.status_label, 0, wx.EXPAND | wx.ALL, 5)
         
+        self.add_estimate_button(main_sizer)
+        
         # Buttons
         btn_sizer = wx.StdDialogButtonSizer()
         self.convert_btn = wx.Button(self, wx.ID_OK, label=_("Convert"))
@@ -189,8 +202,6 @@ class ConvertVideoDialog(wx.Dialog):
             size = self.file_sizes.get(current_file, _("Calculating..."))
             self.duration_label.SetLabel(_("Duration: {}").format(duration))
             self.size_label.SetLabel(_("Size: {}").format(size))
-            self.file_duration_seconds = self.get_duration_seconds(current_file)
-            self.file_size_bytes = self.get_size_bytes(current_file)
 
     def get_duration_seconds(self, file_path):
         """Get duration in seconds for a file."""
@@ -203,52 +214,25 @@ class ConvertVideoDialog(wx.Dialog):
         return size_bytes
 
     def load_settings(self):
-        config_data = load_config(self.config_path)
-        self.format_ctrl.SetStringSelection(config_data.get("ConvertVideoFormat", "MP4 (Copy Original Quality)"))
-        self.sample_rate_ctrl.SetStringSelection(config_data.get("ConvertVideoSampleRate", "Keep Original"))
-        self.channels_ctrl.SetStringSelection(config_data.get("ConvertVideoChannels", "Keep Original"))
-        self.audio_codec_ctrl.SetStringSelection(config_data.get("ConvertVideoAudioCodec", "AAC (Recommended)"))
+        config_store = get_config_store()
+        self.format_ctrl.SetStringSelection(config_store.get("ConvertVideoFormat", "MP4 (Copy Original Quality)"))
+        self.sample_rate_ctrl.SetStringSelection(config_store.get("ConvertVideoSampleRate", "Keep Original"))
+        self.channels_ctrl.SetStringSelection(config_store.get("ConvertVideoChannels", "Keep Original"))
+        self.audio_codec_ctrl.SetStringSelection(config_store.get("ConvertVideoAudioCodec", "AAC (Recommended)"))
+        self.incremental_ctrl.SetValue(config_store.get("ConvertVideoIncremental", False))
 
     def save_settings(self):
-        config_data = load_config(self.config_path)
+        config_data = {}
         config_data["ConvertVideoFormat"] = self.format_ctrl.GetStringSelection()
         config_data["ConvertVideoSampleRate"] = self.sample_rate_ctrl.GetStringSelection()
         config_data["ConvertVideoChannels"] = self.channels_ctrl.GetStringSelection()
         config_data["ConvertVideoAudioCodec"] = self.audio_codec_ctrl.GetStringSelection()
-        save_config(self.config_path, config_data)
+        config_data["ConvertVideoIncremental"] = self.incremental_ctrl.GetValue()
+        get_config_store().update(config_data)
 
-    def on_convert(self, event):
-        self.save_settings()
-        
-        # Play start tone
-        try:
-            tones.beep(800, 200)
-        except Exception:
-            pass
-        
-        # Add all files to queue
-        for file_path in self.selected_files:
-            self.conversion_queue.put(file_path)
-        
-        # Start processing
-        self.currently_processing = True
-        self.process_next_file()
-
-    def process_next_file(self):
-        if self.conversion_queue.empty():
-            self.currently_processing = False
-            wx.CallAfter(self.on_all_conversions_complete)
-            return
-            
-        file_path = self.conversion_queue.get()
-        self.update_current_file_info(self.selected_files.index(file_path))
-        
-        format_selection = self.format_ctrl.GetStringSelection()
-        sample_rate = self.sample_rate_ctrl.GetStringSelection().replace(" Hz", "")
-        channels_selection = self.channels_ctrl.GetStringSelection()
-        audio_codec_selection = self.audio_codec_ctrl.GetStringSelection()
-        
-        # Map format selection to file extension
+    def get_conversion_settings(self):
+        """Read the conversion settings from the controls (UI thread only)."""
+        # Map format selection to container
         format_map = {
             "MP4 (Copy Original Quality)": "mp4",
             "MKV (Copy Original Quality)": "mkv",
@@ -256,181 +240,54 @@ class ConvertVideoDialog(wx.Dialog):
             "AVI (Copy Original Quality)": "avi",
             "WebM (Copy Original Quality)": "webm"
         }
-        output_format = format_map.get(format_selection, "mp4")
-        
-        # Map channels selection to ffmpeg parameter
-        if channels_selection == "Stereo (2 channels)":
-            audio_channels = "2"
-        elif channels_selection == "Mono (1 channel)":
-            audio_channels = "1"
-        else:  # "Keep Original"
-            audio_channels = None
-            
-        # Map audio codec selection
-        if audio_codec_selection == "AAC (Recommended)":
-            audio_codec = "aac"
-        elif audio_codec_selection == "MP3":
-            audio_codec = "libmp3lame"
-        elif audio_codec_selection == "Vorbis":
-            audio_codec = "libvorbis"
-        else:  # "Keep Original"
-            audio_codec = None
-        
-        base_name = os.path.splitext(os.path.basename(file_path))[0]
-        output_file = f"{base_name}.{output_format}"
-        output_path = os.path.join(self.output_path, output_file)
-        
-        ffmpeg_path = os.path.join(self.tools_path, "ffmpeg.exe")
-        if not os.path.exists(ffmpeg_path):
-            ui.message(_("ffmpeg.exe not found"))
-            return
-        
-        # Build ffmpeg command - use copy for video and handle audio based on settings
-        cmd = [
-            ffmpeg_path,
-            "-i", file_path,
-            "-c:v", "copy",  # Copy video stream without re-encoding
-            "-progress", "pipe:1",
-            "-nostats",
-            "-y",
-        ]
-        
-        # Handle audio settings
-        if audio_codec is not None:
-            cmd.extend(["-c:a", audio_codec])
-            # Set audio bitrate for certain codecs
-            if audio_codec == "aac":
-                cmd.extend(["-b:a", "192k"])
-            elif audio_codec == "libmp3lame":
-                cmd.extend(["-b:a", "192k"])
-        else:
-            cmd.extend(["-c:a", "copy"])  # Copy original audio
-        
-        # Set sample rate if specified and not keeping original
-        if sample_rate != "Keep Original" and audio_codec is not None:
-            cmd.extend(["-ar", sample_rate])
-        
-        # Set audio channels if specified and not keeping original
-        if audio_channels is not None and audio_codec is not None:
-            cmd.extend(["-ac", audio_channels])
-        
-        cmd.append(output_path)
-        
-        wx.CallAfter(self.convert_btn.Enable, False)
-        wx.CallAfter(self.cancel_btn.Enable, False)
-        wx.CallAfter(self.status_label.SetLabel, _("Starting conversion..."))
-        wx.CallAfter(self.progress_bar.SetValue, 0)
-        
-        def run_conversion():
-            self.ffmpeg_process = None
-            try:
-                self.ffmpeg_process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    creationflags=subprocess.CREATE_NO_WINDOW,
-                    cwd=self.output_path,
-                    text=True,
-                    encoding='utf-8',
-                    errors='ignore'
-                )
-                
-                # Read progress from ffmpeg
-                while True:
-                    line = self.ffmpeg_process.stdout.readline()
-                    if not line:
-                        break
-                    if "out_time_ms=" in line:
-                        try:
-                            time_ms = int(line.split("=")[1])
-                            current_time_seconds = time_ms / 1000000
-                            if self.file_duration_seconds > 0:
-                                progress = int((current_time_seconds / self.file_duration_seconds) * 100)
-                                progress = min(100, max(0, progress))  # Clamp between 0-100
-                                wx.CallAfter(self.update_progress, progress)
-                        except (ValueError, IndexError):
-                            continue
-                
-                self.ffmpeg_process.wait()
-                
-                if self.ffmpeg_process.returncode == 0:
-                    wx.CallAfter(self.on_success)
-                else:
-                    stderr_output = self.ffmpeg_process.stderr.read()
-                    wx.CallAfter(self.on_failure, stderr_output)
-                    
-            except Exception as e:
-                wx.CallAfter(self.on_failure, str(e))
-            finally:
-                if self.ffmpeg_process:
-                    self.ffmpeg_process.stdout.close()
-                    self.ffmpeg_process.stderr.close()
-                self.ffmpeg_process = None
-                # Process next file
-                if self.currently_processing:
-                    self.process_next_file()
-        
-        threading.Thread(target=run_conversion, daemon=True).start()
+        # Map channels selection to ffmpeg parameter; None keeps the original
+        channels_map = {
+            "Stereo (2 channels)": 2,
+            "Mono (1 channel)": 1,
+        }
+        # Map audio codec selection; None copies the original audio
+        codec_map = {
+            "AAC (Recommended)": "aac",
+            "MP3": "libmp3lame",
+            "Vorbis": "libvorbis",
+        }
+        sample_rate = self.sample_rate_ctrl.GetStringSelection().replace(" Hz", "")
+        return ConvertVideoSpec(
+            inputs=list(self.selected_files),
+            output_dir=self.output_path,
+            container=format_map.get(self.format_ctrl.GetStringSelection(), "mp4"),
+            audio_codec=codec_map.get(self.audio_codec_ctrl.GetStringSelection()),
+            sample_rate=int(sample_rate) if sample_rate.isdigit() else None,
+            channels=channels_map.get(self.channels_ctrl.GetStringSelection()),
+            incremental=self.incremental_ctrl.GetValue(),
+        )
 
-    def update_progress(self, progress):
-        self.progress_bar.SetValue(progress)
-        self.status_label.SetLabel(_("Converting: {}%").format(progress))
-        # Announce progress for screen readers every 10%
-        if progress % 10 == 0:
-            ui.message(_("{}%").format(progress))
+    @profiled("convert_video.on_convert")
+    def on_convert(self, event):
+        self.save_settings()
+        self.start_batch()
 
-    def on_success(self):
-        self.progress_bar.SetValue(100)
-        self.status_label.SetLabel(_("Conversion complete!"))
+    def prepare_batch(self, settings, files):
+        # Play start tone
         try:
-            tones.beep(1000, 300)  # Success tone
+            tones.beep(800, 200)
         except Exception:
             pass
-        ui.message(_("Conversion complete for {}").format(os.path.basename(self.selected_files[self.current_file_index])))
-        wx.CallAfter(self.convert_btn.Enable, True)
-        wx.CallAfter(self.cancel_btn.Enable, True)
-
-    def on_all_conversions_complete(self):
-        self.convert_btn.Enable(True)
-        self.cancel_btn.Enable(True)
-        self.status_label.SetLabel(_("All conversions complete!"))
-        ui.message(_("All conversions complete!"))
-        self.EndModal(wx.ID_OK)
-
-    def on_failure(self, error_message):
-        self.status_label.SetLabel(_("Conversion failed."))
-        ui.message(_("Conversion failed: {}").format(error_message))
-        self.convert_btn.Enable(True)
-        self.cancel_btn.Enable(True)
-        # Stop processing further files
-        self.currently_processing = False
-
-    def on_cancel(self, event):
-        if self.ffmpeg_process and self.ffmpeg_process.poll() is None:
-            try:
-                self.ffmpeg_process.terminate()
-            except Exception:
-                pass
-        # Clear queue
-        while not self.conversion_queue.empty():
-            try:
-                self.conversion_queue.get_nowait()
-            except queue.Empty:
-                break
-        self.currently_processing = False
-        self.EndModal(wx.ID_CANCEL)
+        super().prepare_batch(settings, files)
 
-    def on_close(self, event):
-        if self.ffmpeg_process and self.ffmpeg_process.poll() is None:
-            try:
-                self.ffmpeg_process.terminate()
-            except Exception:
-                pass
-        # Clear queue
-        while not self.conversion_queue.empty():
-            try:
-                self.conversion_queue.get_nowait()
-            except queue.Empty:
-                break
-        self.currently_processing = False
-        self.EndModal(wx.ID_CANCEL)
+    @profiled("convert_video.job")
+    def run_conversion(self, job, file_path, ffmpeg_path, settings):
+        """Convert one file. Runs on a scheduler worker thread."""
+        wx.CallAfter(self.update_current_file_info, self.selected_files.index(file_path))
+        duration_seconds = self.get_duration_seconds(file_path)
+        output_path = convert_video_output_path(settings, file_path)
+        cmd = build_convert_video_command(ffmpeg_path, settings, file_path, output_path)
+        
+        reader = ProgressReader(duration_seconds, lambda snapshot: self.on_job_snapshot(job, snapshot))
+        process = run_process(cmd, on_stdout_line=reader.feed, cwd=self.output_path, operation="convert_video")
+        job.process = process
+        result = process.wait()
+        if result.returncode != 0 and not job.cancelled:
+            raise RuntimeError(result.stderr)
+        if self.manifests and result.returncode == 0:
+            self.manifests.record(file_path, [output_path])
@@ -0,0 +1,257 @@
+# dialogMixins.py
+# Behaviour shared by the xTrack dialogs: file lists filled as probes finish, time and size
+# estimates, and conversion batches run on the shared scheduler with progress, cancel and the
+# incremental manifests.
+
+import os
+import threading
+import wx
+import ui
+import tones
+import addonHandler
+from .xTrackCore import get_cached_media, prefetch_media, split_cached_media
+from .scheduler import get_scheduler
+from .performance import start_estimate
+from .engine import open_manifests, pending_inputs
+
+addonHandler.initTranslation()
+
+
+def load_file_info(file_path, load):
+    """Call load() for a single-file dialog: at once if file_path is cached, else on a thread."""
+    if get_cached_media(file_path) is not None:
+        # Probed while the xTrack menu was open: fill the dialog before it is shown
+        load()
+    else:
+        threading.Thread(target=load, daemon=True).start()
+
+
+class MediaListMixin:
+    """
+    Shows the selected files' information as it becomes available. The dialog provides
+    selected_files, tools_path, store_file_info(file_path, media) and
+    update_file_entry(file_path), which refreshes one entry on the UI thread.
+    """
+    def show_cached_media(self):
+        """Store what is already known about the files; call before the list is built."""
+        # Files probed while the xTrack menu was open are shown straight away
+        cached, self.files_to_probe = split_cached_media(self.selected_files)
+        for file_path, media in cached.items():
+            self.store_file_info(file_path, media)
+
+    def probe_remaining_files(self):
+        """Probe the other files in parallel, updating the list as each probe finishes."""
+        prefetch_media(self.tools_path, self.files_to_probe, self.on_file_probed)
+
+    def on_file_probed(self, file_path, media):
+        """Store the information of one probed file. Called from a prefetch thread."""
+        self.store_file_info(file_path, media)
+        wx.CallAfter(self.update_file_entry, file_path)
+
+
+class EstimateMixin:
+    """
+    An "Estimate Time and Size" button. The dialog provides tools_path, status_label,
+    currently_processing and get_estimate_spec(), the spec of the batch it would run (None
+    if the settings are incomplete).
+    """
+    def add_estimate_button(self, sizer):
+        # Predict the batch's time and size from short sample encodes
+        self.estimate_btn = wx.Button(self, label=_("Estimate Time and Size"))
+        self.estimate_btn.Bind(wx.EVT_BUTTON, self.on_estimate)
+        sizer.Add(self.estimate_btn, 0, wx.ALIGN_CENTER | wx.ALL, 5)
+
+    def on_estimate(self, event):
+        if self.currently_processing:
+            return
+        spec = self.get_estimate_spec()
+        if spec is not None:
+            start_estimate(spec, self.tools_path, self.estimate_btn, self.status_label)
+
+
+class ConversionBatchMixin:
+    """
+    Converts the selected files as jobs of the shared scheduler, several in parallel.
+
+    The dialog provides selected_files, tools_path, job_group, convert_btn, cancel_btn,
+    status_label, progress_bar, get_conversion_settings() and
+    run_conversion(job, file_path, ffmpeg_path, settings), which runs on a worker thread and
+    records each converted file in self.manifests. prepare_batch, reset_convert_button and
+    completion_message can be overridden.
+    """
+    announce_progress = False  # speak the progress every 10%
+
+    def init_batch(self):
+        self.jobs = []
+        self.job_progress = {}
+        self.total_jobs = 0
+        self.finished_jobs = 0
+        self.skipped_jobs = 0  # files already up to date in an incremental run
+        self.manifests = None
+        self.currently_processing = False
+
+    def add_incremental_checkbox(self, sizer):
+        # Incremental mode: a manifest in the output folder records what was converted
+        self.incremental_ctrl = wx.CheckBox(self, label=_("Skip files already converted with these settings"))
+        sizer.Add(self.incremental_ctrl, 0, wx.EXPAND | wx.ALL, 5)
+
+    def get_estimate_spec(self):
+        return self.get_conversion_settings()
+
+    def start_batch(self):
+        """Convert the selected files with the settings of the controls (UI thread only)."""
+        ffmpeg_path = os.path.join(self.tools_path, "ffmpeg.exe")
+        if not os.path.exists(ffmpeg_path):
+            ui.message(_("ffmpeg.exe not found"))
+            return
+
+        settings = self.get_conversion_settings()
+        # Incremental runs only convert files that are new or changed since the last run
+        self.manifests = open_manifests(settings)
+        if self.manifests:
+            # Checking the files against the manifests stats (and may probe) every one of them
+            self.convert_btn.Enable(False)
+            self.status_label.SetLabel(_("Checking for changed files..."))
+            threading.Thread(target=self.find_pending_files, args=(settings, ffmpeg_path), daemon=True).start()
+        else:
+            self.start_conversion(settings, ffmpeg_path, list(self.selected_files))
+
+    def find_pending_files(self, settings, ffmpeg_path):
+        """Leave out the files that are already up to date. Runs on a background thread."""
+        files = pending_inputs(settings, self.manifests, self.tools_path)
+        wx.CallAfter(self.start_conversion, settings, ffmpeg_path, files)
+
+    def start_conversion(self, settings, ffmpeg_path, files):
+        """Submit files to the shared scheduler (UI thread only)."""
+        if not self:
+            return
+        self.convert_btn.Enable(True)
+        if not files:
+            message = _("All files are already up to date.")
+            self.status_label.SetLabel(message)
+            ui.message(message)
+            return
+        self.currently_processing = True
+        self.job_progress = {}
+        self.total_jobs = len(files)
+        self.finished_jobs = 0
+        self.skipped_jobs = len(self.selected_files) - len(files)
+        self.prepare_batch(settings, files)
+
+        self.cancel_btn.Enable(False)
+        self.status_label.SetLabel(_("Starting conversion..."))
+        self.progress_bar.SetValue(0)
+
+        # Submit all files to the shared scheduler, which converts several of them in parallel
+        scheduler = get_scheduler()
+        self.jobs = [
+            scheduler.submit(
+                lambda job, file_path=file_path: self.run_conversion(job, file_path, ffmpeg_path, settings),
+                group=self.job_group,
+                label=os.path.basename(file_path),
+                on_progress=self.on_job_progress,
+                on_done=self.on_job_done,
+            )
+            for file_path in files
+        ]
+
+    def prepare_batch(self, settings, files):
+        """Set up a batch of files about to be submitted; disables the Convert button."""
+        self.convert_btn.Enable(False)
+
+    def reset_convert_button(self):
+        self.convert_btn.Enable(True)
+
+    def on_job_snapshot(self, job, snapshot, start=0, share=100):
+        """Progress of one ffmpeg pass, which covers share percent of the job from start."""
+        job.snapshot = snapshot
+        job.set_progress(start + snapshot.percent * share // 100)
+
+    def on_job_progress(self, job, progress):
+        self.job_progress[job] = progress
+        overall = int(sum(self.job_progress.values()) / max(1, self.total_jobs))
+        # Combined speed of the files being converted right now, as a multiple of realtime
+        speed = sum(j.snapshot.speed for j in get_scheduler().running_jobs(self.job_group) if j.snapshot)
+        wx.CallAfter(self.update_progress, overall, speed)
+
+    def on_job_done(self, job):
+        self.job_progress[job] = 100
+        wx.CallAfter(self.on_file_done, job)
+
+    def on_file_done(self, job):
+        if not self:
+            return
+        self.finished_jobs += 1
+        if not self.currently_processing:
+            return
+        if job.state == job.DONE:
+            self.on_success(job.label)
+        elif job.state == job.FAILED:
+            self.on_failure(str(job.error))
+            return
+        if self.finished_jobs >= self.total_jobs:
+            self.currently_processing = False
+            self.on_all_conversions_complete()
+
+    def update_progress(self, progress, speed=0):
+        if not self or not self.currently_processing:
+            return
+        # Announce progress for screen readers every 10%
+        if self.announce_progress and progress // 10 > self.progress_bar.GetValue() // 10:
+            ui.message(_("{}%").format(progress))
+        self.progress_bar.SetValue(progress)
+        if speed > 0:
+            self.status_label.SetLabel(_("Converting: {progress}% at {speed:.1f}x realtime").format(progress=progress, speed=speed))
+        else:
+            self.status_label.SetLabel(_("Converting: {}%").format(progress))
+
+    def on_success(self, file_name):
+        self.status_label.SetLabel(_("Conversion complete!"))
+        try:
+            tones.beep(1000, 300)  # High tone for success
+        except Exception:
+            pass
+        ui.message(_("Conversion complete for {}").format(file_name))
+
+    def completion_message(self):
+        message = _("All conversions complete!")
+        if self.skipped_jobs:
+            message += " " + _("{skipped} files were already up to date.").format(skipped=self.skipped_jobs)
+        return message
+
+    def on_all_conversions_complete(self):
+        self.progress_bar.SetValue(100)
+        self.reset_convert_button()
+        self.cancel_btn.Enable(True)
+        self.save_manifests()
+        message = self.completion_message()
+        self.status_label.SetLabel(message)
+        ui.message(message)
+        self.EndModal(wx.ID_OK)
+
+    def on_failure(self, error_message):
+        self.status_label.SetLabel(_("Conversion failed."))
+        ui.message(_("Conversion failed: {}").format(error_message))
+        self.reset_convert_button()
+        self.cancel_btn.Enable(True)
+        # Stop processing further files
+        self.stop_processing()
+
+    def stop_processing(self):
+        """Cancel queued conversions and terminate the running ones."""
+        self.currently_processing = False
+        get_scheduler().cancel_group(self.job_group)
+        self.save_manifests()
+
+    def save_manifests(self):
+        """Write the incremental manifests, keeping the files converted so far."""
+        if self.manifests:
+            self.manifests.save()
+
+    def on_cancel(self, event):
+        self.stop_processing()
+        self.EndModal(wx.ID_CANCEL)
+
+    def on_close(self, event):
+        self.stop_processing()
+        self.EndModal(wx.ID_CANCEL)
@@ -0,0 +1,21 @@
+# engine/__init__.py
+# UI-free xTrack engine: job specs, ffmpeg command builders and a runner.
+# Nothing here imports NVDA or wx, so it can be used from scripts and the command line.
+
+from .specs import (
+    ConvertAudioSpec,
+    ConvertVideoSpec,
+    MergeSpec,
+    SplitSpec,
+    TrimSpec,
+    ResizeImageSpec,
+    Mp3ToMp4Spec,
+    SPEC_TYPES,
+    spec_type,
+    spec_to_dict,
+    spec_from_dict,
+)
+from .runner import JobResult, build_tasks, run_task, run_spec, pending_inputs
+from .manifest import ManifestSet, open_manifests
+from .loudness import analyze_loudness, measure_loudness, get_cached_loudness
+from .planner import Estimate, estimate_spec
@@ -0,0 +1,289 @@
+# engine/chunking.py
+# Chunk-parallel conversion of long audio files: the input is cut into time ranges at quiet
+# points, each range is encoded by its own ffmpeg process and the pieces are joined with the
+# concat demuxer without re-encoding.
+#
+# The concat demuxer only cuts between packets, so split points are whole codec frames.
+# Lossy chunks but the first start PREROLL_SECONDS early and all but the last run as long
+# past their end, so the encoder's priming, warm-up and padding fall outside the range; the
+# join keeps the packets from inpoint to outpoint. Lossless chunks have no encoder delay: they
+# are cut decode-side to an exact sample count (whole FLAC blocks) and joined whole.
+
+import os
+import re
+import math
+import shutil
+import signal
+import logging
+import tempfile
+import threading
+
+from ..xTrackCore import run_process, ProgressReader, ProgressSnapshot, ProcessResult
+from ..scheduler import get_scheduler
+from . import commands
+
+CHUNK_MIN_DURATION = 30 * 60  # only inputs at least this long are split
+MIN_CHUNK_SECONDS = 5 * 60
+PREROLL_SECONDS = 1.0
+SILENCE_SEARCH_SECONDS = 15.0  # searched on each side of a nominal split point
+# Samples per packet of each encoder; PCM chunks are cut to the sample and joined whole
+CODEC_FRAME_SAMPLES = {"mp3": 1152, "aac": 1024, "opus": 960, "flac": commands.FLAC_CHUNK_FRAME_SIZE}
+LOSSLESS_FORMATS = ("wav", "flac")
+
+_SILENCE_START = re.compile(r"silence_start:\s*(-?[0-9.]+)")
+_SILENCE_END = re.compile(r"silence_end:\s*(-?[0-9.]+)")
+
+
+def chunk_count(spec, duration, workers, copied=0, loudness=None, min_duration=CHUNK_MIN_DURATION):
+    """
+    Number of chunks to encode one input of a ConvertAudioSpec in, or 0 to convert it in one
+    process: short inputs, stream copies, several output profiles and one-pass (dynamic)
+    loudness normalization, whose gain would differ between chunks, are not split.
+    """
+    if workers < 2 or duration < min_duration or copied or len(spec.profiles()) > 1:
+        return 0
+    if spec.loudness_target is not None and not loudness:
+        return 0
+    count = min(workers, int(duration // MIN_CHUNK_SECONDS))
+    return count if count >= 2 else 0
+
+
+def parse_silences(stderr, length):
+    """[(start, end)] silences reported by silencedetect; one still running at the end lasts until length."""
+    silences = []
+    start = None
+    for line in stderr.splitlines():
+        match = _SILENCE_START.search(line)
+        if match:
+            start = max(0.0, float(match.group(1)))
+            continue
+        match = _SILENCE_END.search(line)
+        if match and start is not None:
+            silences.append((start, float(match.group(1))))
+            start = None
+    if start is not None:
+        silences.append((start, length))
+    return silences
+
+
+def find_split_point(ffmpeg_path, input_path, nominal, policy=None, group=None):
+    """
+    The middle of the silence nearest to nominal within SILENCE_SEARCH_SECONDS, else nominal.
+    The silencedetect process joins group (a ProcessGroup), if given.
+    """
+    start = max(0.0, nominal - SILENCE_SEARCH_SECONDS)
+    length = SILENCE_SEARCH_SECONDS * 2
+    cmd = commands.build_silence_probe_command(ffmpeg_path, input_path, start, length)
+    process = run_process(cmd, policy=policy, operation="chunk_split")
+    if group is not None:
+        group.add(process)
+    result = process.wait()
+    if result.returncode != 0:
+        return nominal
+    midpoints = [start + (silence_start + silence_end) / 2 for silence_start, silence_end in parse_silences(result.stderr, length)]
+    return min(midpoints, key=lambda point: abs(point - nominal), default=nominal)
+
+
+def _frame_seconds(spec):
+    return CODEC_FRAME_SAMPLES.get(spec.format, 1) / commands.output_sample_rate(spec, spec.format)
+
+
+def plan_chunks(ffmpeg_path, spec, input_path, duration, count, policy=None, group=None):
+    """
+    [(start, end)] ranges covering the input, split at quiet points aligned to codec frames.
+    Returns [] once group (a ProcessGroup), if given, is cancelled.
+    """
+    frame = _frame_seconds(spec)
+    points = []
+    for i in range(1, count):
+        if group is not None and group.cancelled:
+            return []
+        point = find_split_point(ffmpeg_path, input_path, duration * i / count, policy, group)
+        point = round(point / frame) * frame
+        if (not points or point > points[-1] + frame) and point < duration - frame:
+            points.append(point)
+    bounds = [0.0] + points + [duration]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def chunk_pieces(spec, ranges):
+    """
+    How each of the ranges from plan_chunks is encoded and joined: a list of
+    (start, length, inpoint, outpoint, samples) with start and length (None = to the end of
+    the input) the input section to encode, inpoint and outpoint the part of the chunk kept
+    by the join (None = from its start, to its end) and samples the exact output length of
+    a lossless chunk (None = not cut).
+    """
+    frame = _frame_seconds(spec)
+    preroll_frames = math.ceil(PREROLL_SECONDS / frame)
+    sample_rate = commands.output_sample_rate(spec, spec.format)
+    pieces = []
+    for index, (start, end) in enumerate(ranges):
+        last = index == len(ranges) - 1
+        if spec.format in LOSSLESS_FORMATS:
+            samples = None if last else round((end - start) * sample_rate)
+            # Decoded a little past the end, so atrim always has samples to cut at
+            pieces.append((start, None if last else end - start + PREROLL_SECONDS, None, None, samples))
+            continue
+        # Whole frames of warm-up before the split point (none before the start of the file)
+        preroll = min(preroll_frames, round(start / frame)) * frame if index else 0.0
+        length = None if last else preroll + (end - start) + preroll_frames * frame
+        pieces.append((start - preroll, length, preroll or None, None if last else preroll + end - start, None))
+    return pieces
+
+
+class ProcessGroup:
+    """
+    The chunk processes of one conversion behind the poll/terminate/send_signal interface of
+    a single process, so a scheduler Job can hold them as job.process (cancel and pause).
+    The group counts as running until finished is set, also while no process is alive
+    (planning, between chunks), so a cancel or pause then is recorded and applied to every
+    process added later.
+    """
+    def __init__(self, paused=False):
+        self.processes = []
+        self.cancelled = False
+        self.paused = paused
+        self.finished = False
+        self._lock = threading.Lock()
+
+    def add(self, process):
+        with self._lock:
+            self.processes.append(process)
+            cancelled, paused = self.cancelled, self.paused
+        if cancelled:
+            process.terminate()
+        elif paused and hasattr(signal, "SIGSTOP"):
+            process.send_signal(signal.SIGSTOP)
+
+    def _running(self):
+        with self._lock:
+            return [process for process in self.processes if process.poll() is None]
+
+    def poll(self):
+        return 0 if self.finished else None
+
+    def terminate(self):
+        self.cancelled = True
+        for process in self._running():
+            try:
+                process.terminate()
+            except Exception:
+                pass
+
+    def send_signal(self, sig):
+        if hasattr(signal, "SIGSTOP"):
+            self.paused = sig == signal.SIGSTOP
+        for process in self._running():
+            process.send_signal(sig)
+
+
+class _ChunkProgress:
+    """Combines the ProgressSnapshots of the chunk processes into one for the whole file."""
+    def __init__(self, duration, count, on_snapshot):
+        self.duration = duration
+        self.snapshots = [None] * count
+        self.on_snapshot = on_snapshot
+        self._lock = threading.Lock()
+
+    def update(self, index, snapshot, preroll):
+        if self.on_snapshot is None:
+            return
+        with self._lock:
+            self.snapshots[index] = (snapshot, preroll)
+            current = [item for item in self.snapshots if item is not None]
+            position = sum(max(0.0, snap.position - skip) for snap, skip in current)
+            speed = sum(snap.speed for snap, _skip in current if not snap.finished)
+        percent = max(0, min(99, int(position / self.duration * 100))) if self.duration > 0 else 0
+        eta = (self.duration - position) / speed if speed > 0 else None
+        self.on_snapshot(ProgressSnapshot(position, self.duration, percent, speed, eta))
+
+
+def convert_chunked(ffmpeg_path, spec, input_path, output_path, duration, count, on_snapshot=None, policy=None,
+                    loudness=None, job=None, operation="convert_audio", paused=False):
+    """
+    Convert one input of a ConvertAudioSpec (see chunk_count) with count ffmpeg processes in
+    parallel and join the pieces into output_path. The chunks run on the scheduler of job
+    (else the shared one), so they count against its worker limit. on_snapshot receives
+    ProgressSnapshots of the whole file; job, if given, gets a ProcessGroup as its process,
+    which starts paused if paused is set. Returns a ProcessResult, with returncode -1 once
+    the job is cancelled.
+    """
+    group = ProcessGroup(paused=paused)
+    if job is not None:
+        job.process = group
+        if job.cancelled:  # cancelled before the group was in place
+            group.terminate()
+    try:
+        return _convert_chunks(ffmpeg_path, spec, input_path, output_path, duration, count, on_snapshot, policy,
+            loudness, job, operation, group)
+    finally:
+        group.finished = True
+
+
+def _convert_chunks(ffmpeg_path, spec, input_path, output_path, duration, count, on_snapshot, policy, loudness, job,
+                    operation, group):
+    ranges = plan_chunks(ffmpeg_path, spec, input_path, duration, count, policy, group)
+    if group.cancelled:
+        return ProcessResult(-1, "Cancelled")
+    pieces = chunk_pieces(spec, ranges)
+    progress = _ChunkProgress(duration, len(ranges), on_snapshot)
+    temp_dir = tempfile.mkdtemp(prefix=".xtrack_chunks_", dir=os.path.dirname(output_path) or None)
+    extension = os.path.splitext(output_path)[1]
+
+    def encode(index, start, length, inpoint, outpoint, samples):
+        if group.cancelled:
+            return ProcessResult(-1, "Cancelled"), None
+        chunk_path = os.path.join(temp_dir, f"chunk{index:03d}{extension}")
+        cmd = commands.build_audio_chunk_command(ffmpeg_path, spec, input_path, start, length, chunk_path,
+            loudness, samples)
+        reader = ProgressReader(length if length is not None else duration - start,
+            lambda snapshot: progress.update(index, snapshot, inpoint or 0.0))
+        process = run_process(cmd, on_stdout_line=reader.feed, policy=policy, operation=operation)
+        group.add(process)
+        result = process.wait()
+        return result, (chunk_path, inpoint, outpoint)
+
+    try:
+        scheduler = job.scheduler if job is not None and job.scheduler is not None else get_scheduler()
+        jobs = [
+            scheduler.submit(lambda chunk_job, index=index, piece=piece: encode(index, *piece),
+                group=job.group if job is not None else "chunks", label=f"{os.path.basename(input_path)} #{index}")
+            for index, piece in enumerate(pieces)
+        ]
+        results = []
+        failure = None
+        for chunk_job in jobs:
+            # A chunk no worker has taken yet runs here, on the worker this conversion holds
+            if not scheduler.run_pending(chunk_job):
+                chunk_job.wait()
+            if chunk_job.result is None:
+                failure = failure or ProcessResult(-1, str(chunk_job.error or "Cancelled"))
+                group.terminate()
+                continue
+            result, piece = chunk_job.result
+            if result.returncode != 0:
+                if failure is None:
+                    failure = result
+                    group.terminate()  # the other chunks are of no use any more
+                continue
+            results.append(piece)
+        if failure is not None:
+            return failure
+        if group.cancelled:
+            return ProcessResult(-1, "Cancelled")
+
+        list_file = os.path.join(temp_dir, "chunks.txt")
+        commands.write_chunk_list(results, list_file)
+        process = run_process(commands.build_chunk_join_command(ffmpeg_path, list_file, output_path), policy=policy,
+            operation="chunk_join")
+        group.add(process)
+        result = process.wait()
+        if result.returncode == 0 and on_snapshot is not None:
+            on_snapshot(ProgressSnapshot(duration, duration, 100, 0.0, 0.0, finished=True))
+        return result
+    finally:
+        try:
+            shutil.rmtree(temp_dir)
+        except OSError as e:
+            logging.error(f"xTrack: failed to remove chunk folder {temp_dir}: {e}")
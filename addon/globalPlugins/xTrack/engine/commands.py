@@ -0,0 +1,637 @@
+# engine/commands.py
+# ffmpeg command builders for every xTrack operation. They only turn a job spec into
+# argument lists and output paths; running them is up to the caller.
+
+import os
+
+from .specs import BITRATE_FORMATS, ENCODER_PROFILES
+
+PROGRESS_ARGS = ["-progress", "pipe:1", "-nostats"]
+
+VIDEO_CONTAINERS = ("mp4", "mkv", "mov", "avi", "webm")
+
+LOUDNORM_TRUE_PEAK = -1.5  # dBTP
+LOUDNORM_RANGE = 11.0  # target loudness range (LU)
+
+# File extension of each ConvertAudioSpec format
+AUDIO_EXTENSIONS = {"mp3": "mp3", "wav": "wav", "flac": "flac", "opus": "opus", "aac": "m4a"}
+OPUS_SAMPLE_RATES = (48000, 24000, 16000, 12000, 8000)
+# Container for each source codec of the "original" format; other codecs go into Matroska audio
+ORIGINAL_AUDIO_EXTENSIONS = {
+    "aac": "m4a", "alac": "m4a", "mp3": "mp3", "opus": "opus", "vorbis": "ogg", "flac": "flac",
+    "ac3": "ac3", "eac3": "eac3", "pcm_s16le": "wav", "pcm_s24le": "wav", "pcm_s32le": "wav", "pcm_f32le": "wav",
+}
+ORIGINAL_AUDIO_FALLBACK_EXTENSION = "mka"
+
+# Encoder options per ConvertAudioSpec.encoder_profile: "balanced" keeps ffmpeg's defaults
+# where they are already a good trade-off
+AUDIO_ENCODER_PROFILES = {
+    # LAME algorithm quality, 0 (slowest, best) to 9 (fastest)
+    "mp3": {"fast": ["-compression_level", "7"], "balanced": [], "best": ["-compression_level", "2"]},
+    "opus": {"fast": ["-compression_level", "3"], "balanced": ["-compression_level", "8"], "best": ["-compression_level", "10"]},
+    "aac": {"fast": ["-aac_coder", "fast"], "balanced": [], "best": ["-aac_coder", "twoloop"]},
+}
+FLAC_PROFILE_LEVELS = {"fast": 0, "balanced": 5, "best": 8}
+FLAC_CHUNK_FRAME_SIZE = 4096  # samples per FLAC block in chunked conversions
+
+PCM_CODECS = ('pcm_s16le', 'pcm_s24le', 'pcm_s32le', 'pcm_f32le', 'pcm_f64le')
+
+# Per-format quality settings for image output: JPEG -q:v, WebP -quality, PNG/TIFF compression level
+IMAGE_QUALITY_MAP = {
+    "best": {"jpeg": 2, "webp": 100, "png": 0, "tiff": 0, "bmp": 0, "gif": 0},
+    "very_good": {"jpeg": 5, "webp": 90, "png": 2, "tiff": 2, "bmp": 0, "gif": 0},
+    "good": {"jpeg": 10, "webp": 80, "png": 4, "tiff": 4, "bmp": 0, "gif": 0},
+    "normal": {"jpeg": 15, "webp": 70, "png": 6, "tiff": 6, "bmp": 0, "gif": 0},
+    "small": {"jpeg": 20, "webp": 60, "png": 9, "tiff": 9, "bmp": 0, "gif": 0},
+}
+
+
+def is_pcm_audio(codec_name):
+    """Check if the audio codec is PCM (uncompressed audio)."""
+    return codec_name in PCM_CODECS
+
+
+def unique_path(path, reserved=()):
+    """Return path, or "name (n).ext" if it exists or is reserved by another output of the same batch."""
+    if not os.path.exists(path) and path not in reserved:
+        return path
+    base, ext = os.path.splitext(path)
+    i = 1
+    while True:
+        new_path = f"{base} ({i}){ext}"
+        if not os.path.exists(new_path) and new_path not in reserved:
+            return new_path
+        i += 1
+
+
+def original_audio_extension(media):
+    """Extension of the container an "original" output copies the first audio stream of media into."""
+    codec_name = media.audio_codec if media else ""
+    return ORIGINAL_AUDIO_EXTENSIONS.get(codec_name, ORIGINAL_AUDIO_FALLBACK_EXTENSION)
+
+
+def convert_audio_output_path(spec, input_path, profile=None, media=None):
+    """
+    Output file for one input of a ConvertAudioSpec; profile is one of spec.profiles()
+    (default: the main output). With several profiles of one format the bitrate goes in the name.
+    media (the input's MediaInfo) sets the extension of an "original" output.
+    """
+    output_format, bitrate_kbps = profile or spec.profiles()[0]
+    if output_format == "original":
+        extension = original_audio_extension(media)
+    else:
+        extension = AUDIO_EXTENSIONS.get(output_format, output_format)
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    input_format = os.path.splitext(input_path)[1].lower()[1:]
+    if output_format in BITRATE_FORMATS and sum(1 for other, _bitrate in spec.profiles() if other == output_format) > 1:
+        output_file = f"{base_name}_{bitrate_kbps}k.{extension}"
+    # If input format is same as output format, append "_converted" to avoid overwriting
+    elif input_format == extension:
+        output_file = f"{base_name}_converted.{extension}"
+    else:
+        output_file = f"{base_name}.{extension}"
+    return os.path.join(spec.output_dir or os.path.dirname(input_path), output_file)
+
+
+def convert_audio_output_paths(spec, input_path, media=None):
+    """Output file of every profile of a ConvertAudioSpec for one input, the main output first."""
+    profiles = spec.profiles()
+    outputs = [convert_audio_output_path(spec, input_path, profile, media) for profile in profiles]
+    # An "original" output may get the name of an encoded one (an MP3 source with an MP3 output)
+    for i, (output_format, _bitrate) in enumerate(profiles):
+        if output_format == "original" and outputs.count(outputs[i]) > 1:
+            base, ext = os.path.splitext(outputs[i])
+            outputs[i] = f"{base}_original{ext}"
+    return outputs
+
+
+def can_copy_audio(spec, media, profile=None):
+    """
+    True if the first audio stream of media (a MediaInfo) already has the codec, bitrate
+    and sample rate a ConvertAudioSpec output profile asks for at 100% volume, so it can be
+    copied as is. profile is one of spec.profiles() (default: the main output).
+    "original" outputs are always copied.
+    """
+    output_format, bitrate_kbps = profile or spec.profiles()[0]
+    if output_format == "original":
+        return True
+    if media is None or spec.volume != 1.0 or spec.loudness_target is not None:
+        return False
+    audio = media.audio
+    if audio is None or audio.sample_rate != spec.sample_rate:
+        return False
+    if output_format in ("mp3", "aac"):
+        # VBR files report an average bitrate and are re-encoded to the requested CBR
+        return audio.codec_name == output_format and audio.bit_rate > 0 and round(audio.bit_rate / 1000) == bitrate_kbps
+    if output_format == "flac":
+        return audio.codec_name == "flac"
+    if output_format == "wav":
+        return audio.codec_name == "pcm_s16le"
+    return False  # Opus is always VBR
+
+
+def build_loudness_analysis_command(ffmpeg_path, input_path):
+    """First loudnorm pass: measures the input and prints the result as JSON at the end of stderr."""
+    return [
+        ffmpeg_path,
+        "-hide_banner",
+        "-i", input_path,
+        "-vn",
+        "-af", f"loudnorm=TP={LOUDNORM_TRUE_PEAK}:LRA={LOUDNORM_RANGE}:print_format=json",
+    ] + PROGRESS_ARGS + [
+        "-f", "null", "-",
+    ]
+
+
+def loudnorm_filter(target, measurement=None):
+    """
+    loudnorm to target LUFS. With a measurement from the analysis pass (see engine/loudness.py)
+    it applies a single linear gain; without one it falls back to one-pass dynamic normalization.
+    """
+    if not measurement:
+        return f"loudnorm=I={target}:TP={LOUDNORM_TRUE_PEAK}:LRA={LOUDNORM_RANGE}"
+    # Linear mode needs a target range at least as wide as the measured one (at most 20 LU)
+    loudness_range = max(LOUDNORM_RANGE, min(20.0, measurement["input_lra"]))
+    return (
+        f"loudnorm=I={target}:TP={LOUDNORM_TRUE_PEAK}:LRA={loudness_range}"
+        f":measured_I={measurement['input_i']}:measured_TP={measurement['input_tp']}"
+        f":measured_LRA={measurement['input_lra']}:measured_thresh={measurement['input_thresh']}"
+        ":linear=true"
+    )
+
+
+def _audio_level_filter(spec, loudness=None):
+    if spec.loudness_target is not None:
+        return loudnorm_filter(spec.loudness_target, loudness)
+    return f"volume={spec.volume}"
+
+
+def output_sample_rate(spec, output_format):
+    """libopus only takes a few sample rates; other rates are raised to 48 kHz for Opus."""
+    if output_format == "opus" and spec.sample_rate not in OPUS_SAMPLE_RATES:
+        return 48000
+    return spec.sample_rate
+
+
+def _audio_encoder_args(spec, output_format, bitrate_kbps):
+    profile = spec.encoder_profile if spec.encoder_profile in ENCODER_PROFILES else "balanced"
+    if output_format == "mp3":
+        return ["-c:a", "libmp3lame", "-b:a", f"{bitrate_kbps}k"] + AUDIO_ENCODER_PROFILES["mp3"][profile]
+    if output_format == "flac":
+        level = spec.flac_level if spec.flac_level is not None else FLAC_PROFILE_LEVELS[profile]
+        return ["-c:a", "flac", "-compression_level", str(level)]
+    if output_format == "opus":
+        return ["-c:a", "libopus", "-b:a", f"{bitrate_kbps}k", "-application", spec.opus_application] + \
+            AUDIO_ENCODER_PROFILES["opus"][profile]
+    if output_format == "aac":
+        return ["-c:a", "aac", "-b:a", f"{bitrate_kbps}k"] + AUDIO_ENCODER_PROFILES["aac"][profile]
+    return ["-c:a", "pcm_s16le"]  # WAV
+
+
+def build_convert_audio_command(ffmpeg_path, spec, input_path, output_path, copy=False, loudness=None):
+    """
+    Convert command; copy=True (see can_copy_audio) remuxes the audio stream without re-encoding.
+    loudness is the input's loudnorm measurement when spec.loudness_target is set.
+    """
+    if copy:
+        return [
+            ffmpeg_path,
+            "-i", input_path,
+            "-map", "0:a:0",  # the stream can_copy_audio checked; no video, subtitles or data
+            "-c:a", "copy",
+        ] + PROGRESS_ARGS + [
+            "-y",
+            output_path,
+        ]
+    cmd = [
+        ffmpeg_path,
+        "-i", input_path,
+        "-vn",  # No video
+        "-ar", str(output_sample_rate(spec, spec.format)),
+        "-af", _audio_level_filter(spec, loudness),
+    ] + PROGRESS_ARGS + [
+        "-y",  # Overwrite output file if exists
+    ]
+    cmd.extend(_audio_encoder_args(spec, spec.format, spec.profiles()[0][1]))
+    cmd.append(output_path)
+    return cmd
+
+
+def build_multi_output_audio_command(ffmpeg_path, spec, input_path, outputs, copy_flags, loudness=None):
+    """
+    One ffmpeg run writing every profile of a ConvertAudioSpec: the input is decoded, its
+    volume and sample rate filtered once and the result split with asplit to each encoder.
+    outputs and copy_flags are per spec.profiles(); copied profiles map the input stream.
+    """
+    profiles = spec.profiles()
+    cmd = [ffmpeg_path, "-i", input_path] + PROGRESS_ARGS + ["-y"]
+    encoded = [i for i, copy in enumerate(copy_flags) if not copy]
+    if encoded:
+        labels = "".join(f"[a{i}]" for i in encoded)
+        graph = f"[0:a:0]{_audio_level_filter(spec, loudness)},aresample={spec.sample_rate}"
+        graph += f",asplit={len(encoded)}{labels}" if len(encoded) > 1 else labels
+        cmd.extend(["-filter_complex", graph])
+    for i, ((output_format, bitrate_kbps), output_path) in enumerate(zip(profiles, outputs)):
+        if copy_flags[i]:
+            cmd.extend(["-map", "0:a:0", "-c:a", "copy", output_path])
+        else:
+            cmd.extend(["-map", f"[a{i}]"] + _audio_encoder_args(spec, output_format, bitrate_kbps))
+            if output_sample_rate(spec, output_format) != spec.sample_rate:
+                cmd.extend(["-ar", str(output_sample_rate(spec, output_format))])
+            cmd.append(output_path)
+    return cmd
+
+
+def convert_audio_command(ffmpeg_path, spec, input_path, media=None, loudness=None):
+    """
+    Return (cmd, output paths, number of outputs stream-copied) for one input of a
+    ConvertAudioSpec, with a single ffmpeg run however many output profiles it has.
+    loudness is the input's loudnorm measurement when spec.loudness_target is set.
+    """
+    profiles = spec.profiles()
+    outputs = convert_audio_output_paths(spec, input_path, media)
+    copy_flags = [can_copy_audio(spec, media, profile) for profile in profiles]
+    if len(profiles) == 1:
+        cmd = build_convert_audio_command(ffmpeg_path, spec, input_path, outputs[0], copy_flags[0], loudness)
+    else:
+        cmd = build_multi_output_audio_command(ffmpeg_path, spec, input_path, outputs, copy_flags, loudness)
+    return cmd, outputs, sum(copy_flags)
+
+
+def convert_video_output_path(spec, input_path):
+    """Output file for one input of a ConvertVideoSpec."""
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    return os.path.join(spec.output_dir or os.path.dirname(input_path), f"{base_name}.{spec.container}")
+
+
+def build_convert_video_command(ffmpeg_path, spec, input_path, output_path):
+    cmd = [
+        ffmpeg_path,
+        "-i", input_path,
+        "-c:v", "copy",  # Copy video stream without re-encoding
+    ] + PROGRESS_ARGS + [
+        "-y",
+    ]
+    if spec.audio_codec is not None:
+        cmd.extend(["-c:a", spec.audio_codec])
+        if spec.audio_codec in ("aac", "libmp3lame"):
+            cmd.extend(["-b:a", "192k"])
+        if spec.sample_rate:
+            cmd.extend(["-ar", str(spec.sample_rate)])
+        if spec.channels:
+            cmd.extend(["-ac", str(spec.channels)])
+    else:
+        cmd.extend(["-c:a", "copy"])  # Copy original audio
+    cmd.append(output_path)
+    return cmd
+
+
+def write_concat_list(inputs, concat_file):
+    """Write the file list for ffmpeg's concat demuxer."""
+    with open(concat_file, 'w', encoding='utf-8') as f:
+        for file in inputs:
+            escaped_file = file.replace("'", "'\\''")
+            f.write(f"file '{escaped_file}'\n")
+
+
+def build_silence_probe_command(ffmpeg_path, input_path, start, length, noise="-45dB", min_silence=0.2):
+    """Decode length seconds from start and report silences (silence_start/silence_end on stderr)."""
+    return [
+        ffmpeg_path,
+        "-hide_banner",
+        "-nostats",
+        "-ss", f"{start:.3f}",
+        "-t", f"{length:.3f}",
+        "-i", input_path,
+        "-vn",
+        "-af", f"silencedetect=noise={noise}:d={min_silence}",
+        "-f", "null", "-",
+    ]
+
+
+def build_audio_chunk_command(ffmpeg_path, spec, input_path, start, length, output_path, loudness=None, samples=None):
+    """
+    Convert command of a ConvertAudioSpec for one chunk: length seconds of input_path from
+    start (None = to the end), cut to exactly samples output samples when given.
+    """
+    cmd = build_convert_audio_command(ffmpeg_path, spec, input_path, output_path, loudness=loudness)
+    # Input options: the decoder seeks sample-accurately and stops at the end of the range
+    index = cmd.index("-i")
+    cmd[index:index] = ["-ss", f"{start:.6f}"] + (["-t", f"{length:.6f}"] if length is not None else [])
+    if samples is not None:
+        index = cmd.index("-af") + 1
+        cmd[index] += f",aresample={output_sample_rate(spec, spec.format)},atrim=end_sample={samples}"
+    if spec.format == "mp3":
+        # No bit reservoir: a frame must not borrow bytes from the warm-up dropped at the join
+        cmd[-1:-1] = ["-reservoir", "0"]
+    elif spec.format == "flac":
+        # Whole blocks only, so a joined chunk leaves no short block mid-stream
+        cmd[-1:-1] = ["-frame_size", str(FLAC_CHUNK_FRAME_SIZE)]
+    return cmd
+
+
+def write_chunk_list(chunks, concat_file):
+    """
+    Write a concat demuxer list for encoded chunks: [(path, inpoint, outpoint)] in seconds,
+    either of which may be None. Packets before inpoint (the warm-up) and from outpoint
+    on (the encoder padding) are dropped when the chunks are joined.
+    """
+    with open(concat_file, 'w', encoding='utf-8') as f:
+        f.write("ffconcat version 1.0\n")
+        for file, inpoint, outpoint in chunks:
+            escaped_file = file.replace("'", "'\\''")
+            f.write(f"file '{escaped_file}'\n")
+            if inpoint:
+                f.write(f"inpoint {inpoint:.6f}\n")
+            if outpoint:
+                f.write(f"outpoint {outpoint:.6f}\n")
+
+
+def build_chunk_join_command(ffmpeg_path, concat_file, output_path):
+    """Join chunks listed by write_chunk_list without re-encoding."""
+    return [
+        ffmpeg_path,
+        "-f", "concat",
+        "-safe", "0",
+        "-i", concat_file,
+        "-c", "copy",
+    ] + PROGRESS_ARGS + [
+        "-y",
+        output_path,
+    ]
+
+
+def build_merge_concat_command(ffmpeg_path, spec, concat_file):
+    """Simple concatenation through the concat demuxer; concat_file must be written with write_concat_list."""
+    cmd = [
+        ffmpeg_path,
+        "-f", "concat",
+        "-safe", "0",
+        "-protocol_whitelist", "file,crypto,data,pipe",
+        "-i", concat_file,
+    ] + PROGRESS_ARGS + [
+        "-y",
+    ]
+    if spec.reencode:
+        cmd.extend(["-c:a", "libmp3lame", "-b:a", f"{spec.bitrate_kbps}k"])
+    else:
+        cmd.extend(["-c", "copy"])
+    cmd.append(spec.output_path)
+    return cmd
+
+
+def build_merge_crossfade_command(ffmpeg_path, spec):
+    """Cross-fade merge with a chain of acrossfade filters."""
+    cmd = [ffmpeg_path]
+    for file in spec.inputs:
+        cmd.extend(["-i", file])
+
+    count = len(spec.inputs)
+    if count == 2:
+        filter_complex = f"[0:a][1:a]acrossfade=d={spec.crossfade}:c1=tri:c2=tri[a]"
+    else:
+        filter_complex = ""
+        for i in range(count - 1):
+            source = f"[{i}:a]" if i == 0 else f"[a{i}]"
+            filter_complex += f"{source}[{i+1}:a]acrossfade=d={spec.crossfade}:c1=tri:c2=tri[a{i+1}];"
+        # Remove last semicolon and set final output
+        filter_complex = filter_complex[:-1]
+        filter_complex = filter_complex.replace(f"a{count-1}", "a")
+
+    # Fade in the merged result if requested
+    if spec.fade_in_next > 0 and count > 1:
+        filter_complex += f";[a]afade=t=in:st=0:d={spec.fade_in_next}[out]"
+        output_stream = "[out]"
+    else:
+        output_stream = "[a]"
+
+    cmd.extend([
+        "-filter_complex", filter_complex,
+        "-map", output_stream,
+    ] + PROGRESS_ARGS + [
+        "-y",
+        "-c:a", "libmp3lame",
+        "-b:a", f"{spec.bitrate_kbps}k",
+        spec.output_path,
+    ])
+    return cmd
+
+
+def build_split_commands(ffmpeg_path, spec):
+    """Return [(track_number, cmd, output_path)] for every non-empty track of a SplitSpec."""
+    file_ext = os.path.splitext(spec.input)[1].lower()
+    base_name = os.path.splitext(os.path.basename(spec.input))[0]
+    output_dir = spec.output_dir or os.path.dirname(spec.input)
+    commands = []
+    for i, end_time in enumerate(spec.end_times):
+        track_num = i + 1
+        start_time = spec.end_times[i - 1] if i > 0 else 0
+        if start_time >= end_time:
+            continue
+        output_path = os.path.join(output_dir, f"{base_name}_track{track_num:02d}{file_ext}")
+        counter = 1
+        while os.path.exists(output_path):
+            output_path = os.path.join(output_dir, f"{base_name}_track{track_num:02d}_{counter}{file_ext}")
+            counter += 1
+        cmd = [
+            ffmpeg_path,
+            "-y",
+            "-i", spec.input,
+            "-ss", str(start_time),
+            "-to", str(end_time),
+            "-c", "copy",  # Copy codec to preserve original quality
+            output_path,
+        ]
+        commands.append((track_num, cmd, output_path))
+    return commands
+
+
+def build_fade_filter(fade_in, fade_out):
+    """afade filter chain for [start, end] fade ranges, or None."""
+    filters = []
+    if fade_in and fade_in[0] < fade_in[1]:
+        filters.append(f"afade=t=in:st={fade_in[0]}:d={fade_in[1] - fade_in[0]}")
+    if fade_out and fade_out[0] < fade_out[1]:
+        filters.append(f"afade=t=out:st={fade_out[0]}:d={fade_out[1] - fade_out[0]}")
+    return ",".join(filters) if filters else None
+
+
+def build_trim_command(ffmpeg_path, spec, source_audio_codec=None):
+    """
+    Trim command. In video mode the video stream is always copied; PCM audio going into
+    MP4 is re-encoded to AAC, which needs source_audio_codec (see probe_media).
+    """
+    cmd = [
+        ffmpeg_path,
+        "-y",
+        "-i", spec.input,
+        "-ss", str(spec.start),
+        "-to", str(spec.end),
+    ]
+    if spec.mode == "audio":
+        fade_filter = build_fade_filter(spec.fade_in, spec.fade_out)
+        if fade_filter:
+            cmd.extend(["-af", fade_filter])
+        if spec.format == "mp3":
+            cmd.extend(["-c:a", "libmp3lame", "-b:a", f"{spec.bitrate_kbps}k", "-ar", "44100"])
+        else:
+            cmd.extend(["-c:a", "pcm_s16le", "-ar", "44100"])
+    else:
+        cmd.extend(["-c:v", "copy"])  # Always copy video stream
+        if spec.format == "mp4" and source_audio_codec and is_pcm_audio(source_audio_codec):
+            # PCM cannot go into MP4, re-encode to AAC
+            cmd.extend([
+                "-c:a", "aac",
+                "-b:a", "192k",
+                "-ar", str(spec.sample_rate or 48000),
+                "-ac", str(spec.channels or 2),
+            ])
+        else:
+            cmd.extend(["-c:a", "copy"])
+    cmd.append(spec.output_path)
+    return cmd
+
+
+def image_extension(image_format):
+    return "jpg" if image_format == "jpeg" else image_format
+
+
+def resize_image_output_path(spec, input_path, reserved=()):
+    """Unique output file for one input of a ResizeImageSpec."""
+    ext = image_extension(spec.format)
+    if len(spec.inputs) == 1 and spec.output_name:
+        output_filename = f"{spec.output_name}.{ext}"
+    else:
+        base_name = os.path.splitext(os.path.basename(input_path))[0]
+        output_filename = f"{base_name}_resized.{ext}"
+    return unique_path(os.path.join(spec.output_dir, output_filename), reserved)
+
+
+def get_crop_rect(spec, orig_width, orig_height):
+    """
+    Return (crop_width, crop_height, left, top) for an image, or None when the
+    spec does not crop or the crop would leave nothing.
+    """
+    if not spec.crop:
+        return None
+    crop_top, crop_bottom, crop_left, crop_right = spec.crop
+    crop_width = orig_width - (crop_left + crop_right)
+    crop_height = orig_height - (crop_top + crop_bottom)
+    if crop_width <= 0 or crop_height <= 0:
+        return None
+    return crop_width, crop_height, crop_left, crop_top
+
+
+def get_resize_dimensions(spec, base_width, base_height):
+    """Target size for an image of base_width x base_height, honouring keep_aspect."""
+    target_width = spec.width
+    target_height = spec.height
+    if spec.keep_aspect:
+        orig_aspect = base_width / base_height
+        target_aspect = target_width / target_height
+        if target_aspect > orig_aspect:
+            # Height is limiting factor
+            target_width = int(target_height * orig_aspect)
+        else:
+            # Width is limiting factor
+            target_height = int(target_width / orig_aspect)
+    return target_width, target_height
+
+
+def build_resize_image_command(ffmpeg_path, spec, input_path, output_path, orig_width, orig_height):
+    """Return (cmd, target_width, target_height) for one image."""
+    crop_rect = get_crop_rect(spec, orig_width, orig_height)
+    base_width, base_height = (crop_rect[0], crop_rect[1]) if crop_rect else (orig_width, orig_height)
+    target_width, target_height = get_resize_dimensions(spec, base_width, base_height)
+
+    filter_chain = []
+    if crop_rect and (crop_rect[0] != orig_width or crop_rect[1] != orig_height):
+        filter_chain.append("crop={}:{}:{}:{}".format(*crop_rect))
+    filter_chain.append(f"scale={target_width}:{target_height}")
+
+    cmd = [
+        ffmpeg_path,
+        "-i", input_path,
+        "-vf", ",".join(filter_chain),
+        "-y",
+    ]
+
+    quality_value = IMAGE_QUALITY_MAP.get(spec.quality, IMAGE_QUALITY_MAP["normal"]).get(spec.format, 0)
+    if spec.format == "jpeg":
+        cmd.extend(["-q:v", str(quality_value)])
+    elif spec.format == "webp":
+        cmd.extend(["-quality", str(quality_value)])
+    elif spec.format == "png":
+        cmd.extend(["-compression_level", str(quality_value)])
+    elif spec.format == "tiff":
+        cmd.extend(["-compression", "lzw"])
+
+    cmd.append(output_path)
+    return cmd, target_width, target_height
+
+
+FIT_1080P_FILTER = "scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2"
+
+
+def write_photo_list(photos, photo_duration, concat_file):
+    """Write the photo slideshow list for ffmpeg's concat demuxer."""
+    with open(concat_file, 'w', encoding='utf-8') as f:
+        for photo in photos:
+            escaped_photo = photo.replace("'", "'\\''")
+            f.write(f"file '{escaped_photo}'\n")
+            f.write(f"duration {photo_duration}\n")
+
+
+def build_mp3_to_mp4_command(ffmpeg_path, spec, concat_file=None):
+    """
+    MP3 to MP4 command. With several photos, concat_file must be written with
+    write_photo_list first.
+    """
+    if len(spec.photos) == 1:
+        cmd = [
+            ffmpeg_path,
+            "-loop", "1",
+            "-i", spec.photos[0],
+            "-i", spec.input,
+            "-c:v", "libx264",
+            "-preset", "medium",
+            "-tune", "stillimage",
+            "-c:a", "aac",
+            "-b:a", "192k",
+            "-pix_fmt", "yuv420p",
+            "-shortest",
+            "-movflags", "+faststart"
+        ]
+    elif spec.photos:
+        cmd = [
+            ffmpeg_path,
+            "-f", "concat",
+            "-safe", "0",
+            "-protocol_whitelist", "file,pipe,crypto,data",
+            "-i", concat_file,
+            "-i", spec.input,
+            "-c:v", "libx264",
+            "-preset", "medium",
+            "-c:a", "aac",
+            "-b:a", "192k",
+            "-pix_fmt", "yuv420p",
+            "-shortest",
+            "-movflags", "+faststart"
+        ]
+    else:
+        cmd = [
+            ffmpeg_path,
+            "-f", "lavfi",
+            "-i", f"color=c={spec.color}:s=1920x1080:d={spec.audio_duration}",
+            "-i", spec.input,
+            "-c:v", "libx264",
+            "-preset", "medium",
+            "-c:a", "aac",
+            "-b:a", "192k",
+            "-shortest",
+            "-movflags", "+faststart"
+        ]
+    if spec.photos and spec.fit_1080p:
+        cmd.extend(["-vf", FIT_1080P_FILTER])
+    cmd.extend(PROGRESS_ARGS + ["-y", spec.output_path])
+    return cmd
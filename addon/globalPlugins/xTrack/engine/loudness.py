@@ -0,0 +1,112 @@
+# engine/loudness.py
+# First pass of two-pass EBU R128 normalization: loudnorm measures each input and the result
+# is cached with the probe results and, for catalogued files, in the media catalog (both keyed
+# on path, size and mtime), where the background indexer also stores its measurements. The
+# measurement does not depend on the target, so exporting again at another target skips this
+# pass entirely.
+
+import json
+import math
+import logging
+
+from ..xTrackCore import run_process
+from ..probeCache import get_probe_cache
+from ..scheduler import JobScheduler
+from .commands import build_loudness_analysis_command
+
+CACHE_FIELD = "loudnorm"
+MEASURED_KEYS = ("input_i", "input_tp", "input_lra", "input_thresh")
+
+
+def parse_loudnorm(stderr):
+    """The measured values printed by loudnorm print_format=json, or None (silence, no output)."""
+    end = stderr.rfind("}")
+    start = stderr.rfind("{", 0, end)
+    if start < 0 or end < 0:
+        return None
+    try:
+        data = json.loads(stderr[start:end + 1])
+        measurement = {key: float(data[key]) for key in MEASURED_KEYS}
+    except (ValueError, KeyError, TypeError):
+        return None
+    # Silent inputs measure -inf and cannot be normalized
+    if not all(math.isfinite(value) for value in measurement.values()):
+        return None
+    return measurement
+
+
+def _catalog():
+    from ..catalog import get_media_catalog
+    return get_media_catalog()
+
+
+def get_cached_loudness(file_path):
+    """The cached measurement of file_path, or None if it was not measured at its current size and mtime."""
+    measurement = get_probe_cache().get(file_path, CACHE_FIELD)
+    if measurement is None:
+        catalog = _catalog()
+        if catalog is not None:
+            measurement = catalog.get_loudness(file_path)
+    return measurement
+
+
+def store_loudness(file_path, measurement):
+    """Cache the measurement of file_path for get_cached_loudness."""
+    get_probe_cache().set(file_path, CACHE_FIELD, measurement)
+    catalog = _catalog()
+    if catalog is not None:
+        catalog.set_loudness(file_path, measurement)
+
+
+def measure_loudness(ffmpeg_path, file_path, on_stdout_line=None, policy=None, job=None, cache=True):
+    """
+    Loudnorm measurement of file_path (a dict of MEASURED_KEYS), from the cache when possible.
+    on_stdout_line receives ffmpeg's progress; job, if given, gets the running process.
+    With cache=False a new measurement is returned without being cached (the catalog
+    indexer keeps its own).
+    """
+    cached = get_cached_loudness(file_path)
+    if cached is not None:
+        return cached
+    cmd = build_loudness_analysis_command(ffmpeg_path, file_path)
+    process = run_process(cmd, on_stdout_line=on_stdout_line, policy=policy, operation="loudness")
+    if job is not None:
+        job.process = process
+    result = process.wait()
+    if result.returncode != 0:
+        logging.error(f"xTrack: loudness analysis of {file_path} failed: {result.stderr.strip()[-200:]}")
+        return None
+    measurement = parse_loudnorm(result.stderr)
+    if measurement is not None and cache:
+        store_loudness(file_path, measurement)
+    return measurement
+
+
+def analyze_loudness(ffmpeg_path, file_paths, max_workers=None, policy=None):
+    """
+    Measure every file, running the files that are not cached in parallel on up to max_workers
+    ffmpeg processes. Returns {file path: measurement or None}.
+    """
+    results = {}
+    pending = []
+    for file_path in file_paths:
+        cached = get_cached_loudness(file_path)
+        if cached is not None:
+            results[file_path] = cached
+        else:
+            pending.append(file_path)
+    if not pending:
+        return results
+    scheduler = JobScheduler(max_workers)
+    jobs = [
+        (file_path, scheduler.submit(
+            lambda job, file_path=file_path: measure_loudness(ffmpeg_path, file_path, policy=policy, job=job),
+            group="loudness",
+            label=file_path,
+        ))
+        for file_path in pending
+    ]
+    for file_path, job in jobs:
+        job.wait()
+        results[file_path] = job.result
+    return results
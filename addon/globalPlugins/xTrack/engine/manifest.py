@@ -0,0 +1,141 @@
+# engine/manifest.py
+# Incremental batches: each output folder keeps a manifest of the sources converted into it,
+# keyed on source path, size, mtime and a hash of the settings, so a re-run only converts
+# new or changed sources and never takes its own earlier outputs for new inputs.
+
+import os
+import json
+import hashlib
+import logging
+import threading
+
+from .specs import spec_to_dict
+
+MANIFEST_FILE_NAME = ".xTrackManifest.json"
+MANIFEST_VERSION = 1
+# Spec fields that say which files a batch covers rather than how they are converted
+_BATCH_FIELDS = ("inputs", "output_dir", "incremental")
+
+
+def settings_hash(spec):
+    """Short hash of the conversion settings of spec; equal settings give equal hashes."""
+    settings = {key: value for key, value in spec_to_dict(spec).items() if key not in _BATCH_FIELDS}
+    return hashlib.sha1(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def _key(file_path):
+    return os.path.normcase(os.path.abspath(file_path))
+
+
+def _signature(file_path):
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime
+
+
+class BatchManifest:
+    """The manifest of one output folder: {source key: {size, mtime, settings, outputs}}."""
+    def __init__(self, folder):
+        self.folder = folder
+        self.path = os.path.join(folder, MANIFEST_FILE_NAME)
+        self.entries = {}
+        self.outputs = set()  # names of the files this folder's entries produced
+        self.dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            if not os.path.exists(self.path):
+                return
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != MANIFEST_VERSION:
+                return
+            self.entries = data.get("sources", {})
+        except Exception as e:
+            logging.error(f"xTrack: failed to load manifest {self.path}: {e}")
+            self.entries = {}
+        for entry in self.entries.values():
+            self.outputs.update(os.path.normcase(name) for name in entry.get("outputs", ()))
+
+    def is_current(self, source, settings, outputs):
+        """True if source was converted with settings at its current size and mtime, and all outputs still exist."""
+        entry = self.entries.get(_key(source))
+        signature = _signature(source)
+        if entry is None or signature is None:
+            return False
+        if (entry.get("size"), entry.get("mtime")) != signature or entry.get("settings") != settings:
+            return False
+        names = [os.path.basename(output) for output in outputs]
+        return entry.get("outputs") == names and all(os.path.exists(output) for output in outputs)
+
+    def record(self, source, settings, outputs):
+        signature = _signature(source)
+        if signature is None:
+            return
+        names = [os.path.basename(output) for output in outputs]
+        self.entries[_key(source)] = {"size": signature[0], "mtime": signature[1], "settings": settings,
+            "outputs": names}
+        self.outputs.update(os.path.normcase(name) for name in names)
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": MANIFEST_VERSION, "sources": self.entries}, f, indent=1)
+            os.replace(temp_path, self.path)
+            self.dirty = False
+        except OSError as e:
+            logging.error(f"xTrack: failed to save manifest {self.path}: {e}")
+
+
+class ManifestSet:
+    """
+    The manifests an incremental spec touches, one per output folder, loaded on first use.
+    Safe to use from several worker threads.
+    """
+    def __init__(self, spec):
+        self.settings = settings_hash(spec)
+        self._manifests = {}
+        self._lock = threading.Lock()
+
+    def _manifest(self, folder):
+        # Called with self._lock held.
+        key = _key(folder)
+        manifest = self._manifests.get(key)
+        if manifest is None:
+            manifest = self._manifests[key] = BatchManifest(folder)
+        return manifest
+
+    def is_current(self, source, outputs):
+        """True if outputs are up to date for source, so it can be skipped."""
+        with self._lock:
+            return self._manifest(os.path.dirname(outputs[0])).is_current(source, self.settings, outputs)
+
+    def is_generated(self, source):
+        """True if source is itself an output an earlier batch wrote to its folder."""
+        with self._lock:
+            return os.path.normcase(os.path.basename(source)) in self._manifest(os.path.dirname(source)).outputs
+
+    def needs_conversion(self, source, outputs):
+        return not self.is_generated(source) and not self.is_current(source, outputs)
+
+    def record(self, source, outputs):
+        """Note that source was converted to outputs with these settings."""
+        with self._lock:
+            self._manifest(os.path.dirname(outputs[0])).record(source, self.settings, outputs)
+
+    def save(self):
+        with self._lock:
+            for manifest in self._manifests.values():
+                manifest.save()
+
+
+def open_manifests(spec):
+    """A ManifestSet for spec if it asks for an incremental batch, else None."""
+    return ManifestSet(spec) if getattr(spec, "incremental", False) else None
@@ -0,0 +1,184 @@
+# engine/planner.py
+# Predicts how long a batch will take and how much disk space it needs by encoding a short
+# slice from the middle of a few representative inputs with the exact chosen settings.
+
+import os
+import time
+import shutil
+import tempfile
+from dataclasses import replace
+
+from ..xTrackCore import find_tool, run_process, ProgressReader
+from .runner import build_tasks, pending_inputs
+from .manifest import open_manifests
+
+SAMPLE_COUNT = 3  # inputs encoded per estimate
+SLICE_SECONDS = 10.0  # media encoded per sample
+
+
+class Estimate:
+    """Predicted wall time (seconds) and output size (bytes) of a job spec."""
+    __slots__ = ("seconds", "bytes", "files", "sampled")
+
+    def __init__(self, seconds, bytes, files, sampled):
+        self.seconds = seconds
+        self.bytes = bytes
+        self.files = files  # ffmpeg runs in the job
+        self.sampled = sampled  # of which were sample-encoded
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def pick_samples(tasks, count=SAMPLE_COUNT):
+    """Spread count samples over the tasks sorted by duration, so short and long inputs are both measured."""
+    runnable = sorted((task for task in tasks if task.cmd is not None), key=lambda task: task.duration)
+    if len(runnable) <= count:
+        return runnable
+    if count == 1:
+        return [runnable[len(runnable) // 2]]
+    step = (len(runnable) - 1) / (count - 1)
+    return [runnable[round(i * step)] for i in range(count)]
+
+
+def slice_command(cmd, input_path, duration, output_path, slice_seconds=SLICE_SECONDS):
+    """
+    cmd limited to slice_seconds taken from the middle of input_path, writing output_path.
+    Inputs without a duration (images) are encoded whole.
+    """
+    cmd = list(cmd[:-1])
+    if duration > slice_seconds:
+        input_index = next((i for i in range(len(cmd) - 1) if cmd[i] == "-i" and cmd[i + 1] == input_path), None)
+        limit = "-t" not in cmd and "-to" not in cmd
+        if input_index is not None:
+            # Input options, so every output of a multi-output command gets the same slice
+            options = [] if "-ss" in cmd else ["-ss", f"{(duration - slice_seconds) / 2:.3f}"]
+            if limit:
+                options.extend(["-t", f"{slice_seconds:.3f}"])
+            cmd[input_index:input_index] = options
+        elif limit:
+            cmd.extend(["-t", f"{slice_seconds:.3f}"])
+    cmd.append(output_path)
+    return cmd
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _clear_folder(folder):
+    """Remove the files in folder; returns their total size."""
+    size = 0
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        if os.path.isfile(path):
+            size += _file_size(path)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return size
+
+
+def _measure(task, sample_dir, slice_seconds, policy):
+    """
+    Encode a slice of one task; returns (media seconds, wall, encode seconds, output bytes) or None.
+    Output bytes count every file the sample wrote to sample_dir (multi-output commands).
+    """
+    output = os.path.join(sample_dir, "sample" + os.path.splitext(task.output or "")[1])
+    cmd = slice_command(task.cmd, task.input, task.duration, output, slice_seconds)
+    timed = task.duration > 0
+    reader = ProgressReader(min(task.duration, slice_seconds) if timed else 0, lambda snapshot: None)
+    start = time.perf_counter()
+    result = run_process(cmd, on_stdout_line=reader.feed, policy=policy, operation="estimate").wait()
+    wall = time.perf_counter() - start
+    size = _clear_folder(sample_dir)
+    if result.returncode != 0:
+        return None
+    media = 0.0
+    encode = wall
+    if timed:
+        media = reader.snapshot.position or min(task.duration, slice_seconds)
+        # ffmpeg's own speed excludes process start-up and opening the files
+        if reader.snapshot.speed > 0:
+            encode = min(wall, media / reader.snapshot.speed)
+    return media, wall, encode, size
+
+
+def estimate_spec(spec, tools_path=None, workers=1, sample_count=SAMPLE_COUNT, slice_seconds=SLICE_SECONDS,
+                  policy=None):
+    """
+    Estimate a job spec by sample-encoding slices of up to sample_count inputs.
+
+    Each sample gives an encode rate (seconds per media second), a fixed per-file overhead
+    and an output bitrate, which are extrapolated to every input with its probed duration.
+    Inputs without a duration (images) are extrapolated per file, and output size by the
+    ratio to input size. workers is the number of jobs that will run side by side.
+    Incremental specs are estimated for the inputs that are not up to date.
+    Returns an Estimate, or None if no sample could be encoded.
+    """
+    ffmpeg_path = find_tool(tools_path, "ffmpeg")
+    if not ffmpeg_path:
+        raise FileNotFoundError("ffmpeg not found; set XTRACK_FFMPEG or put it on the PATH")
+    manifests = open_manifests(spec)
+    if manifests:
+        spec = replace(spec, inputs=pending_inputs(spec, manifests, tools_path), incremental=False)
+        if not spec.inputs:
+            return Estimate(0.0, 0, 0, 0)
+    sample_dir = tempfile.mkdtemp(prefix="xtrack_estimate_")
+    if hasattr(spec, "output_dir"):
+        # Nothing is written to (or created in) the real output folder
+        spec = replace(spec, output_dir=sample_dir)
+    try:
+        # Loudness analysis is not sampled: uncached inputs are timed with one-pass normalization
+        tasks = build_tasks(spec, ffmpeg_path, tools_path, analyze=False)
+    except Exception:
+        shutil.rmtree(sample_dir, ignore_errors=True)
+        raise
+    try:
+        samples = []
+        for task in pick_samples(tasks, sample_count):
+            measured = _measure(task, sample_dir, slice_seconds, policy)
+            if measured is not None:
+                samples.append((task, measured))
+    finally:
+        shutil.rmtree(sample_dir, ignore_errors=True)
+        for task in tasks:
+            for path in task.cleanup:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+    if not samples:
+        return None
+
+    timed = [(media, wall, encode, size) for _task, (media, wall, encode, size) in samples if media > 0]
+    untimed = [(task, wall, size) for task, (media, wall, _encode, size) in samples if media <= 0]
+    rate = sum(encode / media for media, _wall, encode, _size in timed) / len(timed) if timed else 0.0
+    overhead = sum(wall - encode for _media, wall, encode, _size in timed) / len(timed) if timed else 0.0
+    bytes_per_second = sum(size / media for media, _wall, _encode, size in timed) / len(timed) if timed else 0.0
+    file_wall = sum(wall for _task, wall, _size in untimed) / len(untimed) if untimed else overhead
+    size_ratios = [size / _file_size(task.input) for task, _wall, size in untimed if _file_size(task.input)]
+    size_ratio = sum(size_ratios) / len(size_ratios) if size_ratios else 0.0
+
+    total_seconds = 0.0
+    longest = 0.0
+    total_bytes = 0.0
+    for task in tasks:
+        if task.cmd is None:
+            continue
+        if task.duration > 0 and timed:
+            seconds = overhead + rate * task.duration
+            total_bytes += bytes_per_second * task.duration
+        else:
+            seconds = file_wall
+            total_bytes += size_ratio * _file_size(task.input)
+        total_seconds += seconds
+        longest = max(longest, seconds)
+    runnable = sum(1 for task in tasks if task.cmd is not None)
+    parallel = max(1, min(workers or 1, runnable))
+    # Side-by-side jobs share the machine, and the batch cannot finish before its longest file
+    return Estimate(max(total_seconds / parallel, longest), int(total_bytes), runnable, len(samples))
@@ -0,0 +1,226 @@
+# engine/runner.py
+# Runs job specs without any UI: builds the commands, runs them on a JobScheduler and
+# reports per-output results.
+
+import os
+import time
+import tempfile
+
+from ..xTrackCore import find_tool, probe_media, run_process, ProgressReader
+from ..scheduler import JobScheduler, get_default_worker_count
+from . import commands
+from .manifest import open_manifests
+from .loudness import analyze_loudness, get_cached_loudness
+from .chunking import chunk_count, convert_chunked
+from .specs import ConvertAudioSpec, ConvertVideoSpec, MergeSpec, SplitSpec, TrimSpec, ResizeImageSpec, Mp3ToMp4Spec, spec_type
+
+
+class JobResult:
+    """Outcome of one ffmpeg run of a job."""
+    __slots__ = ("input", "output", "ok", "error", "elapsed", "skipped")
+
+    def __init__(self, input, output, ok, error="", elapsed=0.0, skipped=False):
+        self.input = input
+        self.output = output
+        self.ok = ok
+        self.error = error
+        self.elapsed = elapsed
+        self.skipped = skipped  # already up to date in an incremental batch
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Task:
+    """One ffmpeg command of a job."""
+    __slots__ = ("input", "cmd", "output", "duration", "cleanup", "outputs", "run")
+
+    def __init__(self, input, cmd, output, duration=0.0, cleanup=(), outputs=None, run=None):
+        self.input = input
+        self.cmd = cmd
+        self.output = output
+        self.duration = duration  # expected output duration, for progress
+        self.cleanup = cleanup  # temporary files to delete afterwards
+        self.outputs = outputs or ([output] if output else [])  # every file the command writes
+        # run(on_snapshot, policy, job) -> ProcessResult replaces running cmd (chunked conversion)
+        self.run = run
+
+
+def _duration(tools_path, file_path):
+    media = probe_media(tools_path, file_path)
+    return media.duration if media else 0.0
+
+
+def manifest_outputs(spec, input_path, tools_path=None):
+    """The outputs an incremental spec (ConvertAudioSpec or ConvertVideoSpec) writes for one input."""
+    if isinstance(spec, ConvertAudioSpec):
+        # The extension of an "original" output depends on the input's audio codec
+        extracts = any(output_format == "original" for output_format, _bitrate in spec.profiles())
+        media = probe_media(tools_path, input_path) if extracts else None
+        return commands.convert_audio_output_paths(spec, input_path, media)
+    return [commands.convert_video_output_path(spec, input_path)]
+
+
+def pending_inputs(spec, manifests, tools_path=None):
+    """
+    Inputs of an incremental spec that are new or changed since they were last converted.
+    Checked before any probing (except for "original" audio outputs, whose extension comes
+    from the probe cache), so an up-to-date library costs a stat per file.
+    """
+    return [input_path for input_path in spec.inputs
+        if manifests.needs_conversion(input_path, manifest_outputs(spec, input_path, tools_path))]
+
+
+def build_tasks(spec, ffmpeg_path, tools_path=None, manifests=None, analyze=True, max_workers=None):
+    """
+    Turn a job spec into the list of Tasks that carry it out.
+    With manifests (see engine/manifest.py), inputs that are already up to date get no Task.
+    A ConvertAudioSpec with a loudness_target first measures its inputs on up to max_workers
+    processes; with analyze=False only cached measurements are used and the other inputs
+    get one-pass normalization. Long inputs share the max_workers processes between their
+    chunks (see engine/chunking.py).
+    """
+    if isinstance(spec, ConvertAudioSpec):
+        tasks = []
+        inputs = pending_inputs(spec, manifests, tools_path) if manifests else spec.inputs
+        measurements = {}
+        if spec.loudness_target is not None and spec.transcodes():
+            if analyze:
+                measurements = analyze_loudness(ffmpeg_path, inputs, max_workers)
+            else:
+                measurements = {input_path: get_cached_loudness(input_path) for input_path in inputs}
+        chunk_workers = (max_workers or get_default_worker_count()) // max(1, len(inputs))
+        for input_path in inputs:
+            media = probe_media(tools_path, input_path)
+            duration = media.duration if media else 0.0
+            loudness = measurements.get(input_path)
+            cmd, outputs, copied = commands.convert_audio_command(ffmpeg_path, spec, input_path, media, loudness)
+            run = None
+            chunks = chunk_count(spec, duration, chunk_workers, copied, loudness)
+            if chunks:
+                run = (lambda on_snapshot, policy, job, input_path=input_path, output=outputs[0], duration=duration,
+                    chunks=chunks, loudness=loudness: convert_chunked(ffmpeg_path, spec, input_path, output, duration,
+                    chunks, on_snapshot, policy, loudness, job))
+            tasks.append(Task(input_path, cmd, outputs[0], duration, outputs=outputs, run=run))
+        return tasks
+    if isinstance(spec, ConvertVideoSpec):
+        tasks = []
+        for input_path in (pending_inputs(spec, manifests, tools_path) if manifests else spec.inputs):
+            output = commands.convert_video_output_path(spec, input_path)
+            cmd = commands.build_convert_video_command(ffmpeg_path, spec, input_path, output)
+            tasks.append(Task(input_path, cmd, output, _duration(tools_path, input_path)))
+        return tasks
+    if isinstance(spec, MergeSpec):
+        duration = sum(_duration(tools_path, input_path) for input_path in spec.inputs)
+        if spec.crossfade > 0 and spec.reencode:
+            cmd = commands.build_merge_crossfade_command(ffmpeg_path, spec)
+            return [Task(";".join(spec.inputs), cmd, spec.output_path, duration)]
+        fd, concat_file = tempfile.mkstemp(prefix="xtrack_concat_", suffix=".txt")
+        os.close(fd)
+        commands.write_concat_list(spec.inputs, concat_file)
+        cmd = commands.build_merge_concat_command(ffmpeg_path, spec, concat_file)
+        return [Task(";".join(spec.inputs), cmd, spec.output_path, duration, cleanup=(concat_file,))]
+    if isinstance(spec, SplitSpec):
+        return [Task(spec.input, cmd, output) for _track, cmd, output in commands.build_split_commands(ffmpeg_path, spec)]
+    if isinstance(spec, TrimSpec):
+        source_audio_codec = None
+        if spec.mode == "video":
+            media = probe_media(tools_path, spec.input)
+            source_audio_codec = media.audio_codec if media else None
+        cmd = commands.build_trim_command(ffmpeg_path, spec, source_audio_codec)
+        return [Task(spec.input, cmd, spec.output_path, spec.end - spec.start)]
+    if isinstance(spec, ResizeImageSpec):
+        tasks = []
+        reserved = set()
+        os.makedirs(spec.output_dir, exist_ok=True)
+        for input_path in spec.inputs:
+            media = probe_media(tools_path, input_path)
+            if media is None or media.width <= 0 or media.height <= 0:
+                tasks.append(Task(input_path, None, None))
+                continue
+            output = commands.resize_image_output_path(spec, input_path, reserved)
+            reserved.add(output)
+            cmd, _width, _height = commands.build_resize_image_command(
+                ffmpeg_path, spec, input_path, output, media.width, media.height)
+            tasks.append(Task(input_path, cmd, output))
+        return tasks
+    if isinstance(spec, Mp3ToMp4Spec):
+        duration = _duration(tools_path, spec.input)
+        if not spec.audio_duration:
+            spec.audio_duration = duration
+        if len(spec.photos) > 1:
+            fd, concat_file = tempfile.mkstemp(prefix="xtrack_concat_", suffix=".txt")
+            os.close(fd)
+            commands.write_photo_list(spec.photos, spec.photo_duration, concat_file)
+            cmd = commands.build_mp3_to_mp4_command(ffmpeg_path, spec, concat_file)
+            return [Task(spec.input, cmd, spec.output_path, duration, cleanup=(concat_file,))]
+        return [Task(spec.input, commands.build_mp3_to_mp4_command(ffmpeg_path, spec), spec.output_path, duration)]
+    raise TypeError(f"Not a job spec: {spec!r}")
+
+
+def run_task(task, on_progress=None, policy=None, job=None, operation=None):
+    """Run one Task and return its JobResult; operation is the spec type, for telemetry."""
+    if task.cmd is None:
+        return JobResult(task.input, None, False, "Could not read the input file")
+    start = time.perf_counter()
+    reader = None
+    if on_progress is not None:
+        reader = ProgressReader(task.duration, lambda snapshot: on_progress(task, snapshot))
+    try:
+        if task.run is not None:
+            result = task.run(reader.on_update if reader else None, policy, job)
+        else:
+            process = run_process(task.cmd, on_stdout_line=reader.feed if reader else None, policy=policy,
+                                  operation=operation)
+            if job is not None:
+                job.process = process
+            result = process.wait()
+    finally:
+        for path in task.cleanup:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        return JobResult(task.input, task.output, False, result.stderr.strip(), elapsed)
+    return JobResult(task.input, task.output, True, "", elapsed)
+
+
+def run_spec(spec, tools_path=None, on_progress=None, max_workers=None, policy=None):
+    """
+    Run a job spec to completion and return a JobResult per ffmpeg run.
+    Independent outputs run in parallel on up to max_workers processes.
+    on_progress(task, snapshot) receives throttled ProgressSnapshots.
+    """
+    ffmpeg_path = find_tool(tools_path, "ffmpeg")
+    if not ffmpeg_path:
+        raise FileNotFoundError("ffmpeg not found; set XTRACK_FFMPEG or put it on the PATH")
+    manifests = open_manifests(spec)
+    tasks = build_tasks(spec, ffmpeg_path, tools_path, manifests, max_workers=max_workers)
+    operation = spec_type(spec)
+    scheduler = JobScheduler(max_workers)
+    jobs = [
+        scheduler.submit(
+            lambda job, task=task: run_task(task, on_progress, policy, job, operation),
+            group="engine",
+            label=task.input,
+        )
+        for task in tasks
+    ]
+    results = []
+    if manifests:
+        converting = set(task.input for task in tasks)
+        results.extend(JobResult(input_path, None, True, skipped=True)
+            for input_path in spec.inputs if input_path not in converting)
+    for task, job in zip(tasks, jobs):
+        job.wait()
+        if job.result is not None:
+            results.append(job.result)
+            if manifests and job.result.ok:
+                manifests.record(task.input, task.outputs)
+        else:
+            results.append(JobResult(task.input, task.output, False, str(job.error or "Cancelled")))
+    if manifests:
+        manifests.save()
+    return results
@@ -0,0 +1,152 @@
+# engine/specs.py
+# Plain-data job specifications. They hold everything an operation needs, so jobs can be
+# built by the dialogs, loaded from JSON or given on the command line.
+
+from dataclasses import dataclass, field, asdict
+from typing import List, Optional
+
+# "original" copies the input's audio stream as is, into the container that suits its codec
+AUDIO_FORMATS = ("mp3", "wav", "flac", "opus", "aac", "original")
+BITRATE_FORMATS = ("mp3", "opus", "aac")  # lossy formats with a bitrate setting
+ENCODER_PROFILES = ("fast", "balanced", "best")
+
+
+@dataclass
+class ConvertAudioSpec:
+    """Convert audio files to MP3, WAV, FLAC, Opus or AAC, or extract their audio without re-encoding."""
+    inputs: List[str]
+    output_dir: Optional[str] = None  # None = next to each input
+    format: str = "mp3"  # "mp3", "wav", "flac", "opus", "aac" (.m4a) or "original" (stream copy)
+    bitrate_kbps: int = 320  # MP3, Opus and AAC
+    sample_rate: int = 48000
+    volume: float = 1.0
+    # More outputs written by the same ffmpeg run, so each input is decoded and filtered
+    # once: e.g. [{"format": "mp3", "bitrate_kbps": 128}, {"format": "wav"}]
+    extra_outputs: List[dict] = field(default_factory=list)
+    incremental: bool = False  # skip sources already converted with these settings (engine/manifest.py)
+    loudness_target: Optional[float] = None  # normalize to this many LUFS (EBU R128) instead of applying volume
+    encoder_profile: str = "balanced"  # "fast", "balanced" or "best": encoder speed against size/quality
+    flac_level: Optional[int] = None  # FLAC compression level 0-12; None = from encoder_profile
+    opus_application: str = "audio"  # "audio" (music) or "voip" (speech)
+
+    def profiles(self):
+        """[(format, bitrate_kbps)] of every output, the main one first, without duplicates."""
+        profiles = [(self.format, self.bitrate_kbps if self.format in BITRATE_FORMATS else 0)]
+        for extra in self.extra_outputs:
+            output_format = extra.get("format", "mp3")
+            profile = (output_format, int(extra.get("bitrate_kbps", 320)) if output_format in BITRATE_FORMATS else 0)
+            if profile not in profiles:
+                profiles.append(profile)
+        return profiles
+
+    def transcodes(self):
+        """True if any output is encoded; "original" outputs ignore volume, loudness and sample rate."""
+        return any(output_format != "original" for output_format, _bitrate in self.profiles())
+
+
+@dataclass
+class ConvertVideoSpec:
+    """Remux video files into another container, copying the video stream."""
+    inputs: List[str]
+    output_dir: Optional[str] = None
+    container: str = "mp4"  # mp4, mkv, mov, avi or webm
+    audio_codec: Optional[str] = "aac"  # aac, libmp3lame, libvorbis or None to copy
+    sample_rate: Optional[int] = None  # None = keep original
+    channels: Optional[int] = None  # None = keep original
+    incremental: bool = False  # skip sources already converted with these settings (engine/manifest.py)
+
+
+@dataclass
+class MergeSpec:
+    """Join audio files into one MP3, optionally cross-fading between them."""
+    inputs: List[str]
+    output_path: str
+    reencode: bool = False  # False = stream copy (all inputs must be MP3)
+    bitrate_kbps: int = 192
+    crossfade: float = 0.0  # seconds, needs reencode
+    fade_in_next: float = 0.0  # seconds
+
+
+@dataclass
+class SplitSpec:
+    """Cut one file into tracks ending at the given times, copying the streams."""
+    input: str
+    end_times: List[float]
+    output_dir: Optional[str] = None
+
+
+@dataclass
+class TrimSpec:
+    """Cut one section out of a file."""
+    input: str
+    start: float
+    end: float
+    output_path: str
+    mode: str = "audio"  # "audio" re-encodes the audio, "video" copies the video stream
+    format: str = "mp3"  # audio: mp3 or wav; video: mp4, mkv, mov, avi or webm
+    bitrate_kbps: int = 192  # audio MP3 only
+    fade_in: Optional[List[float]] = None  # [start, end] in seconds, audio only
+    fade_out: Optional[List[float]] = None  # [start, end] in seconds, audio only
+    sample_rate: Optional[int] = None  # video: used when PCM audio has to be re-encoded
+    channels: Optional[int] = None  # video: used when PCM audio has to be re-encoded
+
+
+@dataclass
+class ResizeImageSpec:
+    """Resize (and optionally crop) images."""
+    inputs: List[str]
+    output_dir: str
+    width: int
+    height: int
+    keep_aspect: bool = True
+    crop: Optional[List[int]] = None  # [top, bottom, left, right] in pixels
+    format: str = "jpeg"  # jpeg, png, webp, bmp, tiff or gif
+    quality: str = "normal"  # best, very_good, good, normal or small
+    output_name: Optional[str] = None  # file name without extension, single input only
+
+
+@dataclass
+class Mp3ToMp4Spec:
+    """Turn an audio file into an MP4 video over photos or a solid colour."""
+    input: str
+    output_path: str
+    photos: List[str] = field(default_factory=list)  # empty = colour background
+    photo_duration: float = 5.0  # seconds per photo when there are several
+    color: str = "000000"  # background colour as hex RGB
+    fit_1080p: bool = False  # scale and pad photos to 1920x1080
+    audio_duration: float = 0.0  # length of the colour background, from probe_media
+
+
+SPEC_TYPES = {
+    "convert_audio": ConvertAudioSpec,
+    "convert_video": ConvertVideoSpec,
+    "merge": MergeSpec,
+    "split": SplitSpec,
+    "trim": TrimSpec,
+    "resize_image": ResizeImageSpec,
+    "mp3_to_mp4": Mp3ToMp4Spec,
+}
+
+
+def spec_type(spec):
+    """Return the "type" name of a spec, as used in job files."""
+    for name, spec_class in SPEC_TYPES.items():
+        if isinstance(spec, spec_class):
+            return name
+    raise TypeError(f"Not a job spec: {spec!r}")
+
+
+def spec_to_dict(spec):
+    """Return a JSON-ready dict of spec, including its "type"."""
+    data = asdict(spec)
+    data["type"] = spec_type(spec)
+    return data
+
+
+def spec_from_dict(data):
+    """Build a spec from a dict as produced by spec_to_dict."""
+    data = dict(data)
+    spec_type = data.pop("type", None)
+    if spec_type not in SPEC_TYPES:
+        raise ValueError(f"Unknown job type: {spec_type}")
+    return SPEC_TYPES[spec_type](**data)
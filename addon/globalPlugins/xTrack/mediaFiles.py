@@ -0,0 +1,154 @@
+# mediaFiles.py
+# Classifies selected files and folder contents for the NVDA+X menu.
+# A folder is scanned with os.scandir only until every menu item's state is known; the
+# full (sorted) file list is completed on a background thread for the chosen dialog.
+
+import os
+import threading
+import logging
+
+AUDIO_EXTS = frozenset((".mp3", ".wav", ".ogg", ".flac", ".opus", ".m4a", ".aac"))
+VIDEO_EXTS = frozenset((".mp4", ".avi", ".mkv", ".mov", ".wmv", ".flv", ".webm", ".m4v", ".3gp", ".ts", ".mts", ".m2ts"))
+IMAGE_EXTS = frozenset((".jpg", ".jpeg", ".png", ".bmp", ".tiff", ".tif", ".webp", ".avif", ".gif", ".ico", ".svg"))
+
+# extension -> kind, so a file is classified with one dict lookup
+_KIND_BY_EXT = dict(
+    [(ext, "audio") for ext in AUDIO_EXTS]
+    + [(ext, "video") for ext in VIDEO_EXTS]
+    + [(ext, "image") for ext in IMAGE_EXTS]
+)
+
+
+def media_kind(path):
+    """Return "audio", "video", "image" or None from the file extension."""
+    return _KIND_BY_EXT.get(os.path.splitext(path)[1].lower())
+
+
+class MediaSummary:
+    """What the menu needs to know about a set of files, built in a single pass."""
+    __slots__ = ("count", "audio", "video", "image", "mp3")
+
+    def __init__(self):
+        self.count = 0
+        self.audio = 0
+        self.video = 0
+        self.image = 0
+        self.mp3 = 0
+
+    def add(self, path, kind):
+        self.count += 1
+        if kind == "audio":
+            self.audio += 1
+            if path[-4:].lower() == ".mp3":
+                self.mp3 += 1
+        elif kind == "video":
+            self.video += 1
+        else:
+            self.image += 1
+
+    @property
+    def decided(self):
+        """True once more files cannot change any menu item's state."""
+        return self.audio > 0 and self.video > 0 and self.image > 0 and self.mp3 > 1
+
+
+def classify_paths(paths):
+    """Return (media_files, MediaSummary) for explicitly selected paths."""
+    summary = MediaSummary()
+    media_files = []
+    for path in paths:
+        kind = media_kind(path)
+        if kind is not None:
+            media_files.append(path)
+            summary.add(path, kind)
+    return media_files, summary
+
+
+def iter_media_files(folder, recursive=False):
+    """Yield (path, kind) for media files in folder, optionally walking subfolders."""
+    pending = [folder]
+    while pending:
+        current = pending.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    name = entry.name
+                    kind = _KIND_BY_EXT.get(os.path.splitext(name)[1].lower())
+                    if kind is not None:
+                        try:
+                            if entry.is_file():
+                                yield entry.path, kind
+                        except OSError:
+                            pass
+                    elif recursive:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                pending.append(entry.path)
+                        except OSError:
+                            pass
+        except OSError as e:
+            logging.error(f"xTrack failed to list folder {current}: {e}")
+
+
+class FolderListing:
+    """Media files of a folder, scanned lazily.
+
+    classify() reads the folder only until the summary is decided. complete_in_background()
+    finishes the scan on a thread; when_complete() then delivers the sorted file list.
+    """
+    def __init__(self, folder, recursive=False):
+        self.folder = folder
+        self.recursive = recursive
+        self.summary = MediaSummary()
+        self._files = []
+        self._iterator = iter_media_files(folder, recursive)
+        self._lock = threading.Lock()
+        self._done = False
+        self._cancelled = False
+        self._callbacks = []
+        self._thread = None
+
+    def classify(self):
+        """Scan until every menu item's state is known and return the MediaSummary."""
+        for path, kind in self._iterator:
+            self._files.append(path)
+            self.summary.add(path, kind)
+            if self.summary.decided:
+                return self.summary
+        self._finish()
+        return self.summary
+
+    def _finish(self):
+        self._files.sort()
+        with self._lock:
+            self._done = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self._files)
+
+    def _complete(self):
+        for path, _kind in self._iterator:
+            if self._cancelled:
+                return
+            self._files.append(path)
+        self._finish()
+
+    def complete_in_background(self):
+        """Finish the scan on a daemon thread; does nothing if it is already complete."""
+        with self._lock:
+            if self._done or self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._complete, name="xTrackFolderScan", daemon=True)
+        self._thread.start()
+
+    def when_complete(self, callback):
+        """Call callback(files) once the full sorted list is known (right away if it is)."""
+        with self._lock:
+            if not self._done:
+                self._callbacks.append(callback)
+                return
+        callback(self._files)
+
+    def cancel(self):
+        """Stop a background scan nobody is waiting for any more."""
+        self._cancelled = True
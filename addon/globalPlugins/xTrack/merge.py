@@ -7,15 +7,19 @@ import gui
 import ui
 import threading
 import tones
-import queue
 import tempfile
 from gui import guiHelper
-from .xTrackCore import get_file_duration
+from .xTrackCore import get_file_duration, ProgressReader, format_eta, run_process
+from .dialogMixins import MediaListMixin
+from .profiling import profiled
+from .engine import MergeSpec
+from .engine.commands import write_concat_list, build_merge_concat_command, build_merge_crossfade_command
 import addonHandler
 
 addonHandler.initTranslation()
 
-class MergeAudioDialog(wx.Dialog):
+class MergeAudioDialog(MediaListMixin, wx.Dialog):
+    @profiled("merge.open")
     def __init__(self, parent, selected_files, tools_path):
         super().__init__(parent, title=_("Merge MP3"))
         self.selected_files = selected_files
@@ -25,21 +29,30 @@ class MergeAudioDialog(wx.Dialog):
         self.is_paused = False
         self.total_duration = 0
         self.all_mp3 = all(os.path.splitext(f)[1].lower() == '.mp3' for f in selected_files)
-        self.stderr_queue = queue.Queue()
         self.file_durations = {}
+        self.file_duration_seconds = {}
+        self.show_cached_media()
         self.init_ui()
+        self.update_file_list()
         self.Bind(wx.EVT_CLOSE, self.on_close)
         threading.Thread(target=self.calculate_total_duration_and_load_durations, daemon=True).start()
 
     def calculate_total_duration_and_load_durations(self):
-        """Calculate total duration and load individual file durations."""
-        total = 0
-        for file in self.selected_files:
-            duration_sec, duration_str = get_file_duration(self.tools_path, file)
-            total += duration_sec
-            self.file_durations[file] = self.format_duration(duration_sec)
-        self.total_duration = total
-        wx.CallAfter(self.update_file_list)
+        """Calculate total duration and load individual file durations, updating the list as each probe finishes."""
+        self.probe_remaining_files()
+        self.total_duration = sum(self.file_duration_seconds.values())
+
+    def store_file_info(self, file, media):
+        duration_sec = media.duration if media else 0
+        self.file_duration_seconds[file] = duration_sec
+        self.file_durations[file] = self.format_duration(duration_sec)
+
+    def update_file_entry(self, file):
+        """Refresh the list entry of one file."""
+        if not self or file not in self.selected_files:
+            return
+        index = self.selected_files.index(file)
+        self.file_list.SetString(index, f"{os.path.basename(file)} ({self.file_durations[file]})")
 
     def format_duration(self, seconds):
         """Format duration in seconds to HhMMminSSsec format."""
@@ -242,6 +255,7 @@ class MergeAudioDialog(wx.Dialog):
         
         ui.message(self.status_label.GetLabel())
             
+    @profiled("merge.on_merge")
     def on_merge(self, event):
         if len(self.selected_files) < 2:
             ui.message(_("Please select at least 2 files"))
@@ -276,59 +290,34 @@ class MergeAudioDialog(wx.Dialog):
         wx.CallAfter(self.status_label.SetLabel, _("Starting merge..."))
         wx.CallAfter(self.progress_bar.SetValue, 0)
         
+        spec = MergeSpec(
+            inputs=list(self.selected_files),
+            output_path=output_file_path,
+            reencode=self.reencode_radio.GetValue(),
+            bitrate_kbps=int(quality_kbps) if quality_kbps else 192,
+            crossfade=self.crossfade_duration_ctrl.GetValue() if self.crossfade_checkbox.GetValue() else 0,
+            fade_in_next=self.fade_in_next_ctrl.GetValue(),
+        )
+        
         # Run FFmpeg in a separate thread
+        @profiled("merge.run")
         def run_merge():
             self.ffmpeg_process = None
             try:
                 # Build FFmpeg command based on cross-fade selection
-                if self.crossfade_checkbox.GetValue() and self.reencode_radio.GetValue():
+                if spec.crossfade > 0 and spec.reencode:
                     # Use complex filter for cross-fade
-                    cmd = self.build_crossfade_command(ffmpeg_path, output_file_path, quality_kbps)
+                    cmd = build_merge_crossfade_command(ffmpeg_path, spec)
                 else:
                     # Use simple concat method
-                    cmd = self.build_concat_command(ffmpeg_path, output_file_path, quality_kbps)
-                
-                self.ffmpeg_process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    creationflags=subprocess.CREATE_NO_WINDOW,
-                    cwd=self.output_path,
-                    text=True,
-                    encoding='utf-8',
-                    errors='ignore'
-                )
-                
-                # Start thread to read stderr to prevent buffer overflow
-                def read_stderr():
-                    for line in iter(self.ffmpeg_process.stderr.readline, ''):
-                        self.stderr_queue.put(line)
-                
-                stderr_thread = threading.Thread(target=read_stderr, daemon=True)
-                stderr_thread.start()
+                    cmd = self.build_concat_command(ffmpeg_path, spec)
                 
-                while True:
-                    line = self.ffmpeg_process.stdout.readline()
-                    if not line:
-                        break
-                    if "out_time_ms=" in line:
-                        try:
-                            time_ms = int(line.split("=")[1])
-                            current_time_seconds = time_ms / 1000000
-                            if self.total_duration > 0:
-                                progress = int((current_time_seconds / self.total_duration) * 100)
-                                if progress >= 0 and progress <= 100:
-                                    wx.CallAfter(self.update_progress, progress)
-                        except (ValueError, IndexError):
-                            continue
+                reader = ProgressReader(self.total_duration, lambda snapshot: wx.CallAfter(self.update_progress, snapshot))
+                self.ffmpeg_process = run_process(cmd, on_stdout_line=reader.feed, cwd=self.output_path, operation="merge")
+                result = self.ffmpeg_process.wait()
+                stderr_output = result.stderr
                 
-                self.ffmpeg_process.wait()
-                
-                # Join stderr thread
-                stderr_thread.join(timeout=5)
-                stderr_output = ''.join(list(self.stderr_queue.queue))
-                
-                if self.ffmpeg_process.returncode == 0:
+                if result.returncode == 0:
                     tones.beep(1000, 300)  # High tone for success
                     wx.CallAfter(ui.message, _("Merge successful. Output saved to: {}").format(output_file_path))
                     wx.CallAfter(self.on_success)
@@ -339,105 +328,31 @@ class MergeAudioDialog(wx.Dialog):
                 wx.CallAfter(ui.message, _("An error occurred during merge: {}").format(str(e)))
                 wx.CallAfter(self.on_failure, str(e))
             finally:
-                if self.ffmpeg_process:
-                    self.ffmpeg_process.stdout.close()
-                    self.ffmpeg_process.stderr.close()
                 self.ffmpeg_process = None
         
         threading.Thread(target=run_merge, daemon=True).start()
     
-    def build_concat_command(self, ffmpeg_path, output_file_path, quality_kbps):
+    def build_concat_command(self, ffmpeg_path, spec):
         """Build command for simple concatenation."""
         # Create a temporary text file for concat demuxer
         temp_dir = tempfile.gettempdir()
         concat_file = os.path.join(temp_dir, f"xtrack_concat_{os.getpid()}.txt")
+        write_concat_list(spec.inputs, concat_file)
+        return build_merge_concat_command(ffmpeg_path, spec, concat_file)
         
-        with open(concat_file, 'w', encoding='utf-8') as f:
-            for file in self.selected_files:
-                escaped_file = file.replace("'", "'\\''")
-                f.write(f"file '{escaped_file}'\n")
-        
-        cmd = [
-            ffmpeg_path,
-            "-f", "concat",
-            "-safe", "0",
-            "-protocol_whitelist", "file,crypto,data,pipe",
-            "-i", concat_file,
-            "-progress", "pipe:1",
-            "-nostats",
-            "-y",
-        ]
-        
-        if self.reencode_radio.GetValue():
-            cmd.extend([
-                "-c:a", "libmp3lame",
-                "-b:a", f"{quality_kbps}k",
-            ])
-        else:
-            cmd.extend([
-                "-c", "copy",
-            ])
-        
-        cmd.append(output_file_path)
-        return cmd
-    
-    def build_crossfade_command(self, ffmpeg_path, output_file_path, quality_kbps):
-        """Build command for cross-fade merging."""
-        # Build complex filter for cross-fading multiple files
-        crossfade_duration = self.crossfade_duration_ctrl.GetValue()
-        fade_in_next = self.fade_in_next_ctrl.GetValue()
-        
-        # Start with input files
-        cmd = [ffmpeg_path]
-        for file in self.selected_files:
-            cmd.extend(["-i", file])
-        
-        # Build filter complex
-        filter_complex = ""
-        
-        if len(self.selected_files) == 2:
-            # Simple case for 2 files
-            filter_complex = f"[0:a][1:a]acrossfade=d={crossfade_duration}:c1=tri:c2=tri[a]"
-        else:
-            # Chain cross-fades for multiple files
-            for i in range(len(self.selected_files) - 1):
-                if i == 0:
-                    filter_complex += f"[{i}:a][{i+1}:a]acrossfade=d={crossfade_duration}:c1=tri:c2=tri[a{i+1}];"
-                else:
-                    filter_complex += f"[a{i}][{i+1}:a]acrossfade=d={crossfade_duration}:c1=tri:c2=tri[a{i+1}];"
-            
-            # Remove last semicolon and set final output
-            filter_complex = filter_complex[:-1]
-            filter_complex = filter_complex.replace(f"a{len(self.selected_files)-1}", "a")
-        
-        # Add fade-in for next tracks if specified (except first track)
-        if fade_in_next > 0 and len(self.selected_files) > 1:
-            # We need to modify the filter complex to add fade-in for tracks 2 onwards
-            # This is a simplified approach - for exact implementation we'd need more complex filter graph
-            filter_complex += f";[a]afade=t=in:st=0:d={fade_in_next}[out]"
-            output_stream = "[out]"
-        else:
-            output_stream = "[a]"
-        
-        cmd.extend([
-            "-filter_complex", filter_complex,
-            "-map", output_stream,
-            "-progress", "pipe:1",
-            "-nostats",
-            "-y",
-            "-c:a", "libmp3lame",
-            "-b:a", f"{quality_kbps}k",
-            output_file_path
-        ])
-        
-        return cmd
-        
-    def update_progress(self, progress):
-        self.progress_bar.SetValue(progress)
-        self.status_label.SetLabel(_("Merging: {}%").format(progress))
-        # Announce progress for screen readers
-        if progress % 10 == 0:  # Announce every 10%
+    def update_progress(self, snapshot):
+        if not self:
+            return
+        progress = snapshot.percent
+        # Announce progress for screen readers every 10%
+        if progress // 10 > self.progress_bar.GetValue() // 10:
             ui.message(_("{} percent").format(progress))
+        self.progress_bar.SetValue(progress)
+        if snapshot.speed > 0 and snapshot.eta is not None:
+            self.status_label.SetLabel(_("Merging: {progress}% at {speed:.1f}x, {eta} remaining").format(
+                progress=progress, speed=snapshot.speed, eta=format_eta(snapshot.eta)))
+        else:
+            self.status_label.SetLabel(_("Merging: {}%").format(progress))
 
     def on_success(self):
         self.progress_bar.SetValue(100)
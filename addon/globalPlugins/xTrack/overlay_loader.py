@@ -1,16 +1,23 @@
 # overlay_loader.py
 # Dual-architecture binary loader for NVDA add-ons
 # Cleans up unused architecture folders after deployment.
+# A deployment manifest (version, arch, content hashes) is written after a successful
+# overlay, or for packages an earlier version already deployed, so later starts only read
+# that one file and check that tools/pyaudiowpatch is still there.
 # Copyright (C) 2026 Chai Chaimee
 # Licensed under GNU General Public License.
 
 import os
 import sys
+import json
 import shutil
+import hashlib
 import time
 
 PACKAGES_TO_DEPLOY = ["pyaudiowpatch", "numpy"]
 ARCH_FOLDERS = ["x86", "x64"]
+MANIFEST_NAME = "deployment.json"
+MANIFEST_VERSION = 1
 
 def _is_64bit_process():
     return sys.maxsize > 2**32
@@ -29,38 +36,151 @@ def _log(msg):
     import builtins
     builtins.print(f"[overlay_loader] {msg}")
 
+def _get_addon_version(base_dir):
+    """Version from the add-on's manifest.ini, without going through addonHandler."""
+    manifest_ini = os.path.join(base_dir, "..", "..", "manifest.ini")
+    try:
+        with open(manifest_ini, "r", encoding="utf-8-sig") as f:
+            for line in f:
+                key, sep, value = line.partition("=")
+                if sep and key.strip() == "version":
+                    return value.strip()
+    except OSError:
+        pass
+    return ""
+
+def _hash_tree(path):
+    """sha256 over the relative paths and contents of every file under path."""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            digest.update(os.path.relpath(file_path, path).replace(os.sep, "/").encode("utf-8") + b"\0")
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+    return digest.hexdigest()
+
+def _read_manifest(tools_dir):
+    try:
+        with open(os.path.join(tools_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict) and data.get("manifestVersion") == MANIFEST_VERSION:
+            return data
+    except (OSError, ValueError):
+        pass
+    return None
+
+def _write_manifest(tools_dir, data):
+    path = os.path.join(tools_dir, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        _log(f"WARNING: could not write {path}: {e}")
+
+def _manifest_matches(manifest, version, arch):
+    return manifest is not None and manifest.get("addonVersion") == version and manifest.get("arch") == arch
+
+def _hash_deployed(tools_dir):
+    """{pkg: hash} of the packages already in tools/, or None if any of them is missing."""
+    hashes = {}
+    for pkg in PACKAGES_TO_DEPLOY:
+        path = os.path.join(tools_dir, pkg)
+        if not os.path.isdir(path):
+            return None
+        hashes[pkg] = _hash_tree(path)
+    return hashes
+
+def _deploy_packages(base_dir, tools_dir, src_arch_dir, manifest):
+    """Copy the packages of src_arch_dir into tools/ unless identical ones are deployed. Returns {pkg: hash}."""
+    # ลบแพ็กเกจเก่าที่ root
+    for pkg in PACKAGES_TO_DEPLOY:
+        old_root = os.path.join(base_dir, pkg)
+        if os.path.exists(old_root):
+            _log(f"Removing old root: {old_root}")
+            shutil.rmtree(old_root, ignore_errors=True)
+
+    deployed_hashes = (manifest or {}).get("packages", {})
+    hashes = {}
+    copied = False
+    # คัดลอกจากสถาปัตยกรรมที่ถูกต้องไปยัง tools/
+    for pkg in PACKAGES_TO_DEPLOY:
+        src = os.path.join(src_arch_dir, pkg)
+        dst = os.path.join(tools_dir, pkg)
+        if not os.path.isdir(src):
+            _log(f"WARNING: {src} not found, skipping")
+            continue
+        hashes[pkg] = _hash_tree(src)
+        if os.path.isdir(dst) and deployed_hashes.get(pkg) == hashes[pkg]:
+            _log(f"{dst} is up to date")
+            continue
+        if os.path.exists(dst):
+            _log(f"Removing old: {dst}")
+            shutil.rmtree(dst, ignore_errors=True)
+        shutil.copytree(src, dst)
+        copied = True
+        _log(f"Copied {src} -> {dst}")
+    if copied:
+        time.sleep(0.2)
+    return hashes
+
+def _add_search_paths(tools_dir, deployed=False):
+    """Add tools/ and pyaudiowpatch to sys.path and the DLL search path. deployed skips the existence checks."""
+    # -------------------- เพิ่ม sys.path และ DLL search path เสมอ --------------------
+    if deployed or os.path.isdir(tools_dir):
+        if tools_dir not in sys.path:
+            sys.path.insert(0, tools_dir)
+            _log(f"Added {tools_dir} to sys.path")
+        _add_dll_directory(tools_dir)
+
+        pyaudiowpatch_dir = os.path.join(tools_dir, "pyaudiowpatch")
+        if deployed or os.path.isdir(pyaudiowpatch_dir):
+            if pyaudiowpatch_dir not in sys.path:
+                sys.path.insert(0, pyaudiowpatch_dir)
+                _log(f"Added {pyaudiowpatch_dir} to sys.path")
+            _add_dll_directory(pyaudiowpatch_dir)
+            _log(f"Added {pyaudiowpatch_dir} to DLL search path")
+    else:
+        _log(f"ERROR: {tools_dir} not found!")
+
 def overlayBinaries():
+    start = time.perf_counter()
     base_dir = os.path.dirname(os.path.abspath(__file__))
     tools_dir = os.path.join(base_dir, "tools")   # พิมพ์เล็ก
     arch = _get_architecture_subdir()
     src_arch_dir = os.path.join(tools_dir, arch)
+    version = _get_addon_version(base_dir)
 
     _log(f"Architecture: {arch}")
     _log(f"Tools dir: {tools_dir}")
 
+    # -------------------- ข้ามถ้าติดตั้งแล้ว (manifest ตรงกัน) --------------------
+    manifest = _read_manifest(tools_dir)
+    if _manifest_matches(manifest, version, arch) and os.path.isdir(os.path.join(tools_dir, "pyaudiowpatch")):
+        _add_search_paths(tools_dir, deployed=True)
+        _log(f"Binaries already deployed for {version} ({arch}); "
+            f"overlayBinaries completed in {(time.perf_counter() - start) * 1000:.1f} ms.")
+        return
+    if manifest is not None and manifest.get("arch") != arch and not os.path.isdir(src_arch_dir):
+        _log(f"WARNING: deployed binaries are {manifest.get('arch')} but NVDA is {arch}; reinstall the add-on.")
+
     # -------------------- คัดลอก (ถ้ามีโฟลเดอร์สถาปัตยกรรม) --------------------
+    deployed = False
     if os.path.isdir(src_arch_dir):
-        # ลบแพ็กเกจเก่าที่ root
-        for pkg in PACKAGES_TO_DEPLOY:
-            old_root = os.path.join(base_dir, pkg)
-            if os.path.exists(old_root):
-                _log(f"Removing old root: {old_root}")
-                shutil.rmtree(old_root, ignore_errors=True)
-
-        # คัดลอกจากสถาปัตยกรรมที่ถูกต้องไปยัง tools/
-        for pkg in PACKAGES_TO_DEPLOY:
-            src = os.path.join(src_arch_dir, pkg)
-            dst = os.path.join(tools_dir, pkg)
-            if os.path.isdir(src):
-                if os.path.exists(dst):
-                    _log(f"Removing old: {dst}")
-                    shutil.rmtree(dst, ignore_errors=True)
-                shutil.copytree(src, dst)
-                _log(f"Copied {src} -> {dst}")
-            else:
-                _log(f"WARNING: {src} not found, skipping")
+        hashes = _deploy_packages(base_dir, tools_dir, src_arch_dir, manifest)
+        deployed = bool(hashes)
     else:
-        _log(f"WARNING: {src_arch_dir} not found! Architecture-specific packages will NOT be deployed.")
+        if manifest is None or manifest.get("arch") == arch:
+            # Deployed before manifests existed (or by another add-on version): record what is
+            # in tools/ so the next start takes the fast path
+            hashes = _hash_deployed(tools_dir)
+            deployed = bool(hashes)
+        if not deployed:
+            _log(f"WARNING: {src_arch_dir} not found! Architecture-specific packages will NOT be deployed.")
 
     # -------------------- ลบโฟลเดอร์ x86/x64 (ถ้ายังเหลือ) --------------------
     for folder in ARCH_FOLDERS:
@@ -69,24 +189,17 @@ def overlayBinaries():
             _log(f"Removing {path}")
             shutil.rmtree(path, ignore_errors=True)
 
-    # -------------------- เพิ่ม sys.path และ DLL search path เสมอ --------------------
-    if os.path.isdir(tools_dir):
-        if tools_dir not in sys.path:
-            sys.path.insert(0, tools_dir)
-            _log(f"Added {tools_dir} to sys.path")
-        _add_dll_directory(tools_dir)
-
-        pyaudiowpatch_dir = os.path.join(tools_dir, "pyaudiowpatch")
-        if os.path.isdir(pyaudiowpatch_dir):
-            if pyaudiowpatch_dir not in sys.path:
-                sys.path.insert(0, pyaudiowpatch_dir)
-                _log(f"Added {pyaudiowpatch_dir} to sys.path")
-            _add_dll_directory(pyaudiowpatch_dir)
-            _log(f"Added {pyaudiowpatch_dir} to DLL search path")
-    else:
-        _log(f"ERROR: {tools_dir} not found!")
+    _add_search_paths(tools_dir)
 
-    time.sleep(0.2)
-    _log("overlayBinaries completed.")
+    if deployed:
+        _write_manifest(tools_dir, {
+            "manifestVersion": MANIFEST_VERSION,
+            "addonVersion": version,
+            "arch": arch,
+            "python": "{}.{}".format(*sys.version_info[:2]),
+            "packages": hashes,
+            "deployedAt": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        })
+    _log(f"overlayBinaries completed in {(time.perf_counter() - start) * 1000:.1f} ms.")
 
 overlayBinaries()
\ No newline at end of file
@@ -0,0 +1,124 @@
+# performance.py
+# "xTrack performance summary": throughput per operation type from the telemetry log,
+# and the time and size estimate the conversion dialogs offer before a batch starts.
+
+import wx
+import ui
+import threading
+from logHandler import log
+import addonHandler
+from .telemetry import summarize, is_enabled
+from .xTrackCore import format_duration_str
+from .engine import estimate_spec
+from .scheduler import get_scheduler
+
+addonHandler.initTranslation()
+
+def _operation_labels():
+    return {
+        "convert_audio": _("Convert audio"),
+        "convert_video": _("Convert video"),
+        "merge": _("Merge"),
+        "split": _("Split audio"),
+        "trim": _("Trim"),
+        "resize_image": _("Resize image"),
+        "mp3_to_mp4": _("MP3 to MP4"),
+        "loudness": _("Loudness analysis"),
+        "estimate": _("Estimate samples"),
+        "probe": _("Probe (ffprobe)"),
+        "chunk_split": _("Long file split points"),
+        "chunk_join": _("Long file chunk joins"),
+    }
+
+def _format_bytes(size):
+    if size < 1024 * 1024:
+        return _("{size:.1f} KB").format(size=size / 1024)
+    return _("{size:.1f} MB").format(size=size / (1024 * 1024))
+
+def format_operation(stats, label):
+    """One summary line for an OperationStats."""
+    parts = [_("{label}: {jobs} jobs").format(label=label, jobs=stats.jobs)]
+    if stats.failed:
+        parts.append(_("{failed} failed").format(failed=stats.failed))
+    parts.append(_("{wall} total, {mean:.2f} s average").format(
+        wall=format_duration_str(stats.wall), mean=stats.mean_wall))
+    if stats.speed > 0:
+        parts.append(_("{media} of media at {speed:.1f}x realtime").format(
+            media=format_duration_str(stats.media), speed=stats.speed))
+    if stats.throughput > 0:
+        parts.append(_("{rate} per second read").format(rate=_format_bytes(stats.throughput)))
+    if stats.mean_spawn > 0:
+        parts.append(_("{spawn:.0f} ms average process start").format(spawn=stats.mean_spawn * 1000))
+    if stats.cpu > 0 and stats.wall > 0:
+        parts.append(_("{cpu:.0f}% CPU").format(cpu=stats.cpu * 100 / stats.wall))
+    if stats.maxrss_kb:
+        parts.append(_("peak memory {memory}").format(memory=_format_bytes(stats.maxrss_kb * 1024)))
+    return ", ".join(parts)
+
+def build_summary_text():
+    """The summary as text, one line per operation type."""
+    all_stats = summarize()
+    if not all_stats:
+        if not is_enabled():
+            return _("Performance telemetry is turned off.")
+        return _("No xTrack jobs have been recorded yet.")
+    labels = _operation_labels()
+    return "\n".join(format_operation(stats, labels.get(stats.operation, stats.operation)) for stats in all_stats)
+
+def show_performance_summary():
+    """Present the summary in a browseable message (spoken if that is unavailable)."""
+    try:
+        text = build_summary_text()
+    except Exception as e:
+        log.error(f"xTrack: failed to summarize telemetry: {e}")
+        ui.message(_("Failed to read the performance log"))
+        return
+    browseable = getattr(ui, "browseableMessage", None)
+    if browseable is not None:
+        browseable(text, _("xTrack performance summary"))
+    else:
+        ui.message(text)
+
+def format_estimate(estimate):
+    """Spoken form of an engine Estimate."""
+    return _("Estimated time {time}, output size about {size} ({sampled} of {files} files sampled)").format(
+        time=format_duration_str(estimate.seconds),
+        size=_format_bytes(estimate.bytes),
+        sampled=estimate.sampled,
+        files=estimate.files,
+    )
+
+def start_estimate(spec, tools_path, button=None, status_label=None):
+    """
+    Sample-encode spec on a background thread and announce the predicted time and size.
+    button is disabled meanwhile; status_label, if given, shows the result.
+    """
+    if button:
+        button.Enable(False)
+    if status_label:
+        status_label.SetLabel(_("Estimating..."))
+    ui.message(_("Estimating..."))
+
+    def report(message):
+        # The dialog was closed while the estimate ran
+        if (button is not None and not button) or (status_label is not None and not status_label):
+            return
+        if button:
+            button.Enable(True)
+        if status_label:
+            status_label.SetLabel(message)
+        ui.message(message)
+
+    def run():
+        try:
+            estimate = estimate_spec(spec, tools_path, workers=get_scheduler().max_workers)
+            if estimate is None:
+                message = _("Could not estimate: the sample encode failed.")
+            else:
+                message = format_estimate(estimate)
+        except Exception as e:
+            log.error(f"xTrack: estimate failed: {e}")
+            message = _("Could not estimate: {}").format(str(e))
+        wx.CallAfter(report, message)
+
+    threading.Thread(target=run, name="xTrackEstimate", daemon=True).start()
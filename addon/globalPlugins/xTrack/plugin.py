@@ -0,0 +1,497 @@
+# plugin.py
+# Copyright (C) 2026 Chai Chaimee
+# Licensed under GNU General Public License. See COPYING.txt for details.
+
+import time
+_IMPORT_START = time.perf_counter()
+
+import addonHandler
+import globalPluginHandler
+import scriptHandler
+import ui
+import wx
+import os
+import gui
+import api
+import comtypes.client
+import sys
+import core
+import threading
+from logHandler import log
+
+addonHandler.initTranslation()
+
+# --- Import overlay_loader FIRST to deploy architecture-specific binaries ---
+from . import overlay_loader
+from .probeCache import get_probe_cache
+from .configStore import get_config_store
+from .mediaFiles import MediaSummary, FolderListing, classify_paths
+from .xTrackCore import start_speculative_prefetch
+
+# --- Import config (record settings are mirrored into config.conf) ---
+import config
+
+# --- Shared settings store (xTrack.json) ---
+config_store = get_config_store()
+
+# --- Check ffmpeg/ffprobe (now accessible after overlay_loader) ---
+addon_dir = os.path.dirname(__file__)
+tools_dir = os.path.join(addon_dir, "tools")   # เปลี่ยนจาก Tools → tools
+ffmpeg_path = os.path.join(tools_dir, "ffmpeg.exe")
+ffprobe_path = os.path.join(tools_dir, "ffprobe.exe")
+if not os.path.exists(ffmpeg_path) or not os.path.exists(ffprobe_path):
+    ui.message(_("ffmpeg.exe or ffprobe.exe not found in tools folder"))
+    log.error("xTrack: ffmpeg.exe or ffprobe.exe missing in tools directory.")
+
+# --- Initialize config data ---
+record_settings = config_store.get("record")
+if record_settings is None:
+    record_settings = {
+        "recordingMode": "system_and_mic",
+        "format": "mp3",
+        "mp3Quality": 192,
+        "countIn": False,
+        "openFolderAfter": False,
+        "noiseSuppression": False,
+        "noiseReductionPreset": "medium",
+        "humRemoval": False,
+        "clarityBoost": False,
+        "dynamicCompression": False,
+        "limiter": True,
+        "systemGain": 0,
+        "microphoneGain": 0,
+        "destinationFolder": os.path.expanduser("~/xTrack_recordings")
+    }
+    config_store.set("record", record_settings)
+
+# Update config.conf to match JSON for runtime access
+if "xTrack" not in config.conf:
+    config.conf["xTrack"] = {}
+if "record" not in config.conf["xTrack"]:
+    config.conf["xTrack"]["record"] = {}
+for key, value in record_settings.items():
+    config.conf["xTrack"]["record"][key] = value
+
+# --- Recorder stack (record -> recorder_backend -> pyaudiowpatch, psutil) ---
+# Loaded on first use instead of at NVDA startup; it needs the sys.path prepared by overlay_loader.
+RECORD_PREWARM_DELAY_MS = 15000  # load it in the background once NVDA has settled
+CATALOG_INDEX_DELAY_MS = 30000  # bring the media catalog up to date after startup
+_record_module = None
+_record_lock = threading.Lock()
+
+def get_record_module():
+    """Return the record module, importing it on first use."""
+    global _record_module
+    if _record_module is None:
+        with _record_lock:
+            if _record_module is None:
+                start = time.perf_counter()
+                from . import record
+                _record_module = record
+                log.info(f"xTrack: recorder stack loaded in {(time.perf_counter() - start) * 1000:.0f} ms")
+    return _record_module
+
+def _prewarm_record_module():
+    try:
+        get_record_module()
+    except Exception as e:
+        log.error(f"xTrack: failed to preload the recorder: {e}")
+
+class GlobalPlugin(globalPluginHandler.GlobalPlugin):
+    scriptCategory = "xTrack"
+
+    def __init__(self):
+        super(GlobalPlugin, self).__init__()
+        # เปลี่ยน Tools → tools
+        self.tools_path = os.path.join(os.path.dirname(__file__), "tools")
+        self.ffmpeg_exe = os.path.join(self.tools_path, "ffmpeg.exe")
+        self.ffprobe_exe = os.path.join(self.tools_path, "ffprobe.exe")
+        core.callLater(RECORD_PREWARM_DELAY_MS, self._start_record_prewarm)
+        self.catalog_indexer = None
+        core.callLater(CATALOG_INDEX_DELAY_MS, self._start_catalog_indexer)
+        log.info(f"xTrack: plugin loaded in {(time.perf_counter() - _IMPORT_START) * 1000:.0f} ms")
+
+    def _start_record_prewarm(self):
+        if _record_module is None:
+            threading.Thread(target=_prewarm_record_module, name="xTrackRecordPrewarm", daemon=True).start()
+
+    def _start_catalog_indexer(self):
+        # The catalog is off by default; sqlite3 and the engine are only imported when it is on
+        if not config_store.get("CatalogEnabled", False):
+            return
+        try:
+            from .catalog import start_catalog_indexer
+            self.catalog_indexer = start_catalog_indexer(self.tools_path)
+        except Exception as e:
+            log.error(f"xTrack: failed to start the catalog indexer: {e}")
+
+    __gestures = {
+        "kb:NVDA+X": "present_xtrack_menu",
+        "kb:control+shift+space": "toggleRecordPause",
+        "kb:control+windows+space": "stopRecord",
+    }
+
+    @scriptHandler.script(
+        gesture="kb:NVDA+x",
+        description="xTrack context menu",
+        category="xTrack",
+        canPropagate=True,
+    )
+    def script_present_xtrack_menu(self, gesture):
+        core.callLater(0, self._present_xtrack_menu_deferred)
+
+    def _present_xtrack_menu_deferred(self):
+        focused_object = api.getFocusObject()
+       
+        app_name = getattr(getattr(focused_object, "appModule", None), "appName", "").lower()
+        in_explorer = focused_object and app_name == "explorer"
+       
+        valid_files = []
+        summary = MediaSummary()
+        listing = None
+       
+        if in_explorer:
+            selected_files = self.getSelectedFiles()
+            log.info(f"Selected files: {selected_files}")
+           
+            valid_files, summary = classify_paths(selected_files)
+            log.info(f"Valid files: {valid_files}")
+            if not valid_files and len(selected_files) == 1 and os.path.isdir(selected_files[0]):
+                # Only scan as far as the menu needs; the rest is listed while the menu is open
+                listing = FolderListing(selected_files[0], recursive=bool(config_store.get("FolderScanRecursive", False)))
+                summary = listing.classify()
+                listing.when_complete(lambda files: start_speculative_prefetch(self.tools_path, files))
+                listing.complete_in_background()
+            else:
+                # Probe while the user picks a menu item, so the dialog opens filled in
+                start_speculative_prefetch(self.tools_path, valid_files)
+
+        menu = wx.Menu()
+       
+        has_audio_files = summary.audio > 0
+        has_video_files = summary.video > 0
+        has_image_files = summary.image > 0
+        has_media_files = has_audio_files or has_video_files
+        has_mp3_files = summary.mp3 > 0
+        multiple_mp3_files = summary.mp3 > 1
+        file_count = summary.count
+       
+        menu_items_config = [
+            (_("Convert Audio"), self.openConvertAudioDialog, in_explorer and file_count >= 1 and has_media_files, "multiple"),
+            (_("Convert Video"), self.openConvertVideoDialog, in_explorer and file_count >= 1 and has_video_files, "multiple"),
+            (_("Convert MP3 to MP4"), self.openConvertMP3toMP4Dialog, in_explorer and file_count >= 1 and has_mp3_files, "single"),
+            (_("Merge MP3"), self.openMergeDialog, in_explorer and multiple_mp3_files, "multiple"),
+            (_("Trim Audio/Video File"), self.openTrimDialog, in_explorer and file_count >= 1 and (has_audio_files or has_video_files), "single"),
+            (_("Split Audio"), self.openSplitAudioDialog, in_explorer and file_count == 1 and has_audio_files, "single"),
+            (_("Resize Image"), self.openResizeImageDialog, in_explorer and file_count >= 1 and has_image_files, "multiple"),
+            (_("Image Info"), self.openImageInfo, in_explorer and file_count >= 1 and has_image_files, "multiple"),
+            (_("Record Settings"), self.openRecordSettings, True, "none"),
+            (_("Performance Summary"), self.openPerformanceSummary, True, "none"),
+        ]
+
+        chosen = []
+
+        def on_files(handler, arg_type, files):
+            if arg_type == "multiple":
+                core.callLater(0, handler, files)
+            else:
+                core.callLater(0, handler, files[0] if files else None)
+
+        def on_choice(handler, arg_type):
+            chosen.append(handler)
+            if arg_type == "none":
+                core.callLater(0, handler)
+            elif listing is not None:
+                # Wait for the background scan; the callback may come from its thread
+                listing.when_complete(lambda files: wx.CallAfter(on_files, handler, arg_type, files))
+            else:
+                on_files(handler, arg_type, valid_files)
+
+        for label, handler, enabled, arg_type in menu_items_config:
+            item = menu.Append(wx.ID_ANY, label)
+            menu.Enable(item.GetId(), enabled)
+            menu.Bind(wx.EVT_MENU, lambda e, h=handler, t=arg_type: on_choice(h, t), item)
+
+        frame = wx.Frame(None, -1, "", pos=(0, 0), size=(0, 0))
+        frame.Show()
+        frame.Raise()
+
+        def cancel_unused_scan():
+            if not chosen:
+                listing.cancel()
+
+        def show_menu():
+            frame.PopupMenu(menu)
+            menu.Destroy()
+            frame.Destroy()
+            if listing is not None:
+                # After any pending menu event, so a chosen item still gets its file list
+                wx.CallAfter(cancel_unused_scan)
+
+        wx.CallAfter(show_menu)
+
+    def getSelectedFiles(self):
+        try:
+            fg = api.getForegroundObject()
+            if not (fg.appModule and fg.appModule.appName == "explorer"):
+                return []
+           
+            shell = comtypes.client.CreateObject("Shell.Application")
+           
+            target_window = None
+            for window in shell.Windows():
+                try:
+                    if window.hwnd == fg.windowHandle:
+                        target_window = window
+                        break
+                except Exception:
+                    continue
+           
+            if not target_window:
+                return []
+           
+            paths = []
+           
+            try:
+                selected_items = target_window.Document.SelectedItems()
+                if selected_items:
+                    for i in range(selected_items.Count):
+                        try:
+                            item = selected_items.Item(i)
+                            if hasattr(item, 'Path'):
+                                path = item.Path
+                                if path and os.path.exists(path):
+                                    paths.append(path)
+                        except Exception as e:
+                            log.error(f"Error getting selected item {i}: {e}")
+            except Exception as e:
+                log.warning(f"Could not get selected items: {e}")
+           
+            if not paths:
+                try:
+                    focused_item = target_window.Document.FocusedItem
+                    if focused_item and hasattr(focused_item, 'Path'):
+                        path = focused_item.Path
+                        if path and os.path.exists(path):
+                            paths.append(path)
+                except Exception as e:
+                    log.warning(f"Could not get focused item: {e}")
+           
+            if not paths:
+                try:
+                    folder = target_window.Document.Folder
+                    if hasattr(folder, 'Self'):
+                        folder_path = folder.Self.Path
+                        focused = api.getFocusObject()
+                        if hasattr(focused, 'name') and focused.name:
+                            file_name = focused.name
+                            full_path = os.path.join(folder_path, file_name)
+                            if os.path.exists(full_path):
+                                paths.append(full_path)
+                except Exception as e:
+                    log.warning(f"Could not construct path from folder: {e}")
+           
+            return paths
+           
+        except Exception as e:
+            log.error(f"Failed to retrieve selected files: {e}")
+            return []
+
+    def openTrimDialog(self, selected_file):
+        if not selected_file:
+            ui.message(_("Please select an audio or video file first"))
+            return
+        try:
+            def _open():
+                from .Trim import TrimAudioVideoDialog
+                dialog = TrimAudioVideoDialog(gui.mainFrame, [selected_file], self.tools_path)
+                dialog.ShowModal()
+                dialog.Destroy()
+            wx.CallAfter(_open)
+        except Exception as e:
+            log.error(f"Failed to open Trim dialog: {e}")
+            ui.message(_("Failed to open Trim dialog: {}").format(str(e)))
+
+    def openMergeDialog(self, selected_files):
+        if not selected_files or len(selected_files) < 2:
+            ui.message(_("Please select at least 2 MP3 files first."))
+            return
+        try:
+            def _open():
+                from .merge import MergeAudioDialog
+                dialog = MergeAudioDialog(gui.mainFrame, selected_files, self.tools_path)
+                dialog.ShowModal()
+                dialog.Destroy()
+            wx.CallAfter(_open)
+        except Exception as e:
+            log.error(f"Failed to open Merge dialog: {e}")
+            ui.message(_("Failed to open Merge dialog: {}").format(str(e)))
+
+    def openConvertAudioDialog(self, selected_files):
+        if not selected_files:
+            ui.message(_("Please select audio or video files first."))
+            return
+        try:
+            def _open():
+                from .convertAudio import ConvertAudioDialog
+                dialog = ConvertAudioDialog(gui.mainFrame, selected_files, self.tools_path)
+                dialog.ShowModal()
+                dialog.Destroy()
+            wx.CallAfter(_open)
+        except Exception as e:
+            log.error(f"Failed to open Convert Audio dialog: {e}")
+            ui.message(_("Failed to open Convert Audio dialog: {}").format(str(e)))
+
+    def openConvertVideoDialog(self, selected_files):
+        if not selected_files:
+            ui.message(_("Please select video files first."))
+            return
+        try:
+            def _open():
+                from .convertVideo import ConvertVideoDialog
+                dialog = ConvertVideoDialog(gui.mainFrame, selected_files, self.tools_path)
+                dialog.ShowModal()
+                dialog.Destroy()
+            wx.CallAfter(_open)
+        except Exception as e:
+            log.error(f"Failed to open Convert Video dialog: {e}")
+            ui.message(_("Failed to open Convert Video dialog: {}").format(str(e)))
+
+    def openResizeImageDialog(self, selected_files):
+        if not selected_files:
+            ui.message(_("Please select image files first."))
+            return
+        try:
+            def _open():
+                from .resizeImage import ResizeImageDialog
+                dialog = ResizeImageDialog(gui.mainFrame, selected_files, self.tools_path)
+                dialog.ShowModal()
+                dialog.Destroy()
+            wx.CallAfter(_open)
+        except Exception as e:
+            log.error(f"Failed to open Resize Image dialog: {e}")
+            ui.message(_("Failed to open Resize Image dialog: {}").format(str(e)))
+
+    def openConvertMP3toMP4Dialog(self, selected_file):
+        if not selected_file:
+            ui.message(_("Please select an MP3 file first."))
+            return
+        try:
+            def _open():
+                from .convertMP3toMP4 import ConvertMP3toMP4Dialog
+                dialog = ConvertMP3toMP4Dialog(gui.mainFrame, selected_file, self.tools_path)
+                dialog.ShowModal()
+                dialog.Destroy()
+            wx.CallAfter(_open)
+        except Exception as e:
+            log.error(f"Failed to open Convert MP3 to MP4 dialog: {e}")
+            ui.message(_("Failed to open Convert MP3 to MP4 dialog: {}").format(str(e)))
+
+    def openSplitAudioDialog(self, selected_file):
+        if not selected_file:
+            ui.message(_("Please select an audio file first"))
+            return
+        try:
+            def _open():
+                from .splitAudio import SplitAudioDialog
+                dialog = SplitAudioDialog(gui.mainFrame, selected_file, self.tools_path)
+                dialog.ShowModal()
+                dialog.Destroy()
+            wx.CallAfter(_open)
+        except Exception as e:
+            log.error(f"Failed to open Split Audio dialog: {e}")
+            ui.message(_("Failed to open Split Audio dialog: {}").format(str(e)))
+
+    def openImageInfo(self, selected_files):
+        if not selected_files:
+            ui.message(_("Please select image files first."))
+            return
+       
+        try:
+            from .image import show_image_info
+            show_image_info(selected_files, self.tools_path)
+        except Exception as e:
+            log.error(f"Failed to get image info: {e}")
+            ui.message(_("Failed to get image info: {}").format(str(e)))
+
+    def openRecordSettings(self):
+        try:
+            def _open():
+                record = get_record_module()
+                dlg = record.RecordSettingsDialog(gui.mainFrame)
+                result = dlg.ShowModal()
+                if result == wx.ID_OK:
+                    config_store.set("record", dlg.settings)
+                   
+                    for k, v in dlg.settings.items():
+                        config.conf["xTrack"]["record"][k] = v
+                   
+                    ui.message(_("Record settings saved"))
+                dlg.Destroy()
+            wx.CallAfter(_open)
+        except Exception as e:
+            log.error(f"Failed to open Record Settings: {e}")
+            ui.message(_("Failed to open Record Settings: {}").format(str(e)))
+
+    def openPerformanceSummary(self):
+        try:
+            from .performance import show_performance_summary
+            show_performance_summary()
+        except Exception as e:
+            log.error(f"Failed to show performance summary: {e}")
+            ui.message(_("Failed to show performance summary: {}").format(str(e)))
+
+    @scriptHandler.script(
+        description=_("xTrack performance summary"),
+        category="xTrack"
+    )
+    def script_performanceSummary(self, gesture):
+        self.openPerformanceSummary()
+
+    @scriptHandler.script(
+        description=_("Start recording; press again to pause; press again to continue"),
+        category="xTrack"
+    )
+    def script_toggleRecordPause(self, gesture):
+        record = get_record_module()
+        if not record.recorder.is_recording:
+            ui.message(_("start"))
+            record.recorder.start()
+        elif record.recorder.is_paused:
+            ui.message(_("resume"))
+            record.recorder.resume()
+        else:
+            ui.message(_("paused"))
+            record.recorder.pause()
+
+    @scriptHandler.script(
+        description=_("Stop recording"),
+        category="xTrack"
+    )
+    def script_stopRecord(self, gesture):
+        if _record_module is None:
+            # Nothing can be recording before the recorder has been loaded
+            ui.message(_("stopped No file saved"))
+            return
+        files = _record_module.recorder.stop()
+        if files:
+            ui.message(_("stopped Saved to: {}").format(os.path.dirname(files[0])))
+        else:
+            ui.message(_("stopped No file saved"))
+
+    def makeSettings(self, settingsSizer):
+        panel = wx.Panel(settingsSizer.GetContainingWindow())
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        btn = wx.Button(panel, label=_("Record Settings..."))
+        btn.Bind(wx.EVT_BUTTON, lambda e: self.openRecordSettings())
+        sizer.Add(btn, flag=wx.EXPAND | wx.ALL, border=5)
+        panel.SetSizer(sizer)
+        settingsSizer.Add(panel, flag=wx.EXPAND)
+
+    def terminate(self):
+        if _record_module is not None and _record_module.recorder.is_recording:
+            _record_module.recorder.stop()
+        if self.catalog_indexer is not None:
+            self.catalog_indexer.stop()
+        get_probe_cache().flush()
+        config_store.flush()
@@ -0,0 +1,157 @@
+# probeCache.py
+# Persistent cache of ffprobe results, keyed on (path, size, mtime).
+
+import os
+import json
+import logging
+import threading
+from collections import OrderedDict
+
+from .xTrackCore import get_config_dir
+
+CACHE_FILE_NAME = "xTrackProbeCache.json"
+CACHE_VERSION = 1
+MAX_ENTRIES = 4096
+SAVE_DELAY = 2.0
+
+
+def _file_signature(file_path):
+    """Return (size, mtime) of a file, or None if it cannot be read."""
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime
+
+
+class ProbeCache:
+    """In-memory LRU of probe results backed by a JSON file in the NVDA config directory.
+
+    Each entry holds the file size and mtime it was probed at plus a dict of fields
+    (for example "duration"). An entry is dropped as soon as the file on disk no longer
+    matches, so edited or replaced files are probed again.
+    """
+    def __init__(self, cache_path=None, max_entries=MAX_ENTRIES):
+        self.cache_path = cache_path or os.path.join(get_config_dir(), CACHE_FILE_NAME)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._loaded = False
+        self._save_timer = None
+
+    @staticmethod
+    def _key(file_path):
+        return os.path.normcase(os.path.abspath(file_path))
+
+    def _load(self):
+        # Called with self._lock held.
+        self._loaded = True
+        try:
+            if not os.path.exists(self.cache_path):
+                return
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != CACHE_VERSION:
+                return
+            for key, entry in data.get("entries", {}).items():
+                self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        except Exception as e:
+            logging.error(f"xTrack: failed to load probe cache: {e}")
+            self._entries.clear()
+
+    def get(self, file_path, field):
+        """Return the cached value of field for file_path, or None if missing or stale."""
+        signature = _file_signature(file_path)
+        if signature is None:
+            return None
+        key = self._key(file_path)
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if (entry.get("size"), entry.get("mtime")) != signature:
+                del self._entries[key]
+                self._schedule_save()
+                return None
+            self._entries.move_to_end(key)
+            return entry.get("fields", {}).get(field)
+
+    def set(self, file_path, field, value):
+        """Store value as field for file_path at its current size and mtime."""
+        signature = _file_signature(file_path)
+        if signature is None:
+            return
+        key = self._key(file_path)
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            entry = self._entries.get(key)
+            if entry is None or (entry.get("size"), entry.get("mtime")) != signature:
+                entry = {"size": signature[0], "mtime": signature[1], "fields": {}}
+                self._entries[key] = entry
+            entry["fields"][field] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._schedule_save()
+
+    def clear(self):
+        """Forget all cached results, in memory and on disk."""
+        with self._lock:
+            self._entries.clear()
+            self._loaded = True
+            self._schedule_save()
+
+    def _schedule_save(self):
+        # Coalesce bursts of updates (a whole folder being probed) into one write.
+        # Called with self._lock held.
+        if self._save_timer is not None:
+            return
+        self._save_timer = threading.Timer(SAVE_DELAY, self.flush)
+        self._save_timer.daemon = True
+        self._save_timer.start()
+
+    def flush(self):
+        """Write pending changes to disk now."""
+        # The write lock keeps concurrent flushes (the timer and NVDA exiting) off the same
+        # temporary file and from writing an older snapshot last
+        with self._write_lock:
+            with self._lock:
+                if self._save_timer is not None:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+                if not self._loaded:
+                    return
+                # Serialized under the lock: set() changes entries in place
+                text = json.dumps({"version": CACHE_VERSION, "entries": self._entries})
+            self._write(text)
+
+    def _write(self, text):
+        try:
+            cache_dir = os.path.dirname(self.cache_path)
+            if not os.path.exists(cache_dir):
+                os.makedirs(cache_dir)
+            temp_path = self.cache_path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(temp_path, self.cache_path)
+        except Exception as e:
+            logging.error(f"xTrack: failed to save probe cache: {e}")
+
+
+_probe_cache = None
+_probe_cache_lock = threading.Lock()
+
+
+def get_probe_cache():
+    """Return the add-on-wide probe cache."""
+    global _probe_cache
+    with _probe_cache_lock:
+        if _probe_cache is None:
+            _probe_cache = ProbeCache()
+        return _probe_cache
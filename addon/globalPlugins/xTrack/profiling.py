@@ -0,0 +1,138 @@
+# profiling.py
+# Opt-in diagnostics: with "ProfileOperations" set in xTrack.json, every operation entry point
+# decorated with @profiled runs under cProfile and tracemalloc, and leaves a .prof file plus
+# a text report (slowest functions, top allocations) in xTrackDiagnostics in the config dir.
+#
+# cProfile only sees the thread it was enabled on: the dialog handlers that submit jobs are
+# profiled on the UI thread, and the job functions doing the ffmpeg work (run_conversion,
+# run_resize, the merge/trim/split threads) are profiled separately on their own threads.
+# Python 3.12+ allows one active profiler, so there a call overlapping another runs unprofiled.
+
+import io
+import os
+import time
+import pstats
+import cProfile
+import logging
+import functools
+import threading
+import tracemalloc
+
+from .xTrackCore import get_config_dir
+
+DIAGNOSTICS_FOLDER_NAME = "xTrackDiagnostics"
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 25
+TRACEMALLOC_FRAMES = 5
+
+# tracemalloc is process-wide; it is stopped when the last profiled call finishes
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_calls = 0  # profiled calls started so far
+
+
+def is_enabled():
+    from .configStore import get_config_store
+    return bool(get_config_store().get("ProfileOperations", False))
+
+
+def get_diagnostics_dir():
+    return os.path.join(get_config_dir(), DIAGNOSTICS_FOLDER_NAME)
+
+
+def _start_tracing():
+    """
+    Start tracemalloc for one profiled call. Returns a token for _traced_peak, None if
+    another profiled call is running: the peak is process-wide, so it is only reset and
+    reported for a call that no other profiled call overlaps.
+    """
+    global _tracing_users, _tracing_calls
+    with _tracing_lock:
+        alone = _tracing_users == 0
+        if alone:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+            elif hasattr(tracemalloc, "reset_peak"):  # Python 3.9+
+                tracemalloc.reset_peak()
+        _tracing_users += 1
+        _tracing_calls += 1
+        return _tracing_calls if alone else None
+
+
+def _traced_peak(token):
+    """Peak traced memory since the call of token started, None if another call overlapped it."""
+    with _tracing_lock:
+        if token is None or token != _tracing_calls:
+            return None
+        return tracemalloc.get_traced_memory()[1]
+
+
+def _stop_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def write_report(name, profiler, start_snapshot, end_snapshot, wall, peak):
+    """Write <name>-<time>.prof and the matching .txt report; returns the .prof path."""
+    folder = get_diagnostics_dir()
+    os.makedirs(folder, exist_ok=True)
+    stem = os.path.join(folder, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{threading.get_ident() % 10000}")
+    profiler.dump_stats(stem + ".prof")
+
+    out = io.StringIO()
+    if peak is None:
+        out.write(f"{name}: {wall * 1000:.1f} ms wall, peak traced memory not measured (overlapping profiled calls)\n\n")
+    else:
+        out.write(f"{name}: {wall * 1000:.1f} ms wall, peak traced memory {peak / 1024:.1f} KiB\n\n")
+    out.write(f"Top {TOP_FUNCTIONS} functions by cumulative time\n")
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+    out.write(f"\nTop {TOP_ALLOCATIONS} allocation sites (growth during the call, all threads)\n")
+    for stat in end_snapshot.compare_to(start_snapshot, "lineno")[:TOP_ALLOCATIONS]:
+        out.write(f"{stat}\n")
+    with open(stem + ".txt", 'w', encoding='utf-8') as f:
+        f.write(out.getvalue())
+    return stem + ".prof"
+
+
+def profile_call(name, func, *args, **kwargs):
+    """Call func(*args, **kwargs), under cProfile and tracemalloc if profiling is enabled."""
+    if not is_enabled():
+        return func(*args, **kwargs)
+    token = _start_tracing()
+    start_snapshot = tracemalloc.take_snapshot()
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is already active (Python 3.12+ allows one per interpreter)
+        _stop_tracing()
+        return func(*args, **kwargs)
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        wall = time.perf_counter() - start
+        profiler.disable()
+        try:
+            end_snapshot = tracemalloc.take_snapshot()
+            peak = _traced_peak(token)
+            path = write_report(name, profiler, start_snapshot, end_snapshot, wall, peak)
+            logging.info(f"xTrack: profile of {name} written to {path}")
+        except Exception as e:
+            logging.error(f"xTrack: failed to write the profile of {name}: {e}")
+        finally:
+            _stop_tracing()
+
+
+def profiled(name):
+    """Decorator running the function through profile_call under name."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return profile_call(name, func, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -15,6 +15,8 @@ import sys
 import shutil
 import tempfile
 import psutil
+from .xTrackCore import get_resource_policy
+from .profiling import profiled
 
 addonHandler.initTranslation()
 
@@ -81,7 +83,8 @@ class Recorder:
                 recording_mode=backend_mode,
                 ffmpeg_path=self.ffmpeg_exe,
                 system_gain=int(conf.get("systemGain", 0)),
-                microphone_gain=int(conf.get("microphoneGain", 0))
+                microphone_gain=int(conf.get("microphoneGain", 0)),
+                resource_policy=get_resource_policy().for_realtime()
             )
             
             log.info(f"xTrack: Backend recorder initialized with mode: {backend_mode}")
@@ -180,6 +183,7 @@ class Recorder:
             log.error(f"Error checking if folder is open: {e}")
             return False
 
+    @profiled("record.start")
     def start(self):
         """Start recording."""
         if self.is_recording:
@@ -216,6 +220,7 @@ class Recorder:
             self._pause_event.clear()
             log.info("xTrack: Recording resumed")
 
+    @profiled("record.stop")
     def stop(self):
         """Stop recording and return saved files."""
         if not self.is_recording:
@@ -259,6 +264,7 @@ class Recorder:
 recorder = Recorder()
 
 class RecordSettingsDialog(wx.Dialog):
+    @profiled("record_settings.open")
     def __init__(self, parent):
         super(RecordSettingsDialog, self).__init__(parent, title=_("Record Settings"))
         
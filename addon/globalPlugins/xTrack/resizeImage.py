@@ -2,94 +2,81 @@
 
 import wx
 import os
-import subprocess
 import threading
 import ui
 import tones
 import json
-import queue
 import math
 from gui import guiHelper
-from .xTrackCore import load_config, save_config, get_file_size
+from .xTrackCore import get_file_size, probe_media, run_process
+from .dialogMixins import MediaListMixin, EstimateMixin
+from .profiling import profiled
+from .configStore import get_config_store
+from .scheduler import get_scheduler
+from .engine import ResizeImageSpec
+from .engine.commands import get_crop_rect, get_resize_dimensions, resize_image_output_path, build_resize_image_command
 import addonHandler
 import core
 
 addonHandler.initTranslation()
 
-class ResizeImageDialog(wx.Dialog):
+class ResizeImageDialog(MediaListMixin, EstimateMixin, wx.Dialog):
     """Dialog for resizing images with width and height in pixels."""
+    @profiled("resize_image.open")
     def __init__(self, parent, selected_files, tools_path):
         super().__init__(parent, title=_("Resize Image"))
         self.selected_files = selected_files
         self.tools_path = tools_path
         self.output_path = os.path.dirname(self.selected_files[0]) if self.selected_files else os.getcwd()
-        self.config_path = os.path.join(os.path.expanduser("~"), "AppData", "Roaming", "nvda", "config", "xTrack.json")
-        self.ffmpeg_process = None
         self.is_paused = False
-        self.resize_queue = queue.Queue()
+        self.job_group = f"resizeImage-{id(self)}"
         self.currently_processing = False
+        self.total_files = 0
+        self.processed_files = 0
         self.file_sizes = {}
         self.image_dimensions = {}
         self.current_file_index = 0
+        self.show_cached_media()
         self.init_ui()
         self.SetTitle(_("Resize Image: {} files").format(len(self.selected_files)))
         self.load_settings()
         self.Bind(wx.EVT_CLOSE, self.on_close)
         # Pre-load file info in background
-        threading.Thread(target=self.load_file_info, daemon=True).start()
+        threading.Thread(target=self.probe_remaining_files, daemon=True).start()
         
         # Set focus to file listbox after UI is shown
         wx.CallAfter(self.file_listbox.SetFocus)
 
-    def load_file_info(self):
-        """Load sizes and dimensions for all selected files quickly."""
-        for file_path in self.selected_files:
-            try:
-                size_bytes, size_str = get_file_size(file_path)
-                self.file_sizes[file_path] = size_str
-                width, height = self.get_image_dimensions_fast(file_path)
-                self.image_dimensions[file_path] = (width, height)
-            except Exception as e:
-                self.file_sizes[file_path] = "Error"
-                self.image_dimensions[file_path] = (0, 0)
-        
-        wx.CallAfter(self.update_file_listbox)
-        if self.selected_files:
-            wx.CallAfter(self.update_output_info)
+    def store_file_info(self, file_path, media):
+        try:
+            size_bytes, size_str = get_file_size(file_path)
+            self.file_sizes[file_path] = size_str
+            self.image_dimensions[file_path] = (media.width, media.height) if media else (0, 0)
+        except Exception as e:
+            self.file_sizes[file_path] = "Error"
+            self.image_dimensions[file_path] = (0, 0)
+
+    def update_file_entry(self, file_path):
+        """Refresh one listbox entry and the output information if it is affected."""
+        if not self or file_path not in self.selected_files:
+            return
+        index = self.selected_files.index(file_path)
+        self.file_listbox.SetString(index, self.get_file_display_name(file_path))
+        if index == self.current_file_index:
+            # Output settings follow the current image, so rebuild everything
+            self.update_output_info()
+        elif self.info_list.GetItemCount() == len(self.selected_files):
+            orig_width, orig_height = self.image_dimensions.get(file_path, (0, 0))
+            if orig_width > 0 and orig_height > 0:
+                final_width, final_height = self.calculate_final_dimensions(orig_width, orig_height)
+                self.info_list.SetItem(index, 1, f"{final_width} x {final_height}")
 
     def get_image_dimensions_fast(self, file_path):
         """Get image dimensions quickly using ffprobe."""
-        ffprobe_path = os.path.join(self.tools_path, "ffprobe.exe")
-        if not os.path.exists(ffprobe_path):
+        media = probe_media(self.tools_path, file_path)
+        if media is None:
             return 0, 0
-        
-        cmd = [
-            ffprobe_path,
-            "-v", "quiet",
-            "-select_streams", "v:0",
-            "-show_entries", "stream=width,height",
-            "-of", "csv=p=0",
-            file_path,
-        ]
-        
-        try:
-            result = subprocess.run(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                creationflags=subprocess.CREATE_NO_WINDOW,
-                encoding='utf-8',
-                errors='ignore',
-                timeout=5
-            )
-            if result.returncode == 0 and result.stdout.strip():
-                dimensions = result.stdout.strip().split(',')
-                if len(dimensions) == 2:
-                    return int(dimensions[0]), int(dimensions[1])
-        except Exception:
-            pass
-        return 0, 0
+        return media.width, media.height
 
     def init_ui(self):
         main_sizer = wx.BoxSizer(wx.VERTICAL)
@@ -256,6 +243,8 @@ class ResizeImageDialog(wx.Dialog):
         self.status_label = wx.StaticText(self, label=_("Ready"))
         main_sizer.Add(self.status_label, 0, wx.EXPAND | wx.ALL, 5)
         
+        self.add_estimate_button(main_sizer)
+        
         # Buttons
         btn_sizer = wx.StdDialogButtonSizer()
         self.start_btn = wx.Button(self, wx.ID_OK, label=_("Start"))
@@ -276,18 +265,6 @@ class ResizeImageDialog(wx.Dialog):
         self.update_info_list()
         self.update_output_filename_state()
 
-    def get_unique_file_path(self, path):
-        """Generate a unique file path by adding a number if the file already exists."""
-        if not os.path.exists(path):
-            return path
-        base, ext = os.path.splitext(path)
-        i = 1
-        while True:
-            new_path = f"{base} ({i}){ext}"
-            if not os.path.exists(new_path):
-                return new_path
-            i += 1
-
     def on_context_menu(self, event):
         """Show context menu for file listbox."""
         menu = wx.Menu()
@@ -387,45 +364,41 @@ class ResizeImageDialog(wx.Dialog):
 
     def calculate_final_dimensions(self, orig_width, orig_height):
         """Calculate final dimensions after crop and resize with aspect ratio lock."""
-        # Calculate crop dimensions if enabled
-        crop_width = orig_width
-        crop_height = orig_height
-        
+        spec = self.get_resize_spec()
+        # Invalid crop dimensions fall back to the original size
+        crop_rect = get_crop_rect(spec, orig_width, orig_height)
+        if crop_rect:
+            return get_resize_dimensions(spec, crop_rect[0], crop_rect[1])
+        return get_resize_dimensions(spec, orig_width, orig_height)
+
+    def get_resize_spec(self):
+        """Read the resize settings from the controls (UI thread only)."""
+        quality_map = {
+            _("Best (No loss)"): "best",
+            _("Very Good"): "very_good",
+            _("Good"): "good",
+            _("Normal"): "normal",
+            _("Small"): "small",
+        }
+        crop = None
         if self.crop_checkbox.GetValue():
-            crop_top = self.crop_top_spin.GetValue()
-            crop_bottom = self.crop_bottom_spin.GetValue()
-            crop_left = self.crop_left_spin.GetValue()
-            crop_right = self.crop_right_spin.GetValue()
-            
-            # Calculate crop width and height
-            crop_width = orig_width - (crop_left + crop_right)
-            crop_height = orig_height - (crop_top + crop_bottom)
-            
-            # Validate crop dimensions
-            if crop_width <= 0 or crop_height <= 0:
-                # Invalid crop dimensions, use original
-                crop_width = orig_width
-                crop_height = orig_height
-        
-        # Calculate target dimensions with aspect ratio lock
-        base_width = crop_width
-        base_height = crop_height
-        
-        target_width = self.width_spin.GetValue()
-        target_height = self.height_spin.GetValue()
-        
-        if self.aspect_lock_btn.GetValue():
-            orig_aspect = base_width / base_height
-            target_aspect = target_width / target_height
-            
-            if target_aspect > orig_aspect:
-                # Height is limiting factor
-                target_width = int(target_height * orig_aspect)
-            else:
-                # Width is limiting factor
-                target_height = int(target_width / orig_aspect)
-        
-        return target_width, target_height
+            crop = [
+                self.crop_top_spin.GetValue(),
+                self.crop_bottom_spin.GetValue(),
+                self.crop_left_spin.GetValue(),
+                self.crop_right_spin.GetValue(),
+            ]
+        return ResizeImageSpec(
+            inputs=list(self.selected_files),
+            output_dir=self.output_path,
+            width=self.width_spin.GetValue(),
+            height=self.height_spin.GetValue(),
+            keep_aspect=self.aspect_lock_btn.GetValue(),
+            crop=crop,
+            format=self.format_select.GetStringSelection().lower(),
+            quality=quality_map.get(self.quality_select.GetStringSelection(), "normal"),
+            output_name=self.output_filename_text.GetValue().strip() or None,
+        )
 
     def update_info_list(self):
         """Update the output information list."""
@@ -505,17 +478,17 @@ class ResizeImageDialog(wx.Dialog):
 
     def load_settings(self):
         """Load saved settings."""
-        config_data = load_config(self.config_path)
-        self.width_spin.SetValue(config_data.get("ResizeWidth", 1920))
-        self.height_spin.SetValue(config_data.get("ResizeHeight", 1080))
-        self.aspect_lock_btn.SetValue(config_data.get("AspectLock", True))
+        config_store = get_config_store()
+        self.width_spin.SetValue(config_store.get("ResizeWidth", 1920))
+        self.height_spin.SetValue(config_store.get("ResizeHeight", 1080))
+        self.aspect_lock_btn.SetValue(config_store.get("AspectLock", True))
         
         # Crop settings
-        self.crop_checkbox.SetValue(config_data.get("CropEnabled", False))
-        self.crop_top_spin.SetValue(config_data.get("CropTop", 0))
-        self.crop_bottom_spin.SetValue(config_data.get("CropBottom", 0))
-        self.crop_left_spin.SetValue(config_data.get("CropLeft", 0))
-        self.crop_right_spin.SetValue(config_data.get("CropRight", 0))
+        self.crop_checkbox.SetValue(config_store.get("CropEnabled", False))
+        self.crop_top_spin.SetValue(config_store.get("CropTop", 0))
+        self.crop_bottom_spin.SetValue(config_store.get("CropBottom", 0))
+        self.crop_left_spin.SetValue(config_store.get("CropLeft", 0))
+        self.crop_right_spin.SetValue(config_store.get("CropRight", 0))
         
         # Show/hide crop controls based on saved state
         if self.crop_checkbox.GetValue():
@@ -524,11 +497,11 @@ class ResizeImageDialog(wx.Dialog):
             self.crop_controls_sizer.ShowItems(show=False)
         self.crop_controls_sizer.Layout()
         
-        quality = config_data.get("ResizeQuality", _("Normal"))
+        quality = config_store.get("ResizeQuality", _("Normal"))
         if quality in [_("Best (No loss)"), _("Very Good"), _("Good"), _("Normal"), _("Small")]:
             self.quality_select.SetStringSelection(quality)
         
-        format_name = config_data.get("ResizeFormat", "JPEG")
+        format_name = config_store.get("ResizeFormat", "JPEG")
         if format_name in ["JPEG", "WEBP", "PNG", "TIFF", "BMP", "GIF"]:
             self.format_select.SetStringSelection(format_name)
         
@@ -536,7 +509,7 @@ class ResizeImageDialog(wx.Dialog):
 
     def save_settings(self):
         """Save current settings."""
-        config_data = load_config(self.config_path)
+        config_data = {}
         config_data["ResizeWidth"] = self.width_spin.GetValue()
         config_data["ResizeHeight"] = self.height_spin.GetValue()
         config_data["AspectLock"] = self.aspect_lock_btn.GetValue()
@@ -547,8 +520,14 @@ class ResizeImageDialog(wx.Dialog):
         config_data["CropRight"] = self.crop_right_spin.GetValue()
         config_data["ResizeQuality"] = self.quality_select.GetStringSelection()
         config_data["ResizeFormat"] = self.format_select.GetStringSelection()
-        save_config(self.config_path, config_data)
+        get_config_store().update(config_data)
+
+    def get_estimate_spec(self):
+        spec = self.get_resize_spec()
+        spec.output_dir = self.output_path_ctrl.GetValue()
+        return spec
 
+    @profiled("resize_image.on_start")
     def on_start(self, event):
         """Start the resize process."""
         self.save_settings()
@@ -557,207 +536,99 @@ class ResizeImageDialog(wx.Dialog):
         if not os.path.exists(self.output_path):
             os.makedirs(self.output_path)
         
+        ffmpeg_path = os.path.join(self.tools_path, "ffmpeg.exe")
+        if not os.path.exists(ffmpeg_path):
+            ui.message(_("ffmpeg.exe not found"))
+            return
+        
         # Set focus to output information list
         self.info_list.SetFocus()
         
-        # Add all files to queue
-        for file_path in self.selected_files:
-            self.resize_queue.put(file_path)
-        
-        # Start processing
         self.currently_processing = True
         self.total_files = len(self.selected_files)
         self.processed_files = 0
-        self.process_next_file()
-
-    def process_next_file(self):
-        """Process next file in the queue."""
-        if self.resize_queue.empty():
-            self.currently_processing = False
-            wx.CallAfter(self.on_all_processing_complete)
-            return
-            
-        file_path = self.resize_queue.get()
-        self.current_file_index = self.selected_files.index(file_path)
+        self.start_btn.Enable(False)
+        self.cancel_btn.Enable(False)
+        self.current_progress.SetValue(0)
+        
+        # Build all commands up front and submit them to the shared scheduler,
+        # which resizes several images in parallel
+        scheduler = get_scheduler()
+        spec = self.get_resize_spec()
+        reserved_outputs = set()
+        for file_path in list(self.selected_files):
+            task = self.prepare_resize(file_path, ffmpeg_path, spec, reserved_outputs)
+            if task is None:
+                # Skip files with invalid dimensions
+                self.processed_files += 1
+                continue
+            scheduler.submit(
+                lambda job, file_path=file_path, task=task: self.run_resize(job, file_path, task),
+                group=self.job_group,
+                label=os.path.basename(file_path),
+                on_done=lambda job, file_path=file_path: wx.CallAfter(self.on_job_done, job, file_path),
+            )
         
+        self.update_progress()
+        if self.processed_files >= self.total_files:
+            self.currently_processing = False
+            self.on_all_processing_complete()
+
+    def prepare_resize(self, file_path, ffmpeg_path, spec, reserved_outputs):
+        """Build the ffmpeg command for one image.
+        Returns (cmd, output_path, target_width, target_height), or None to skip the file."""
         # Get original dimensions
         orig_width, orig_height = self.image_dimensions.get(file_path, (0, 0))
         if orig_width <= 0 or orig_height <= 0:
-            # Skip files with invalid dimensions
-            self.processed_files += 1
-            wx.CallAfter(self.update_progress)
-            self.process_next_file()
-            return
+            return None
         
-        # Calculate crop dimensions if enabled
-        crop_width = orig_width
-        crop_height = orig_height
-        crop_top = 0
-        crop_left = 0
+        if spec.crop and get_crop_rect(spec, orig_width, orig_height) is None:
+            ui.message(_("Warning: Invalid crop dimensions for {}. Crop disabled for this image.").format(os.path.basename(file_path)))
         
-        if self.crop_checkbox.GetValue():
-            crop_top = self.crop_top_spin.GetValue()
-            crop_bottom = self.crop_bottom_spin.GetValue()
-            crop_left = self.crop_left_spin.GetValue()
-            crop_right = self.crop_right_spin.GetValue()
-            
-            # Calculate crop width and height
-            crop_width = orig_width - (crop_left + crop_right)
-            crop_height = orig_height - (crop_top + crop_bottom)
-            
-            # Validate crop dimensions
-            if crop_width <= 0 or crop_height <= 0:
-                # Invalid crop dimensions, skip crop
-                ui.message(_("Warning: Invalid crop dimensions for {}. Crop disabled for this image.").format(os.path.basename(file_path)))
-                crop_width = orig_width
-                crop_height = orig_height
-                crop_top = 0
-                crop_left = 0
-        
-        # Calculate target dimensions with aspect ratio lock
-        # We need to use the cropped dimensions as base if crop is enabled
-        base_width = crop_width
-        base_height = crop_height
-        
-        target_width = self.width_spin.GetValue()
-        target_height = self.height_spin.GetValue()
-        
-        if self.aspect_lock_btn.GetValue():
-            orig_aspect = base_width / base_height
-            target_aspect = target_width / target_height
-            
-            if target_aspect > orig_aspect:
-                # Height is limiting factor
-                target_width = int(target_height * orig_aspect)
-            else:
-                # Width is limiting factor
-                target_height = int(target_width / orig_aspect)
+        output_path = resize_image_output_path(spec, file_path, reserved_outputs)
+        reserved_outputs.add(output_path)
+        cmd, target_width, target_height = build_resize_image_command(
+            ffmpeg_path, spec, file_path, output_path, orig_width, orig_height)
+        return cmd, output_path, target_width, target_height
+
+    @profiled("resize_image.job")
+    def run_resize(self, job, file_path, task):
+        """Resize one image. Runs on a scheduler worker thread."""
+        cmd, output_path, target_width, target_height = task
+        wx.CallAfter(self.update_processing_status, file_path, _("Processing..."))
+        wx.CallAfter(self.status_label.SetLabel, _("Processing: {}").format(os.path.basename(file_path)))
         
-        # Prepare output file
-        format_name = self.format_select.GetStringSelection().lower()
-        ext = "jpg" if format_name == "jpeg" else format_name
+        process = run_process(cmd, operation="resize_image")
+        job.process = process
+        result = process.wait()
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr)
         
-        if len(self.selected_files) > 1:
-            base_name = os.path.splitext(os.path.basename(file_path))[0]
-            output_filename = f"{base_name}_resized.{ext}"
-        else:
-            custom_name = self.output_filename_text.GetValue().strip()
-            if custom_name:
-                output_filename = f"{custom_name}.{ext}"
+        # Get actual output file size
+        try:
+            output_size_bytes = os.path.getsize(output_path)
+            if output_size_bytes < 1024:
+                output_size_str = f"{output_size_bytes} B"
+            elif output_size_bytes < 1024 * 1024:
+                output_size_str = f"{output_size_bytes/1024:.1f} KB"
             else:
-                base_name = os.path.splitext(os.path.basename(file_path))[0]
-                output_filename = f"{base_name}_resized.{ext}"
-        
-        output_path = self.get_unique_file_path(os.path.join(self.output_path, output_filename))
-        
-        ffmpeg_path = os.path.join(self.tools_path, "ffmpeg.exe")
-        if not os.path.exists(ffmpeg_path):
-            ui.message(_("ffmpeg.exe not found"))
+                output_size_str = f"{output_size_bytes/(1024*1024):.1f} MB"
+        except:
+            output_size_str = _("Unknown")
+        return output_path, output_size_str, target_width, target_height
+
+    def on_job_done(self, job, file_path):
+        """Handle a finished resize job on the UI thread."""
+        if not self or not self.currently_processing:
             return
-        
-        # Build ffmpeg command
-        cmd = [
-            ffmpeg_path,
-            "-i", file_path,
-        ]
-        
-        # Add crop filter if enabled
-        filter_chain = []
-        
-        if self.crop_checkbox.GetValue() and (crop_width != orig_width or crop_height != orig_height):
-            crop_filter = f"crop={crop_width}:{crop_height}:{crop_left}:{crop_top}"
-            filter_chain.append(crop_filter)
-        
-        # Always add scale filter
-        scale_filter = f"scale={target_width}:{target_height}"
-        filter_chain.append(scale_filter)
-        
-        # Combine filters
-        if filter_chain:
-            cmd.extend(["-vf", ",".join(filter_chain)])
-        
-        cmd.append("-y")
-        
-        # Add format-specific options
-        quality_selection = self.quality_select.GetStringSelection()
-        
-        # Quality mapping for different formats
-        quality_map = {
-            _("Best (No loss)"): {"jpeg": 2, "webp": 100, "png": 0, "tiff": 0, "bmp": 0, "gif": 0},
-            _("Very Good"): {"jpeg": 5, "webp": 90, "png": 2, "tiff": 2, "bmp": 0, "gif": 0},
-            _("Good"): {"jpeg": 10, "webp": 80, "png": 4, "tiff": 4, "bmp": 0, "gif": 0},
-            _("Normal"): {"jpeg": 15, "webp": 70, "png": 6, "tiff": 6, "bmp": 0, "gif": 0},
-            _("Small"): {"jpeg": 20, "webp": 60, "png": 9, "tiff": 9, "bmp": 0, "gif": 0},
-        }
-        
-        quality_value = quality_map.get(quality_selection, quality_map[_("Normal")]).get(format_name, 0)
-        
-        if format_name == "jpeg" and quality_value is not None:
-            cmd.extend(["-q:v", str(quality_value)])
-        elif format_name == "webp" and quality_value is not None:
-            cmd.extend(["-quality", str(quality_value)])
-        elif format_name == "png" and quality_value is not None:
-            cmd.extend(["-compression_level", str(quality_value)])
-        elif format_name == "tiff":
-            cmd.extend(["-compression", "lzw"])
-        
-        cmd.append(output_path)
-        
-        wx.CallAfter(self.start_btn.Enable, False)
-        wx.CallAfter(self.cancel_btn.Enable, False)
-        wx.CallAfter(self.status_label.SetLabel, 
-                    _("Processing: {}").format(os.path.basename(file_path)))
-        wx.CallAfter(self.current_progress.SetValue, 0)
-        
-        # Update status in info list
-        wx.CallAfter(self.update_processing_status, file_path, _("Processing..."))
-        
-        def run_resize():
-            self.ffmpeg_process = None
-            try:
-                self.ffmpeg_process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    creationflags=subprocess.CREATE_NO_WINDOW,
-                    text=True,
-                    encoding='utf-8',
-                    errors='ignore'
-                )
-                
-                # Monitor progress
-                self.ffmpeg_process.wait()
-                
-                if self.ffmpeg_process.returncode == 0:
-                    # Get actual output file size
-                    try:
-                        output_size_bytes = os.path.getsize(output_path)
-                        if output_size_bytes < 1024:
-                            output_size_str = f"{output_size_bytes} B"
-                        elif output_size_bytes < 1024 * 1024:
-                            output_size_str = f"{output_size_bytes/1024:.1f} KB"
-                        else:
-                            output_size_str = f"{output_size_bytes/(1024*1024):.1f} MB"
-                    except:
-                        output_size_str = _("Unknown")
-                    
-                    wx.CallAfter(self.on_file_success, file_path, output_path, output_size_str, target_width, target_height)
-                else:
-                    stderr_output = self.ffmpeg_process.stderr.read()
-                    wx.CallAfter(self.on_file_failure, file_path, stderr_output)
-                    
-            except Exception as e:
-                wx.CallAfter(self.on_file_failure, file_path, str(e))
-            finally:
-                if self.ffmpeg_process:
-                    self.ffmpeg_process.stdout.close()
-                    self.ffmpeg_process.stderr.close()
-                self.ffmpeg_process = None
-                # Process next file
-                if self.currently_processing:
-                    self.process_next_file()
-        
-        threading.Thread(target=run_resize, daemon=True).start()
+        if job.state == job.DONE:
+            output_path, output_size_str, new_width, new_height = job.result
+            self.on_file_success(file_path, output_path, output_size_str, new_width, new_height)
+        else:
+            self.on_file_failure(file_path, str(job.error))
+        if self.processed_files >= self.total_files:
+            self.currently_processing = False
+            self.on_all_processing_complete()
 
     def update_processing_status(self, file_path, status):
         """Update processing status in info list."""
@@ -824,34 +695,17 @@ class ResizeImageDialog(wx.Dialog):
         self.info_list.SetFocus()
         ui.message(_("Image processing complete! Check the output information list for results."))
 
+    def stop_processing(self):
+        """Cancel queued resize jobs and terminate the running ones."""
+        self.currently_processing = False
+        get_scheduler().cancel_group(self.job_group)
+
     def on_cancel(self, event):
         """Handle cancel button."""
-        if self.ffmpeg_process and self.ffmpeg_process.poll() is None:
-            try:
-                self.ffmpeg_process.terminate()
-            except Exception:
-                pass
-        # Clear queue
-        while not self.resize_queue.empty():
-            try:
-                self.resize_queue.get_nowait()
-            except queue.Empty:
-                break
-        self.currently_processing = False
+        self.stop_processing()
         self.EndModal(wx.ID_CANCEL)
 
     def on_close(self, event):
         """Handle dialog close."""
-        if self.ffmpeg_process and self.ffmpeg_process.poll() is None:
-            try:
-                self.ffmpeg_process.terminate()
-            except Exception:
-                pass
-        # Clear queue
-        while not self.resize_queue.empty():
-            try:
-                self.resize_queue.get_nowait()
-            except queue.Empty:
-                break
-        self.currently_processing = False
-        self.EndModal(wx.ID_CANCEL)
\ No newline at end of file
+        self.stop_processing()
+        self.EndModal(wx.ID_CANCEL)
@@ -0,0 +1,233 @@
+# scheduler.py
+# Add-on-wide job scheduler for ffmpeg work with bounded parallelism.
+
+import os
+import logging
+import threading
+from collections import OrderedDict, deque
+
+from .configStore import get_config_store
+
+
+def get_default_worker_count():
+    """Default number of parallel jobs: all cores but one, at least one."""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def get_configured_worker_count():
+    """Read the worker count from xTrack.json ("SchedulerWorkers", 0 = automatic)."""
+    try:
+        workers = int(get_config_store().get("SchedulerWorkers", 0))
+    except (TypeError, ValueError):
+        workers = 0
+    return workers if workers > 0 else get_default_worker_count()
+
+
+class Job:
+    """A unit of work submitted to the scheduler.
+
+    The job function is called as func(job) on a worker thread. It should report
+    progress with job.set_progress(0-100), register its ffmpeg process in job.process
+    so that cancel() can terminate it, and check job.cancelled between steps.
+    """
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(self, func, group, label="", on_progress=None, on_done=None):
+        self.func = func
+        self.group = group
+        self.label = label
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.state = Job.PENDING
+        self.progress = 0
+        self.result = None
+        self.error = None
+        self.process = None
+        self.snapshot = None  # latest ProgressSnapshot of the job's ffmpeg process, if any
+        self.scheduler = None  # the JobScheduler the job was submitted to
+        self._cancel_event = threading.Event()
+        self._finished_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    @property
+    def finished(self):
+        return self._finished_event.is_set()
+
+    def set_progress(self, progress):
+        """Record job progress in percent and notify the submitter."""
+        self.progress = max(0, min(100, progress))
+        if self.on_progress:
+            try:
+                self.on_progress(self, self.progress)
+            except Exception as e:
+                logging.error(f"xTrack scheduler: progress callback failed for {self.label}: {e}")
+
+    def cancel(self):
+        """Request cancellation and terminate the running process, if any."""
+        self._cancel_event.set()
+        process = self.process
+        if process is not None and process.poll() is None:
+            try:
+                process.terminate()
+            except Exception:
+                pass
+
+    def wait(self, timeout=None):
+        """Block until the job has finished. Returns False on timeout."""
+        return self._finished_event.wait(timeout)
+
+
+class JobScheduler:
+    """Runs jobs on a bounded pool of worker threads.
+
+    Jobs are queued per group (usually one group per dialog) and workers take
+    jobs from the groups in round-robin order, so two batches running at the
+    same time share the workers fairly instead of one waiting for the other.
+    """
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or get_default_worker_count()
+        self._lock = threading.Lock()
+        self._queues = OrderedDict()
+        self._running = set()
+        self._workers = 0
+
+    def submit(self, func, group=None, label="", on_progress=None, on_done=None):
+        """Queue func(job) for execution and return its Job."""
+        job = Job(func, group, label=label, on_progress=on_progress, on_done=on_done)
+        job.scheduler = self
+        with self._lock:
+            self._queues.setdefault(group, deque()).append(job)
+            self._spawn_workers()
+        return job
+
+    def run_pending(self, job):
+        """
+        Run job on the calling thread if no worker has taken it yet and return True.
+        A job that waits for jobs it submitted itself (the chunks of a long file) runs
+        them this way instead of holding its worker while none is free for them.
+        """
+        with self._lock:
+            queue = self._queues.get(job.group)
+            if not queue or job not in queue:
+                return False
+            queue.remove(job)
+            if not queue:
+                del self._queues[job.group]
+            job.state = Job.RUNNING
+            self._running.add(job)
+        self._run(job)
+        with self._lock:
+            self._running.discard(job)
+        return True
+
+    def set_max_workers(self, max_workers):
+        """Change the worker limit; takes effect as workers pick up new jobs."""
+        with self._lock:
+            self.max_workers = max(1, int(max_workers))
+            self._spawn_workers()
+
+    def cancel_group(self, group):
+        """Cancel all pending and running jobs of a group."""
+        with self._lock:
+            pending = list(self._queues.pop(group, ()))
+            running = [job for job in self._running if job.group == group]
+        for job in pending:
+            job.cancel()
+            self._finish(job, Job.CANCELLED)
+        for job in running:
+            job.cancel()
+
+    def pending_count(self, group=None):
+        with self._lock:
+            if group is not None:
+                return len(self._queues.get(group, ()))
+            return sum(len(queue) for queue in self._queues.values())
+
+    def running_jobs(self, group=None):
+        with self._lock:
+            return [job for job in self._running if group is None or job.group == group]
+
+    def _spawn_workers(self):
+        # Called with self._lock held.
+        pending = sum(len(queue) for queue in self._queues.values())
+        while self._workers < self.max_workers and pending > 0:
+            self._workers += 1
+            pending -= 1
+            threading.Thread(target=self._worker, name="xTrackWorker", daemon=True).start()
+
+    def _next_job(self):
+        # Round-robin over groups: take the head of the first group and move it to the back.
+        # Called with self._lock held.
+        while self._queues:
+            group, queue = next(iter(self._queues.items()))
+            if not queue:
+                del self._queues[group]
+                continue
+            job = queue.popleft()
+            if queue:
+                self._queues.move_to_end(group)
+            else:
+                del self._queues[group]
+            return job
+        return None
+
+    def _worker(self):
+        while True:
+            with self._lock:
+                if self._workers > self.max_workers:
+                    self._workers -= 1
+                    return
+                job = self._next_job()
+                if job is None:
+                    self._workers -= 1
+                    return
+                job.state = Job.RUNNING
+                self._running.add(job)
+            self._run(job)
+            with self._lock:
+                self._running.discard(job)
+
+    def _run(self, job):
+        if job.cancelled:
+            self._finish(job, Job.CANCELLED)
+            return
+        try:
+            job.result = job.func(job)
+        except Exception as e:
+            job.error = e
+            state = Job.CANCELLED if job.cancelled else Job.FAILED
+            if state == Job.FAILED:
+                logging.error(f"xTrack scheduler: job {job.label} failed: {e}")
+            self._finish(job, state)
+            return
+        self._finish(job, Job.CANCELLED if job.cancelled else Job.DONE)
+
+    def _finish(self, job, state):
+        job.state = state
+        job.process = None
+        job._finished_event.set()
+        if job.on_done:
+            try:
+                job.on_done(job)
+            except Exception as e:
+                logging.error(f"xTrack scheduler: completion callback failed for {job.label}: {e}")
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Return the add-on-wide scheduler shared by all dialogs."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = JobScheduler(get_configured_worker_count())
+        return _scheduler
@@ -2,20 +2,25 @@
 
 import wx
 import os
-import subprocess
 import re
 import threading
 import tones
 from gui import guiHelper
 import ui
-import json
 from logHandler import log
 import addonHandler
+from .xTrackCore import get_file_duration, run_process
+from .dialogMixins import load_file_info
+from .profiling import profiled
+from .configStore import get_config_store
+from .engine import SplitSpec
+from .engine.commands import build_split_commands
 
 addonHandler.initTranslation()
 
 class SplitAudioDialog(wx.Dialog):
     """Dialog for splitting audio files into multiple tracks."""
+    @profiled("split.open")
     def __init__(self, parent, selected_file, tools_path):
         super().__init__(parent, title=_("Split Audio File"))
         if not selected_file:
@@ -25,36 +30,13 @@ class SplitAudioDialog(wx.Dialog):
         self.file_duration_seconds = 0
         self.file_duration_str = ""
         self.output_path = os.path.dirname(self.selected_file)
-        self.config_path = os.path.join(os.path.expanduser("~"), "AppData", "Roaming", "nvda", "config", "xTrack.json")
         self.track_controls = []  # List to store track end time controls
         self.init_ui()
         self.SetTitle(_("Split Audio: {}").format(os.path.basename(self.selected_file)))
         
-        threading.Thread(target=self.get_file_duration, daemon=True).start()
+        load_file_info(self.selected_file, self.get_file_duration)
         self.Bind(wx.EVT_CLOSE, self.on_close)
         
-    def load_config(self):
-        try:
-            if os.path.exists(self.config_path):
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return {}
-        except Exception as e:
-            log.error(f"Failed to load configuration: {str(e)}")
-            ui.message(_("Failed to load configuration: {}").format(str(e)))
-            return {}
-            
-    def save_config(self, config_data):
-        try:
-            config_dir = os.path.dirname(self.config_path)
-            if not os.path.exists(config_dir):
-                os.makedirs(config_dir)
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump(config_data, f, indent=4)
-        except Exception as e:
-            log.error(f"Failed to save configuration: {str(e)}")
-            ui.message(_("Failed to save configuration: {}").format(str(e)))
-            
     def init_ui(self):
         main_sizer = wx.BoxSizer(wx.VERTICAL)
         
@@ -118,8 +100,7 @@ class SplitAudioDialog(wx.Dialog):
         self.Fit()
         
         # Load saved configuration
-        config_data = self.load_config()
-        last_split_point = config_data.get("SplitLastSplitPoint", 2)
+        last_split_point = get_config_store().get("SplitLastSplitPoint", 2)
         self.split_point_ctrl.SetValue(last_split_point)
         
         # Adjust dialog size
@@ -186,36 +167,17 @@ class SplitAudioDialog(wx.Dialog):
         self.update_track_controls()
     
     def get_file_duration(self):
-        """Get file duration using ffprobe."""
+        """Get file duration using ffprobe (cached)."""
         ffprobe_path = os.path.join(self.tools_path, "ffprobe.exe")
         if not os.path.exists(ffprobe_path):
             wx.CallAfter(wx.MessageBox, _("ffprobe.exe not found"), _("Error"), wx.OK | wx.ICON_ERROR)
             return
-            
-        cmd = [
-            ffprobe_path,
-            "-v", "error",
-            "-show_entries", "format=duration",
-            "-of", "default=noprint_wrappers=1:nokey=1",
-            self.selected_file,
-        ]
         
         try:
-            result = subprocess.run(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                creationflags=subprocess.CREATE_NO_WINDOW,
-                encoding='utf-8',
-                errors='ignore'
-            )
-            if result.returncode == 0 and result.stdout.strip():
-                self.file_duration_seconds = float(result.stdout.strip())
-                hours = int(self.file_duration_seconds // 3600)
-                minutes = int((self.file_duration_seconds % 3600) // 60)
-                seconds = int(self.file_duration_seconds % 60)
-                self.file_duration_str = f"{hours}:{minutes:02d}:{seconds:02d}" if hours > 0 else f"{minutes}:{seconds:02d}"
+            duration_sec, duration_str = get_file_duration(self.tools_path, self.selected_file)
+            if duration_sec > 0:
+                self.file_duration_seconds = duration_sec
+                self.file_duration_str = duration_str
                 wx.CallAfter(self.duration_label.SetLabel, _("Duration: {}").format(self.file_duration_str))
                 wx.CallAfter(self.update_track_controls)
         except Exception as e:
@@ -351,6 +313,7 @@ class SplitAudioDialog(wx.Dialog):
         # Start split in background thread
         threading.Thread(target=self.perform_split, args=(end_times,), daemon=True).start()
     
+    @profiled("split.perform_split")
     def perform_split(self, end_times):
         """Perform the actual split operation using ffmpeg."""
         ffmpeg_path = os.path.join(self.tools_path, "ffmpeg.exe")
@@ -359,55 +322,15 @@ class SplitAudioDialog(wx.Dialog):
             wx.CallAfter(self.reset_buttons)
             return
         
-        # Get file extension
-        file_ext = os.path.splitext(self.selected_file)[1].lower()
-        base_name = os.path.splitext(os.path.basename(self.selected_file))[0]
+        spec = SplitSpec(self.selected_file, end_times, self.output_path)
+        tracks = build_split_commands(ffmpeg_path, spec)
         
         success_count = 0
-        total_tracks = len(end_times)
+        total_tracks = len(tracks)
         
-        for i in range(total_tracks):
-            track_num = i + 1
-            
-            # Calculate start and end times for this track
-            start_time = end_times[i-1] if i > 0 else 0
-            end_time = end_times[i]
-            
-            # Skip if start and end are the same
-            if start_time >= end_time:
-                continue
-            
-            # Generate output filename
-            output_filename = f"{base_name}_track{track_num:02d}{file_ext}"
-            output_path = os.path.join(self.output_path, output_filename)
-            
-            # Make filename unique if needed
-            counter = 1
-            while os.path.exists(output_path):
-                output_filename = f"{base_name}_track{track_num:02d}_{counter}{file_ext}"
-                output_path = os.path.join(self.output_path, output_filename)
-                counter += 1
-            
-            # Build ffmpeg command - copy codec to preserve original quality
-            cmd = [
-                ffmpeg_path,
-                "-y",
-                "-i", self.selected_file,
-                "-ss", str(start_time),
-                "-to", str(end_time),
-                "-c", "copy",  # Copy codec to preserve original quality
-                output_path,
-            ]
-            
+        for i, (track_num, cmd, output_path) in enumerate(tracks):
             try:
-                result = subprocess.run(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    creationflags=subprocess.CREATE_NO_WINDOW,
-                    encoding='utf-8',
-                    errors='ignore'
-                )
+                result = run_process(cmd, operation="split").wait()
                 
                 if result.returncode == 0:
                     success_count += 1
@@ -435,10 +358,10 @@ class SplitAudioDialog(wx.Dialog):
             wx.CallAfter(ui.message, _("Audio file split into {} tracks").format(success_count))
             
             # Save configuration
-            config_data = self.load_config()
-            config_data["SplitLastSplitPoint"] = self.split_point_ctrl.GetValue()
-            config_data["SplitLastFile"] = self.selected_file
-            self.save_config(config_data)
+            get_config_store().update({
+                "SplitLastSplitPoint": self.split_point_ctrl.GetValue(),
+                "SplitLastFile": self.selected_file,
+            })
             
             wx.CallAfter(self.EndModal, wx.ID_OK)
         else:
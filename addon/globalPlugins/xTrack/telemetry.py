@@ -0,0 +1,237 @@
+# telemetry.py
+# Per-job performance log: one JSON line per ffmpeg/ffprobe run in xTrackTelemetry.jsonl
+# in the NVDA config directory, rotated by size, plus a per-operation summary of it.
+
+import os
+import re
+import json
+import time
+import logging
+import threading
+
+from .xTrackCore import get_config_dir, ffmpeg_output_indices
+
+TELEMETRY_FILE_NAME = "xTrackTelemetry.jsonl"
+MAX_LOG_BYTES = 1024 * 1024
+BACKUP_COUNT = 2  # xTrackTelemetry.jsonl.1, .2
+
+# Lines printed by ffmpeg's -benchmark option at exit
+_BENCH_TIMES = re.compile(r"^bench: utime=([\d.]+)s stime=([\d.]+)s rtime=([\d.]+)s")
+_BENCH_RSS = re.compile(r"^bench: maxrss=(\d+)\s*([kK]i?B)")
+# Position in ffmpeg's stats line ("size=... time=00:01:02.50 bitrate=...")
+_STATS_TIME = re.compile(r"time=(\d+):(\d+):(\d+(?:\.\d+)?)")
+
+
+def is_enabled():
+    """Telemetry is on unless "TelemetryEnabled" is false in xTrack.json."""
+    from .configStore import get_config_store
+    return bool(get_config_store().get("TelemetryEnabled", True))
+
+
+def wants_benchmark(cmd):
+    """True if cmd runs ffmpeg itself, which accepts -benchmark."""
+    name = os.path.basename(cmd[0]).lower() if cmd else ""
+    return name in ("ffmpeg", "ffmpeg.exe")
+
+
+def parse_benchmark(stderr):
+    """
+    Split ffmpeg -benchmark output out of stderr.
+    Returns ({"utime", "stime", "rtime", "maxrss_kb"} as found, stderr without the bench lines).
+    """
+    bench = {}
+    kept = []
+    for line in stderr.splitlines(True):
+        match = _BENCH_TIMES.match(line)
+        if match:
+            bench["utime"], bench["stime"], bench["rtime"] = (float(value) for value in match.groups())
+            continue
+        match = _BENCH_RSS.match(line)
+        if match:
+            bench["maxrss_kb"] = int(match.group(1))
+            continue
+        kept.append(line)
+    return bench, "".join(kept)
+
+
+def parse_stats_time(stderr):
+    """Seconds in the last "time=HH:MM:SS.xx" stats field of stderr, or 0.0 (for runs without -progress)."""
+    matches = _STATS_TIME.findall(stderr)
+    if not matches:
+        return 0.0
+    hours, minutes, seconds = matches[-1]
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def input_bytes(cmd):
+    """Total size of the files passed with -i (lavfi sources and missing files count as 0)."""
+    return sum(_file_size(cmd[i + 1]) for i, arg in enumerate(cmd[:-1]) if arg == "-i")
+
+
+def output_bytes(cmd):
+    """Total size of the output files of an ffmpeg command (a multi-output run writes several)."""
+    return sum(_file_size(cmd[i]) for i in ffmpeg_output_indices(cmd))
+
+
+class TelemetryLog:
+    """Append-only JSONL file, rotated to .1, .2 ... once it exceeds max_bytes."""
+
+    def __init__(self, log_path=None, max_bytes=MAX_LOG_BYTES, backup_count=BACKUP_COUNT):
+        self.log_path = log_path or os.path.join(get_config_dir(), TELEMETRY_FILE_NAME)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._lock = threading.Lock()
+
+    def _rotate(self):
+        # Called with self._lock held.
+        for index in range(self.backup_count, 0, -1):
+            source = self.log_path if index == 1 else f"{self.log_path}.{index - 1}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.log_path}.{index}")
+
+    def append(self, entry):
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            try:
+                if _file_size(self.log_path) + len(line) > self.max_bytes:
+                    self._rotate()
+                with open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.write(line)
+            except OSError as e:
+                logging.error(f"xTrack: failed to write telemetry: {e}")
+
+    def entries(self):
+        """All logged entries, oldest first."""
+        paths = [f"{self.log_path}.{index}" for index in range(self.backup_count, 0, -1)] + [self.log_path]
+        result = []
+        with self._lock:
+            for path in paths:
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        for line in f:
+                            try:
+                                result.append(json.loads(line))
+                            except ValueError:
+                                continue
+                except OSError:
+                    continue
+        return result
+
+
+_telemetry_log = None
+_telemetry_log_lock = threading.Lock()
+
+
+def get_telemetry_log():
+    """Return the add-on-wide TelemetryLog."""
+    global _telemetry_log
+    with _telemetry_log_lock:
+        if _telemetry_log is None:
+            _telemetry_log = TelemetryLog()
+        return _telemetry_log
+
+
+def record_job(operation, cmd, returncode, wall, spawn=None, media_seconds=0.0, bench=None):
+    """
+    Log one finished run. wall and spawn (None if not measured) are in seconds;
+    media_seconds is how much media ffmpeg reported processing (its final out_time),
+    giving the realtime speed factor.
+    ffprobe runs are logged with operation "probe", so their wall time is the probe time.
+    """
+    tool = os.path.splitext(os.path.basename(cmd[0]))[0].lower() if cmd else ""
+    if tool == "ffprobe":
+        # ffprobe takes its file as the last argument and writes nothing
+        read, written = (_file_size(cmd[-1]) if len(cmd) > 1 else 0), 0
+    else:
+        read, written = input_bytes(cmd), (output_bytes(cmd) if returncode == 0 else 0)
+    entry = {
+        "time": round(time.time(), 3),
+        "operation": operation or "other",
+        "tool": tool,
+        "returncode": returncode,
+        "spawn_ms": round(spawn * 1000, 2) if spawn is not None else None,
+        "wall_s": round(wall, 4),
+        "media_s": round(media_seconds, 3),
+        "speed": round(media_seconds / wall, 2) if wall > 0 and media_seconds > 0 else None,
+        "input_bytes": read,
+        "output_bytes": written,
+    }
+    if bench:
+        entry.update(bench)
+    get_telemetry_log().append(entry)
+
+
+class OperationStats:
+    """Totals of the logged runs of one operation type."""
+    __slots__ = ("operation", "jobs", "failed", "wall", "spawn", "media", "media_wall", "input_bytes", "output_bytes", "cpu", "maxrss_kb")
+
+    def __init__(self, operation):
+        self.operation = operation
+        self.jobs = 0
+        self.failed = 0
+        self.wall = 0.0
+        self.spawn = 0.0
+        self.media = 0.0
+        self.media_wall = 0.0  # wall time of the runs that reported media progress
+        self.input_bytes = 0
+        self.output_bytes = 0
+        self.cpu = 0.0
+        self.maxrss_kb = 0
+
+    def add(self, entry):
+        self.jobs += 1
+        if entry.get("returncode") != 0:
+            self.failed += 1
+            return
+        wall = entry.get("wall_s") or 0.0
+        self.wall += wall
+        self.spawn += (entry.get("spawn_ms") or 0.0) / 1000
+        if entry.get("media_s"):
+            self.media += entry["media_s"]
+            self.media_wall += wall
+        self.input_bytes += entry.get("input_bytes") or 0
+        self.output_bytes += entry.get("output_bytes") or 0
+        self.cpu += (entry.get("utime") or 0.0) + (entry.get("stime") or 0.0)
+        self.maxrss_kb = max(self.maxrss_kb, entry.get("maxrss_kb") or 0)
+
+    @property
+    def succeeded(self):
+        return self.jobs - self.failed
+
+    @property
+    def speed(self):
+        """Media seconds processed per wall-clock second (0 if unknown)."""
+        return self.media / self.media_wall if self.media_wall > 0 else 0.0
+
+    @property
+    def throughput(self):
+        """Input bytes read per wall-clock second."""
+        return self.input_bytes / self.wall if self.wall > 0 else 0.0
+
+    @property
+    def mean_wall(self):
+        return self.wall / self.succeeded if self.succeeded else 0.0
+
+    @property
+    def mean_spawn(self):
+        return self.spawn / self.succeeded if self.succeeded else 0.0
+
+
+def summarize(entries=None):
+    """Return OperationStats per operation type, busiest (most wall time) first."""
+    if entries is None:
+        entries = get_telemetry_log().entries()
+    stats = {}
+    for entry in entries:
+        operation = entry.get("operation") or "other"
+        if operation not in stats:
+            stats[operation] = OperationStats(operation)
+        stats[operation].add(entry)
+    return sorted(stats.values(), key=lambda item: item.wall, reverse=True)
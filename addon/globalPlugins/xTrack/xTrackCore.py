@@ -4,28 +4,43 @@ import json
 import logging
 import subprocess
 import re
+import shutil
+import time
+import threading
+from collections import deque
 
-def load_config(config_path):
-    """Load configuration from JSON file."""
-    try:
-        if os.path.exists(config_path):
-            with open(config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
-    except Exception as e:
-        logging.error(f"Failed to load configuration: {str(e)}")
-        return {}
+# Only defined by subprocess on Windows; 0 elsewhere so the engine also runs headless on other systems
+CREATE_NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
 
-def save_config(config_path, config_data):
-    """Save configuration to JSON file."""
+def get_config_dir():
+    """Return the NVDA user configuration directory (XTRACK_CONFIG_DIR overrides it)."""
+    override = os.environ.get("XTRACK_CONFIG_DIR")
+    if override:
+        return override
     try:
-        config_dir = os.path.dirname(config_path)
-        if not os.path.exists(config_dir):
-            os.makedirs(config_dir)
-        with open(config_path, 'w', encoding='utf-8') as f:
-            json.dump(config_data, f, indent=4)
-    except Exception as e:
-        logging.error(f"Failed to save configuration: {str(e)}")
+        import config
+        return config.getUserDefaultConfigPath()
+    except Exception:
+        return os.path.join(os.path.expanduser("~"), "AppData", "Roaming", "nvda", "config")
+
+def find_tool(tools_path, name):
+    """
+    Locate an ffmpeg tool ("ffmpeg" or "ffprobe"): the XTRACK_FFMPEG / XTRACK_FFPROBE
+    environment variable, then <tools_path>/<name>.exe, then the PATH.
+    Returns None if the tool cannot be found.
+    """
+    override = os.environ.get(f"XTRACK_{name.upper()}")
+    if override:
+        return override
+    if tools_path:
+        candidate = os.path.join(tools_path, f"{name}.exe")
+        if os.path.exists(candidate):
+            return candidate
+    return shutil.which(name)
+
+def get_config_path():
+    """Return the path of xTrack.json in the NVDA user configuration directory."""
+    return os.path.join(get_config_dir(), "xTrack.json")
 
 def validate_time_format(time_str):
     """Validates if the time string is in seconds, MM:SS, or HH:MM:SS format."""
@@ -62,44 +77,674 @@ def get_unique_filename(output_path, base_name, extension):
         counter += 1
     return output_file
 
-def get_file_duration(tools_path, file_path):
+def format_duration_str(duration_sec):
+    """Formats seconds as M:SS, or H:MM:SS for an hour or more."""
+    hours = int(duration_sec // 3600)
+    minutes = int((duration_sec % 3600) // 60)
+    seconds = int(duration_sec % 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours > 0 else f"{minutes}:{seconds:02d}"
+
+def _to_int(value, default=0):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+def _to_float(value, default=0.0):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+class StreamInfo:
+    """One stream of a probed media file."""
+    __slots__ = ("index", "codec_type", "codec_name", "sample_rate", "channels",
+        "width", "height", "bit_rate", "duration", "tags")
+
+    def __init__(self, index=0, codec_type="", codec_name="", sample_rate=0, channels=0,
+            width=0, height=0, bit_rate=0, duration=0.0, tags=None):
+        self.index = index
+        self.codec_type = codec_type
+        self.codec_name = codec_name
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.width = width
+        self.height = height
+        self.bit_rate = bit_rate
+        self.duration = duration
+        self.tags = tags or {}
+
+    @classmethod
+    def from_ffprobe(cls, data):
+        return cls(
+            index=_to_int(data.get("index")),
+            codec_type=data.get("codec_type", ""),
+            codec_name=(data.get("codec_name") or "").lower(),
+            sample_rate=_to_int(data.get("sample_rate")),
+            channels=_to_int(data.get("channels")),
+            width=_to_int(data.get("width")),
+            height=_to_int(data.get("height")),
+            bit_rate=_to_int(data.get("bit_rate")),
+            duration=_to_float(data.get("duration")),
+            tags=data.get("tags") or {},
+        )
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{name: data[name] for name in cls.__slots__ if name in data})
+
+class MediaInfo:
+    """Everything xTrack needs to know about a media file, from a single ffprobe run."""
+    __slots__ = ("path", "duration", "format_name", "bit_rate", "size", "streams", "tags")
+
+    def __init__(self, path, duration=0.0, format_name="", bit_rate=0, size=0, streams=None, tags=None):
+        self.path = path
+        self.duration = duration
+        self.format_name = format_name
+        self.bit_rate = bit_rate
+        self.size = size
+        self.streams = streams or []
+        self.tags = tags or {}
+
+    @classmethod
+    def from_ffprobe(cls, path, data):
+        fmt = data.get("format") or {}
+        streams = [StreamInfo.from_ffprobe(stream) for stream in data.get("streams") or []]
+        duration = _to_float(fmt.get("duration"))
+        if duration <= 0 and streams:
+            duration = max(stream.duration for stream in streams)
+        return cls(
+            path,
+            duration=duration,
+            format_name=fmt.get("format_name", ""),
+            bit_rate=_to_int(fmt.get("bit_rate")),
+            size=_to_int(fmt.get("size")),
+            streams=streams,
+            tags=fmt.get("tags") or {},
+        )
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in self.__slots__ if name not in ("path", "streams")}
+        data["streams"] = [stream.to_dict() for stream in self.streams]
+        return data
+
+    @classmethod
+    def from_dict(cls, path, data):
+        fields = {name: data[name] for name in cls.__slots__ if name in data and name not in ("path", "streams")}
+        return cls(path, streams=[StreamInfo.from_dict(stream) for stream in data.get("streams", [])], **fields)
+
+    @property
+    def audio_streams(self):
+        return [stream for stream in self.streams if stream.codec_type == "audio"]
+
+    @property
+    def video_streams(self):
+        return [stream for stream in self.streams if stream.codec_type == "video"]
+
+    @property
+    def audio(self):
+        """First audio stream, or None."""
+        streams = self.audio_streams
+        return streams[0] if streams else None
+
+    @property
+    def video(self):
+        """First video stream, or None."""
+        streams = self.video_streams
+        return streams[0] if streams else None
+
+    @property
+    def audio_codec(self):
+        return self.audio.codec_name if self.audio else ""
+
+    @property
+    def video_codec(self):
+        return self.video.codec_name if self.video else ""
+
+    @property
+    def sample_rate(self):
+        return self.audio.sample_rate if self.audio else 0
+
+    @property
+    def channels(self):
+        return self.audio.channels if self.audio else 0
+
+    @property
+    def width(self):
+        return self.video.width if self.video else 0
+
+    @property
+    def height(self):
+        return self.video.height if self.video else 0
+
+    @property
+    def duration_str(self):
+        return format_duration_str(self.duration) if self.duration > 0 else "N/A"
+
+    def get_dpi(self, default=96):
+        """DPI from the stream "dpi" tag, the format "dpi" tag or the stream "resolution" tag."""
+        stream_tags = {key.lower(): value for key, value in (self.video.tags if self.video else {}).items()}
+        format_tags = {key.lower(): value for key, value in self.tags.items()}
+        for value in (stream_tags.get("dpi"), format_tags.get("dpi"), stream_tags.get("resolution")):
+            if not value:
+                continue
+            # Values look like "300" or "72x72"
+            dpi_value = _to_int(_to_float(str(value).split('x')[0]))
+            if dpi_value > 0:
+                return dpi_value
+        return default
+
+def get_cached_media(file_path):
+    """MediaInfo of file_path from the probe cache or the media catalog, or None; never runs ffprobe."""
+    from .probeCache import get_probe_cache
+    cached = get_probe_cache().get(file_path, "media")
+    if cached is not None:
+        try:
+            return MediaInfo.from_dict(file_path, cached)
+        except Exception:
+            pass
+    from .catalog import get_media_catalog
+    catalog = get_media_catalog()
+    if catalog is not None:
+        return catalog.lookup(file_path)
+    return None
+
+# Probes currently running, so a dialog asking for a file the speculative prefetch is
+# already probing waits for that result instead of starting a second ffprobe
+_probes_in_flight = {}
+_probes_in_flight_lock = threading.Lock()
+
+def probe_media(tools_path, file_path, low_priority=False, cache=True):
     """
-    Uses ffprobe.exe to get the duration of the selected media file.
-    Returns duration in seconds and formatted string.
+    Runs ffprobe.exe once (format and streams as JSON) and returns a MediaInfo,
+    or None if the file cannot be probed.
+    Results are kept in the probe cache, so a file is only probed again after it changes.
+    low_priority runs ffprobe at idle priority, for speculative work; cache=False always
+    probes and leaves the probe cache alone (the catalog indexer keeps its own results).
     """
-    ffprobe_path = os.path.join(tools_path, "ffprobe.exe")
-    if not os.path.exists(ffprobe_path):
-        return 0, "N/A"
+    if not cache:
+        return _run_ffprobe(tools_path, file_path, low_priority, cache=False)
+    media = get_cached_media(file_path)
+    if media is not None:
+        return media
+    
+    key = os.path.normcase(os.path.abspath(file_path))
+    with _probes_in_flight_lock:
+        in_flight = _probes_in_flight.get(key)
+        if in_flight is None:
+            _probes_in_flight[key] = threading.Event()
+    if in_flight is not None:
+        in_flight.wait(35)
+        media = get_cached_media(file_path)
+        if media is not None:
+            return media
+        return _run_ffprobe(tools_path, file_path, low_priority)
+    try:
+        return _run_ffprobe(tools_path, file_path, low_priority)
+    finally:
+        with _probes_in_flight_lock:
+            _probes_in_flight.pop(key).set()
+
+def _run_ffprobe(tools_path, file_path, low_priority, cache=True):
+    ffprobe_path = find_tool(tools_path, "ffprobe")
+    if not ffprobe_path:
+        return None
     
     cmd = [
         ffprobe_path,
         "-v", "error",
-        "-show_entries", "format=duration",
-        "-of", "default=noprint_wrappers=1:nokey=1",
+        "-show_format",
+        "-show_streams",
+        "-of", "json",
         file_path,
     ]
     
+    start = time.perf_counter()
     try:
         result = subprocess.run(
             cmd,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             text=True,
-            creationflags=subprocess.CREATE_NO_WINDOW,
+            creationflags=ResourcePolicy("idle").creationflags() if low_priority else CREATE_NO_WINDOW,
             encoding='utf-8',
-            errors='ignore'
+            errors='ignore',
+            timeout=30
         )
-        if result.returncode == 0 and result.stdout.strip():
-            duration_sec = float(result.stdout.strip())
-            hours = int(duration_sec // 3600)
-            minutes = int((duration_sec % 3600) // 60)
-            seconds = int(duration_sec % 60)
-            file_duration_str = f"{hours}:{minutes:02d}:{seconds:02d}" if hours > 0 else f"{minutes}:{seconds:02d}"
-            return duration_sec, file_duration_str
+        _record_probe(cmd, result.returncode, time.perf_counter() - start)
+        if result.returncode != 0 or not result.stdout.strip():
+            logging.error(f"ffprobe failed for {file_path}: {result.stderr.strip()}")
+            return None
+        media = MediaInfo.from_ffprobe(file_path, json.loads(result.stdout))
+    except Exception as e:
+        logging.error(f"Failed to probe {file_path}: {str(e)}")
+        return None
+    if cache:
+        from .probeCache import get_probe_cache
+        get_probe_cache().set(file_path, "media", media.to_dict())
+    return media
+
+def _record_probe(cmd, returncode, wall):
+    from . import telemetry
+    try:
+        if telemetry.is_enabled():
+            telemetry.record_job("probe", cmd, returncode, wall)
+    except Exception as e:
+        logging.error(f"xTrack: failed to record telemetry: {str(e)}")
+
+def get_prefetch_worker_count():
+    """Number of ffprobe processes run side by side when prefetching a file list."""
+    return max(2, min(8, os.cpu_count() or 2))
+
+def prefetch_media(tools_path, file_paths, on_result, max_workers=None, low_priority=False):
+    """
+    Probes file_paths on a thread pool and calls on_result(file_path, media) from the
+    pool threads as each probe finishes (media is None when probing failed).
+    Blocks until every file has been reported; run it from a background thread.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    with ThreadPoolExecutor(max_workers=max_workers or get_prefetch_worker_count()) as executor:
+        futures = {
+            executor.submit(probe_media, tools_path, file_path, low_priority): file_path
+            for file_path in file_paths
+        }
+        for future in as_completed(futures):
+            file_path = futures[future]
+            try:
+                media = future.result()
+            except Exception:
+                media = None
+            try:
+                on_result(file_path, media)
+            except Exception as e:
+                logging.error(f"Prefetch callback failed for {file_path}: {str(e)}")
+
+def split_cached_media(file_paths):
+    """Return ({file_path: MediaInfo} already in the probe cache, [file paths still to probe])."""
+    cached = {}
+    missing = []
+    for file_path in file_paths:
+        media = get_cached_media(file_path)
+        if media is not None:
+            cached[file_path] = media
         else:
-            return 0, "N/A"
-    except Exception:
+            missing.append(file_path)
+    return cached, missing
+
+SPECULATIVE_PREFETCH_LIMIT = 64  # files probed while the xTrack menu is open
+SPECULATIVE_PREFETCH_WORKERS = 2
+
+def start_speculative_prefetch(tools_path, file_paths, limit=SPECULATIVE_PREFETCH_LIMIT):
+    """
+    Probe the first files of a selection at idle priority on a daemon thread, so the
+    dialog picked from the menu opens with its durations and dimensions already cached.
+    """
+    file_paths = list(file_paths[:limit])
+    if not file_paths:
+        return
+    threading.Thread(
+        target=prefetch_media,
+        args=(tools_path, file_paths, lambda file_path, media: None, SPECULATIVE_PREFETCH_WORKERS, True),
+        name="xTrackSpeculativePrefetch",
+        daemon=True,
+    ).start()
+
+def get_file_duration(tools_path, file_path):
+    """
+    Uses ffprobe.exe to get the duration of the selected media file.
+    Returns duration in seconds and formatted string.
+    """
+    media = probe_media(tools_path, file_path)
+    if media is None or media.duration <= 0:
         return 0, "N/A"
+    return media.duration, media.duration_str
+
+def format_eta(seconds):
+    """Formats a remaining time estimate as M:SS or H:MM:SS."""
+    return format_duration_str(max(0, seconds))
+
+class ProgressSnapshot:
+    """State of a running ffmpeg process, built from one block of -progress output."""
+    __slots__ = ("position", "duration", "percent", "speed", "eta", "bitrate", "total_size",
+        "throughput", "elapsed", "finished")
+
+    def __init__(self, position=0.0, duration=0.0, percent=0, speed=0.0, eta=None, bitrate="",
+            total_size=0, throughput=0.0, elapsed=0.0, finished=False):
+        self.position = position  # seconds of output written
+        self.duration = duration  # expected output duration in seconds, 0 if unknown
+        self.percent = percent  # 0-100
+        self.speed = speed  # encoding speed as a multiple of realtime
+        self.eta = eta  # estimated seconds remaining, None if unknown
+        self.bitrate = bitrate  # as reported by ffmpeg, e.g. "128.0kbits/s"
+        self.total_size = total_size  # bytes written so far
+        self.throughput = throughput  # bytes written per second of wall time
+        self.elapsed = elapsed  # wall time since the reader was created
+        self.finished = finished  # True for the final progress=end block
+
+class ProgressReader:
+    """
+    Parses the key=value blocks ffmpeg writes with "-progress pipe:1" into ProgressSnapshots.
+    on_update(snapshot) is called at most once per min_interval seconds, so a fast encode
+    does not flood the UI; the final block (progress=end) is always delivered.
+    """
+    def __init__(self, duration, on_update, min_interval=0.25):
+        self.duration = duration or 0
+        self.on_update = on_update
+        self.min_interval = min_interval
+        self.snapshot = ProgressSnapshot(duration=self.duration)
+        self._fields = {}
+        self._start_time = time.monotonic()
+        self._last_update = 0.0
+
+    def feed(self, line):
+        """Process one line of -progress output."""
+        key, sep, value = line.strip().partition("=")
+        if not sep:
+            return
+        if key != "progress":
+            self._fields[key] = value.strip()
+            return
+        self.snapshot = self._build_snapshot(finished=value.strip() == "end")
+        self._fields = {}
+        now = time.monotonic()
+        if self.snapshot.finished or now - self._last_update >= self.min_interval:
+            self._last_update = now
+            self.on_update(self.snapshot)
+
+    def read_from(self, stream):
+        """Feed every line of stream (usually process.stdout) until EOF."""
+        for line in iter(stream.readline, ''):
+            self.feed(line)
+
+    def _build_snapshot(self, finished):
+        fields = self._fields
+        elapsed = time.monotonic() - self._start_time
+        # out_time_ms is in microseconds as well; older ffmpeg builds lack out_time_us
+        position = _to_int(fields.get("out_time_us", fields.get("out_time_ms"))) / 1000000
+        position = max(0.0, position)
+        speed = _to_float(fields.get("speed", "").rstrip("x"))
+        total_size = _to_int(fields.get("total_size"))
+        percent = 0
+        eta = None
+        if self.duration > 0:
+            percent = max(0, min(100, int(position / self.duration * 100)))
+            remaining = max(0.0, self.duration - position)
+            if speed > 0:
+                eta = remaining / speed
+            elif position > 0:
+                eta = remaining * elapsed / position
+        if finished:
+            percent = 100
+            eta = 0
+        return ProgressSnapshot(
+            position=position,
+            duration=self.duration,
+            percent=percent,
+            speed=speed,
+            eta=eta,
+            bitrate=fields.get("bitrate", ""),
+            total_size=total_size,
+            throughput=total_size / elapsed if elapsed > 0 else 0.0,
+            elapsed=elapsed,
+            finished=finished,
+        )
+
+# Windows process priority classes, see SetPriorityClass
+PRIORITY_CLASSES = {
+    "normal": 0x00000020,
+    "below_normal": 0x00004000,
+    "idle": 0x00000040,
+}
+DEFAULT_JOB_PRIORITY = "below_normal"
+
+# ffmpeg options that take no value, as used in xTrack's commands
+FFMPEG_FLAG_OPTIONS = frozenset((
+    "-y", "-n", "-nostats", "-stats", "-hide_banner", "-nostdin", "-shortest", "-vn", "-an", "-sn", "-dn",
+    "-copyts", "-re", "-benchmark", "-codecs",
+))
+
+
+def ffmpeg_output_indices(cmd):
+    """Indices of the output files in an ffmpeg command (cmd[0] is the executable)."""
+    indices = []
+    i = 1
+    while i < len(cmd):
+        arg = cmd[i]
+        if arg.startswith("-") and arg != "-":
+            # An option and, unless it is a flag, its value (the value of -i is an input)
+            i += 1 if arg in FFMPEG_FLAG_OPTIONS else 2
+            continue
+        indices.append(i)
+        i += 1
+    return indices
+
+
+class ResourcePolicy:
+    """
+    How much of the machine an ffmpeg process may use: its priority class, an
+    encoder thread cap (-threads, 0 = let ffmpeg decide) and an optional CPU
+    affinity bit mask (0 = all CPUs).
+    """
+    __slots__ = ("priority", "threads", "affinity_mask")
+
+    def __init__(self, priority=DEFAULT_JOB_PRIORITY, threads=0, affinity_mask=0):
+        self.priority = priority if priority in PRIORITY_CLASSES else DEFAULT_JOB_PRIORITY
+        self.threads = max(0, threads)
+        self.affinity_mask = max(0, affinity_mask)
+
+    def for_realtime(self):
+        """
+        Policy for processes that must keep up with a live stream, such as the
+        recorder's encoders: idle priority could starve them, so use below normal instead.
+        """
+        priority = "below_normal" if self.priority == "idle" else self.priority
+        return ResourcePolicy(priority, self.threads, self.affinity_mask)
+
+    def creationflags(self, base=None):
+        """Popen creationflags including the priority class."""
+        flags = CREATE_NO_WINDOW if base is None else base
+        if os.name == 'nt':
+            flags |= PRIORITY_CLASSES[self.priority]
+        return flags
+
+    def prepare(self, cmd):
+        """
+        Return cmd with the thread cap applied to the whole process: -threads before every
+        output file (its encoder) and before the first input (its decoder), and the filter
+        graph thread options when cmd filters.
+        """
+        if self.threads <= 0 or "-threads" in cmd or len(cmd) < 2:
+            return list(cmd)
+        threads = str(self.threads)
+        outputs = set(ffmpeg_output_indices(cmd))
+        prepared = []
+        for index, arg in enumerate(cmd):
+            if index in outputs:
+                prepared.extend(["-threads", threads])
+            elif arg == "-i" and "-i" not in prepared:
+                if "-filter_complex" in cmd:
+                    prepared.extend(["-filter_complex_threads", threads])
+                if "-af" in cmd or "-vf" in cmd:
+                    prepared.extend(["-filter_threads", threads])
+                prepared.extend(["-threads", threads])
+            prepared.append(arg)
+        return prepared
+
+    def apply(self, process):
+        """Apply the CPU affinity mask to a started process (needs psutil)."""
+        if not self.affinity_mask:
+            return
+        try:
+            import psutil
+            cpu_count = psutil.cpu_count() or 1
+            cpus = [cpu for cpu in range(cpu_count) if self.affinity_mask & (1 << cpu)]
+            if cpus:
+                psutil.Process(process.pid).cpu_affinity(cpus)
+        except Exception as e:
+            logging.error(f"Failed to set CPU affinity: {str(e)}")
+
+def get_resource_policy():
+    """
+    Build the resource policy from xTrack.json: "JobPriority" (normal, below_normal or idle),
+    "JobThreads" (0 = automatic) and "JobAffinityMask" (0 = all CPUs).
+    """
+    from .configStore import get_config_store
+    config_store = get_config_store()
+    try:
+        threads = int(config_store.get("JobThreads", 0))
+        affinity_mask = int(config_store.get("JobAffinityMask", 0))
+    except (TypeError, ValueError):
+        threads, affinity_mask = 0, 0
+    return ResourcePolicy(config_store.get("JobPriority", DEFAULT_JOB_PRIORITY), threads, affinity_mask)
+
+STDERR_TAIL_LIMIT = 64 * 1024
+
+class ProcessResult:
+    """Outcome of a finished FFmpegProcess."""
+    __slots__ = ("returncode", "stderr")
+
+    def __init__(self, returncode, stderr):
+        self.returncode = returncode
+        self.stderr = stderr  # last STDERR_TAIL_LIMIT characters of stderr
+
+class FFmpegProcess:
+    """
+    Runs ffmpeg (or any tool) with both pipes drained by their own threads, so a
+    chatty stderr can never stall the process. Every stdout line is passed to
+    on_stdout_line (for example ProgressReader.feed); only the tail of stderr is
+    kept for error reports. Completion is exposed as a concurrent.futures.Future
+    resolving to a ProcessResult.
+
+    poll(), terminate() and send_signal() are forwarded to the process, so an
+    FFmpegProcess can be stored anywhere a Popen object was.
+
+    The process runs under policy (by default the configured ResourcePolicy), so
+    background encodes do not compete with NVDA at normal priority.
+
+    Unless telemetry is disabled, ffmpeg runs with -benchmark and the finished run is
+    logged under operation (see telemetry.py); the bench lines are removed from stderr.
+    """
+    def __init__(self, cmd, on_stdout_line=None, stderr_limit=STDERR_TAIL_LIMIT, cwd=None, policy=None,
+                 operation=None):
+        from concurrent.futures import Future
+        from . import telemetry
+        self.policy = policy or get_resource_policy()
+        cmd = self.policy.prepare(cmd)
+        self.telemetry = telemetry.is_enabled()
+        if self.telemetry and telemetry.wants_benchmark(cmd) and "-benchmark" not in cmd:
+            cmd = cmd[:1] + ["-benchmark"] + cmd[1:]
+        self.cmd = cmd
+        self.operation = operation
+        self.media_seconds = 0.0  # last out_time seen on stdout
+        self.on_stdout_line = on_stdout_line
+        self.stderr_limit = stderr_limit
+        self.future = Future()
+        self._stderr_chunks = deque()
+        self._stderr_size = 0
+        self._stderr_lock = threading.Lock()
+        self._start = time.perf_counter()
+        self.process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            creationflags=self.policy.creationflags(),
+            cwd=cwd,
+            text=True,
+            encoding='utf-8',
+            errors='ignore'
+        )
+        self.spawn_time = time.perf_counter() - self._start
+        self.policy.apply(self.process)
+        self._stderr_thread = threading.Thread(target=self._read_stderr, daemon=True)
+        self._stderr_thread.start()
+        threading.Thread(target=self._read_stdout, daemon=True).start()
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    @property
+    def stderr_tail(self):
+        with self._stderr_lock:
+            return ''.join(self._stderr_chunks)
+
+    def poll(self):
+        return self.process.poll()
+
+    def terminate(self):
+        self.process.terminate()
+
+    def kill(self):
+        self.process.kill()
+
+    def send_signal(self, sig):
+        self.process.send_signal(sig)
+
+    def wait(self, timeout=None):
+        """Block until the process has exited and both pipes are drained; returns a ProcessResult."""
+        return self.future.result(timeout)
+
+    def _read_stderr(self):
+        try:
+            for line in iter(self.process.stderr.readline, ''):
+                with self._stderr_lock:
+                    self._stderr_chunks.append(line)
+                    self._stderr_size += len(line)
+                    while self._stderr_size > self.stderr_limit and len(self._stderr_chunks) > 1:
+                        self._stderr_size -= len(self._stderr_chunks.popleft())
+        except Exception:
+            pass
+        finally:
+            self.process.stderr.close()
+
+    def _read_stdout(self):
+        error = None
+        try:
+            for line in iter(self.process.stdout.readline, ''):
+                if self.telemetry and line.startswith("out_time_us="):
+                    self.media_seconds = max(self.media_seconds, _to_int(line[12:].strip()) / 1000000)
+                if self.on_stdout_line:
+                    try:
+                        self.on_stdout_line(line)
+                    except Exception as e:
+                        logging.error(f"ffmpeg output handler failed: {str(e)}")
+        except Exception as e:
+            error = e
+        finally:
+            self.process.stdout.close()
+        try:
+            returncode = self.process.wait()
+            self._stderr_thread.join()
+        except Exception as e:
+            error = error or e
+        if error is not None:
+            self.future.set_exception(error)
+            return
+        stderr = self.stderr_tail
+        if self.telemetry:
+            stderr = self._record_telemetry(returncode, stderr)
+        self.future.set_result(ProcessResult(returncode, stderr))
+
+    def _record_telemetry(self, returncode, stderr):
+        """Log this run and return stderr without ffmpeg's bench lines."""
+        from . import telemetry
+        wall = time.perf_counter() - self._start
+        bench, stderr = telemetry.parse_benchmark(stderr)
+        media_seconds = self.media_seconds or telemetry.parse_stats_time(stderr)
+        try:
+            telemetry.record_job(self.operation, self.cmd, returncode, wall, self.spawn_time, media_seconds, bench)
+        except Exception as e:
+            logging.error(f"xTrack: failed to record telemetry: {str(e)}")
+        return stderr
+
+def run_process(cmd, on_stdout_line=None, cwd=None, stderr_limit=STDERR_TAIL_LIMIT, policy=None, operation=None):
+    """Start cmd as an FFmpegProcess and return it; operation names the job type for telemetry."""
+    return FFmpegProcess(cmd, on_stdout_line=on_stdout_line, stderr_limit=stderr_limit, cwd=cwd, policy=policy,
+                         operation=operation)
 
 def get_file_size(file_path):
     """
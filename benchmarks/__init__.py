@@ -0,0 +1,12 @@
+# benchmarks/__init__.py
+# End-to-end benchmarks for the xTrack engine. Not part of the add-on package.
+# Run from the repository root:
+#   python -m benchmarks --stub
+# See __main__.py for the options.
+
+import os
+import sys
+
+ADDON_PLUGINS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "addon", "globalPlugins")
+if ADDON_PLUGINS_DIR not in sys.path:
+    sys.path.insert(0, ADDON_PLUGINS_DIR)
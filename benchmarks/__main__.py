@@ -0,0 +1,271 @@
+# benchmarks/__main__.py
+# Times every xTrack operation end to end through the headless engine and writes the
+# results as JSON, so runs can be compared:
+#   python -m benchmarks --stub -o before.json
+#   python -m benchmarks --sizes short medium --repeat 5 -o after.json
+# With --stub, ffmpeg and ffprobe are replaced by stub_ffmpeg.py, which only prints
+# realistic -progress output: the timings are then xTrack's own orchestration overhead.
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+
+from . import media
+from xTrack.xTrackCore import find_tool, probe_media
+from xTrack.probeCache import get_probe_cache
+from xTrack.engine import (
+    ConvertAudioSpec,
+    MergeSpec,
+    SplitSpec,
+    TrimSpec,
+    ResizeImageSpec,
+    Mp3ToMp4Spec,
+    run_spec,
+)
+
+RESULTS_VERSION = 1
+
+
+def op_convert(inputs, out_dir):
+    return ConvertAudioSpec([inputs.wav], out_dir, "mp3", 192)
+
+
+def op_convert_copy(inputs, out_dir):
+    """MP3s already at the requested bitrate and sample rate: the stream-copy fast path."""
+    return ConvertAudioSpec(inputs.mp3s, out_dir, "mp3", 192, media.SAMPLE_RATE)
+
+
+def op_convert_multi(inputs, out_dir):
+    """Three output profiles written from one decode of the WAV."""
+    return ConvertAudioSpec([inputs.wav], out_dir, "mp3", 320,
+        extra_outputs=[{"format": "mp3", "bitrate_kbps": 128}, {"format": "wav"}])
+
+
+def op_convert_loudnorm(inputs, out_dir):
+    """Two-pass loudness normalization; repeats after the first reuse the cached measurement."""
+    return ConvertAudioSpec([inputs.wav], out_dir, "mp3", 192, loudness_target=-16.0)
+
+
+def op_extract_original(inputs, out_dir):
+    """The MP3s' audio copied out as is: remux speed, to compare with convert."""
+    return ConvertAudioSpec(inputs.mp3s, out_dir, "original")
+
+
+def op_encoder(output_format, bitrate_kbps, profile):
+    """Convert the WAV with one encoder and speed profile, to compare their throughput."""
+    def op(inputs, out_dir):
+        return ConvertAudioSpec([inputs.wav], out_dir, output_format, bitrate_kbps, encoder_profile=profile)
+    return op
+
+
+def op_merge_copy(inputs, out_dir):
+    return MergeSpec(inputs.mp3s, os.path.join(out_dir, "merged.mp3"))
+
+
+def op_merge_crossfade(inputs, out_dir):
+    return MergeSpec(inputs.wavs, os.path.join(out_dir, "crossfade.mp3"), reencode=True, bitrate_kbps=192,
+        crossfade=2.0)
+
+
+def op_trim(inputs, out_dir):
+    return TrimSpec(inputs.wav, inputs.duration * 0.25, inputs.duration * 0.75, os.path.join(out_dir, "trim.mp3"))
+
+
+def op_split(inputs, out_dir):
+    quarter = inputs.duration / 4
+    return SplitSpec(inputs.wav, [quarter, quarter * 2, quarter * 3, inputs.duration], out_dir)
+
+
+def op_resize(inputs, out_dir):
+    return ResizeImageSpec([inputs.image], out_dir, 800, 600, format="jpeg", quality="good")
+
+
+def op_mp3_to_mp4(inputs, out_dir):
+    return Mp3ToMp4Spec(inputs.mp3s[0], os.path.join(out_dir, "video.mp4"), photos=[inputs.image])
+
+
+def op_image_info(inputs, cold):
+    """probe_media + DPI of the test image, as the resize dialog does when it opens."""
+    if cold:
+        get_probe_cache().clear()
+    info = probe_media(None, inputs.image)
+    if info is None:
+        return False, "ffprobe could not read the image"
+    info.get_dpi()
+    return True, ""
+
+
+# name: builder of a job spec for (inputs, out_dir)
+SPEC_OPERATIONS = {
+    "convert": op_convert,
+    "convert_copy": op_convert_copy,
+    "convert_multi": op_convert_multi,
+    "convert_loudnorm": op_convert_loudnorm,
+    "extract_original": op_extract_original,
+    # Encoder throughput: name: encode_<format>_<profile>
+    **{
+        f"encode_{output_format}_{profile}": op_encoder(output_format, bitrate_kbps, profile)
+        for output_format, bitrate_kbps in (("mp3", 192), ("flac", 0), ("opus", 64), ("aac", 192))
+        for profile in ("fast", "balanced", "best")
+    },
+    "merge_copy": op_merge_copy,
+    "merge_crossfade": op_merge_crossfade,
+    "trim": op_trim,
+    "split": op_split,
+    "resize": op_resize,
+    "mp3_to_mp4": op_mp3_to_mp4,
+}
+OPERATIONS = list(SPEC_OPERATIONS) + ["image_info_cold", "image_info_warm"]
+
+
+def install_stub(work_dir, speed):
+    """Point XTRACK_FFMPEG / XTRACK_FFPROBE at wrappers that run stub_ffmpeg.py."""
+    stub = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_ffmpeg.py")
+    bin_dir = os.path.join(work_dir, "bin")
+    os.makedirs(bin_dir, exist_ok=True)
+    for name in ("ffmpeg", "ffprobe"):
+        if os.name == "nt":
+            path = os.path.join(bin_dir, f"{name}.cmd")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f'@"{sys.executable}" "{stub}" {name} %*\r\n')
+        else:
+            path = os.path.join(bin_dir, name)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f'#!/bin/sh\nexec "{sys.executable}" "{stub}" {name} "$@"\n')
+            os.chmod(path, 0o755)
+        os.environ[f"XTRACK_{name.upper()}"] = path
+    os.environ["XTRACK_STUB_SPEED"] = str(speed)
+
+
+def run_once(operation, inputs, out_dir, workers):
+    """Run one operation and return a run record."""
+    os.makedirs(out_dir, exist_ok=True)
+    updates = []
+    if operation.startswith("image_info"):
+        start = time.perf_counter()
+        ok, error = op_image_info(inputs, cold=operation == "image_info_cold")
+        wall = time.perf_counter() - start
+        return {"wall": wall, "ok": ok, "error": error, "outputs": 0, "output_bytes": 0, "progress_updates": 0, "process_seconds": wall}
+    spec = SPEC_OPERATIONS[operation](inputs, out_dir)
+    start = time.perf_counter()
+    results = run_spec(spec, max_workers=workers, on_progress=lambda task, snapshot: updates.append(snapshot))
+    wall = time.perf_counter() - start
+    errors = [result.error.splitlines()[-1] for result in results if not result.ok and result.error]
+    return {
+        "wall": wall,
+        "ok": all(result.ok for result in results),
+        "error": errors[0] if errors else "",
+        "outputs": len(results),
+        "output_bytes": sum(os.path.getsize(result.output) for result in results
+            if result.ok and result.output and os.path.isfile(result.output)),
+        "progress_updates": len(updates),
+        # Time spent inside ffmpeg processes, summed over parallel outputs
+        "process_seconds": sum(result.elapsed for result in results),
+    }
+
+
+def summarize(values):
+    return {
+        "min": min(values),
+        "median": statistics.median(values),
+        "mean": statistics.mean(values),
+        "max": max(values),
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark xTrack operations.")
+    parser.add_argument("--stub", action="store_true", help="use the stub ffmpeg (orchestration overhead only)")
+    parser.add_argument("--stub-speed", type=float, default=0.0,
+        help="simulated stub encoding speed in x realtime (0 = no delay)")
+    parser.add_argument("--tools", help="folder containing ffmpeg.exe and ffprobe.exe")
+    parser.add_argument("--sizes", nargs="+", choices=list(media.SIZES), default=["short", "medium"])
+    parser.add_argument("--operations", nargs="+", choices=OPERATIONS, default=OPERATIONS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None, help="parallel ffmpeg processes (default: cores - 1)")
+    parser.add_argument("-o", "--output", default="benchmark_results.json")
+    parser.add_argument("--keep", action="store_true", help="keep the generated inputs and outputs")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    work_dir = tempfile.mkdtemp(prefix="xtrack_bench_")
+    # Keep the probe cache out of the user's NVDA configuration
+    os.environ["XTRACK_CONFIG_DIR"] = os.path.join(work_dir, "config")
+    os.makedirs(os.environ["XTRACK_CONFIG_DIR"])
+    if args.stub:
+        install_stub(work_dir, args.stub_speed)
+    ffmpeg_path = find_tool(args.tools, "ffmpeg")
+    if not ffmpeg_path or not find_tool(args.tools, "ffprobe"):
+        print("ffmpeg/ffprobe not found; use --tools, set XTRACK_FFMPEG and XTRACK_FFPROBE or run with --stub",
+            file=sys.stderr)
+        return 2
+
+    report = {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "ffmpeg": ffmpeg_path,
+            "stub": args.stub,
+            "stub_speed": args.stub_speed if args.stub else None,
+            "repeat": args.repeat,
+            "workers": args.workers,
+        },
+        "results": [],
+    }
+    failed = False
+    try:
+        for size in args.sizes:
+            start = time.perf_counter()
+            inputs = media.generate(work_dir, size, None if args.stub else ffmpeg_path, args.tools)
+            print(f"{size}: inputs ready in {time.perf_counter() - start:.2f}s")
+            if "image_info_warm" in args.operations:
+                probe_media(None, inputs.image)
+            for operation in args.operations:
+                runs = [
+                    run_once(operation, inputs, os.path.join(work_dir, "output", size, operation, str(i)), args.workers)
+                    for i in range(args.repeat)
+                ]
+                ok = all(run["ok"] for run in runs)
+                failed = failed or not ok
+                wall = summarize([run["wall"] for run in runs])
+                entry = {
+                    "operation": operation,
+                    "size": size,
+                    "media_seconds": 0.0 if operation.startswith("image_info") or operation == "resize" else inputs.duration,
+                    "image": f"{inputs.width}x{inputs.height}",
+                    "ok": ok,
+                    "wall": wall,
+                    "runs": runs,
+                }
+                if entry["media_seconds"] and wall["median"] > 0:
+                    entry["realtime_factor"] = entry["media_seconds"] / wall["median"]
+                report["results"].append(entry)
+                status = "ok" if ok else "FAILED: " + next(run["error"] for run in runs if not run["ok"])
+                print(f"  {operation:<22} median {wall['median'] * 1000:9.1f} ms  "
+                    f"min {wall['min'] * 1000:9.1f} ms  {status}")
+    finally:
+        get_probe_cache().flush()
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        else:
+            print(f"Files kept in {work_dir}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
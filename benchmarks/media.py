@@ -0,0 +1,143 @@
+# benchmarks/media.py
+# Synthetic benchmark inputs: tone-plus-noise WAVs and MP3s, and a test-pattern PNG, at
+# a few sizes. A real ffmpeg generates them with lavfi; otherwise the bundled pydub
+# generators and a small PNG writer are used, so the stub ffmpeg needs nothing installed.
+
+import os
+import sys
+import zlib
+import struct
+import warnings
+import subprocess
+
+from xTrack.xTrackCore import CREATE_NO_WINDOW
+from xTrack.engine import ConvertAudioSpec, run_spec
+
+# name: (audio seconds, image width, image height)
+SIZES = {
+    "short": (10, 640, 480),
+    "medium": (60, 1920, 1080),
+    "long": (600, 4000, 3000),
+}
+
+TONES = (440, 554, 659)  # one input per tone, so merges have three files
+NOISE_DB = -30.0
+SAMPLE_RATE = 44100
+
+# 75% colour bars, as in the usual test pattern
+BARS = [(191, 191, 191), (191, 191, 0), (0, 191, 191), (0, 191, 0), (191, 0, 191), (191, 0, 0), (0, 0, 191)]
+
+
+class SyntheticMedia:
+    """Paths of the generated inputs for one size."""
+
+    def __init__(self, size, duration, wavs, mp3s, image, width, height):
+        self.size = size
+        self.duration = duration
+        self.wavs = wavs
+        self.mp3s = mp3s
+        self.image = image
+        self.width = width
+        self.height = height
+
+    @property
+    def wav(self):
+        return self.wavs[0]
+
+
+def _run_ffmpeg(ffmpeg_path, args):
+    subprocess.run([ffmpeg_path, "-v", "error", "-y"] + args, check=True, creationflags=CREATE_NO_WINDOW,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+
+def _load_generators():
+    try:
+        import audioop  # noqa: F401
+    except ImportError:
+        # Python 3.13 dropped audioop; pydub then falls back to its bundled pyaudioop module
+        import xTrack
+        sys.path.append(os.path.join(os.path.dirname(xTrack.__file__), "Tools", "pydub"))
+    with warnings.catch_warnings():
+        # pydub warns when it cannot find ffmpeg, which WAV export does not need
+        warnings.simplefilter("ignore", RuntimeWarning)
+        from xTrack.Tools.pydub.generators import Sine, WhiteNoise
+    return Sine, WhiteNoise
+
+
+def write_tone_wav(path, frequency, seconds):
+    """Sine tone with white noise underneath, built from one generated second."""
+    Sine, WhiteNoise = _load_generators()
+    second = Sine(frequency, sample_rate=SAMPLE_RATE).to_audio_segment(duration=1000, volume=-6.0)
+    second = second.overlay(WhiteNoise(sample_rate=SAMPLE_RATE).to_audio_segment(duration=1000, volume=NOISE_DB))
+    (second * int(seconds)).set_channels(2).export(path, format="wav")
+
+
+def write_tone_wav_ffmpeg(ffmpeg_path, path, frequency, seconds):
+    _run_ffmpeg(ffmpeg_path, [
+        "-f", "lavfi", "-i", f"sine=frequency={frequency}:sample_rate={SAMPLE_RATE}:duration={seconds}",
+        "-f", "lavfi", "-i", f"anoisesrc=color=white:amplitude=0.03:sample_rate={SAMPLE_RATE}:duration={seconds}",
+        "-filter_complex", "amix=inputs=2:duration=first",
+        "-ac", "2", "-c:a", "pcm_s16le", path,
+    ])
+
+
+def _png_chunk(kind, data):
+    chunk = kind + data
+    return struct.pack(">I", len(data)) + chunk + struct.pack(">I", zlib.crc32(chunk) & 0xffffffff)
+
+
+def write_test_pattern_png(path, width, height):
+    """Colour bars over a grey ramp, as an 8-bit RGB PNG."""
+    bars = bytearray()
+    for x in range(width):
+        bars.extend(BARS[x * len(BARS) // width])
+    ramp = bytearray()
+    for x in range(width):
+        level = x * 255 // max(1, width - 1)
+        ramp.extend((level, level, level))
+    bars_height = height * 2 // 3
+    # Each row starts with filter type 0 (none)
+    raw = (b"\x00" + bytes(bars)) * bars_height + (b"\x00" + bytes(ramp)) * (height - bars_height)
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(_png_chunk(b"IDAT", zlib.compress(raw, 6)))
+        f.write(_png_chunk(b"IEND", b""))
+
+
+def write_test_pattern_png_ffmpeg(ffmpeg_path, path, width, height):
+    _run_ffmpeg(ffmpeg_path, ["-f", "lavfi", "-i", f"testsrc2=size={width}x{height}", "-frames:v", "1", path])
+
+
+def generate(work_dir, size, ffmpeg_path=None, tools_path=None):
+    """
+    Create the inputs for one size in work_dir. WAVs and the PNG come from ffmpeg lavfi when
+    ffmpeg_path (a real ffmpeg) is given, else from Python; the MP3s are always encoded with
+    the configured ffmpeg, which may be the stub.
+    """
+    seconds, width, height = SIZES[size]
+    size_dir = os.path.join(work_dir, "input", size)
+    os.makedirs(size_dir, exist_ok=True)
+
+    wavs = []
+    for frequency in TONES:
+        path = os.path.join(size_dir, f"tone{frequency}.wav")
+        if ffmpeg_path:
+            write_tone_wav_ffmpeg(ffmpeg_path, path, frequency, seconds)
+        else:
+            write_tone_wav(path, frequency, seconds)
+        wavs.append(path)
+
+    image = os.path.join(size_dir, f"pattern_{width}x{height}.png")
+    if ffmpeg_path:
+        write_test_pattern_png_ffmpeg(ffmpeg_path, image, width, height)
+    else:
+        write_test_pattern_png(image, width, height)
+
+    results = run_spec(ConvertAudioSpec(wavs, size_dir, "mp3", 192, SAMPLE_RATE), tools_path=tools_path)
+    failed = [result for result in results if not result.ok]
+    if failed:
+        raise RuntimeError(f"Could not encode the MP3 inputs: {failed[0].error}")
+    mp3s = [result.output for result in results]
+
+    return SyntheticMedia(size, float(seconds), wavs, mp3s, image, width, height)
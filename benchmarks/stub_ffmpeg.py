@@ -0,0 +1,321 @@
+# benchmarks/stub_ffmpeg.py
+# Stand-in for ffmpeg and ffprobe. It understands just enough of the command lines xTrack
+# builds to work out the output duration, then prints -progress blocks like ffmpeg does
+# (at a simulated encoding speed) and writes a small placeholder output file. With it the
+# benchmarks measure xTrack's own overhead - process start-up, pipe draining, progress
+# parsing, scheduling - without any codec time.
+#
+#   python stub_ffmpeg.py ffmpeg <ffmpeg arguments>
+#   python stub_ffmpeg.py ffprobe <ffprobe arguments>
+#
+# XTRACK_STUB_SPEED sets the simulated speed in x realtime; 0 (the default) never sleeps.
+
+import os
+import re
+import sys
+import json
+import time
+import wave
+import struct
+
+MARKER = b"XTRACKSTUB\n"
+PROGRESS_PERIOD = 0.5  # seconds between progress blocks, as ffmpeg's default -stats_period
+UNTHROTTLED_SPEED = 100.0  # speed reported when XTRACK_STUB_SPEED is 0
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tiff", ".gif")
+
+BANNER = [
+    "ffmpeg version 6.1-xtrack-stub Copyright (c) 2000-2023 the FFmpeg developers",
+    "  built with gcc 13.2.0",
+    "  configuration: --enable-gpl --enable-libmp3lame --enable-libx264",
+    "  libavutil      58. 29.100 / 58. 29.100",
+    "  libavcodec     60. 31.102 / 60. 31.102",
+    "  libavformat    60. 16.100 / 60. 16.100",
+    "  libavfilter     9. 12.100 /  9. 12.100",
+    "  libswresample   4. 12.100 /  4. 12.100",
+]
+
+
+def read_media(path):
+    """Return {"kind", "duration", ...} for a WAV, PNG or stub output file, or None."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(64)
+    except OSError:
+        return None
+    if head.startswith(MARKER):
+        with open(path, "rb") as f:
+            return json.loads(f.read()[len(MARKER):].decode("utf-8"))
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        try:
+            with wave.open(path, "rb") as w:
+                rate = w.getframerate()
+                return {
+                    "kind": "audio",
+                    "codec": f"pcm_s{w.getsampwidth() * 8}le",
+                    "duration": w.getnframes() / float(rate),
+                    "sample_rate": rate,
+                    "channels": w.getnchannels(),
+                }
+        except (wave.Error, EOFError):
+            return None
+    if head[:8] == b"\x89PNG\r\n\x1a\n":
+        width, height = struct.unpack(">II", head[16:24])
+        return {"kind": "image", "codec": "png", "duration": 0.0, "width": width, "height": height}
+    return None
+
+
+def write_stub(path, info):
+    with open(path, "wb") as f:
+        f.write(MARKER + json.dumps(info).encode("utf-8"))
+
+
+def ffprobe(args):
+    path = args[-1] if args else ""
+    info = read_media(path)
+    if info is None:
+        sys.stderr.write(f"{path}: Invalid data found when processing input\n")
+        return 1
+    size = os.path.getsize(path)
+    duration = info.get("duration", 0.0)
+    if info["kind"] == "image":
+        streams = [{"index": 0, "codec_type": "video", "codec_name": info["codec"],
+            "width": info["width"], "height": info["height"]}]
+        fmt = {"format_name": "png_pipe", "size": str(size)}
+    elif info["kind"] == "video":
+        streams = [
+            {"index": 0, "codec_type": "video", "codec_name": "h264",
+                "width": info.get("width", 1920), "height": info.get("height", 1080), "duration": str(duration)},
+            {"index": 1, "codec_type": "audio", "codec_name": "aac",
+                "sample_rate": "44100", "channels": 2, "duration": str(duration)},
+        ]
+        fmt = {"format_name": "mov,mp4,m4a,3gp,3g2,mj2", "duration": str(duration), "size": str(size)}
+    else:
+        streams = [{"index": 0, "codec_type": "audio", "codec_name": info.get("codec", "mp3"),
+            "sample_rate": str(info.get("sample_rate", 44100)), "channels": info.get("channels", 2),
+            "duration": str(duration)}]
+        if info.get("bit_rate"):
+            streams[0]["bit_rate"] = str(info["bit_rate"])
+        fmt = {"format_name": os.path.splitext(path)[1].lstrip(".") or "mp3", "duration": str(duration),
+            "size": str(size)}
+    if duration:
+        fmt["bit_rate"] = str(int(size * 8 / duration))
+    print(json.dumps({"streams": streams, "format": fmt}, indent=4))
+    return 0
+
+
+COPY_SPEEDUP = 50
+
+LOUDNORM_MEASUREMENT = {
+    "input_i": "-20.52",
+    "input_tp": "-3.10",
+    "input_lra": "6.40",
+    "input_thresh": "-30.88",
+    "output_i": "-16.01",
+    "output_tp": "-1.50",
+    "output_lra": "5.90",
+    "output_thresh": "-26.37",
+    "normalization_type": "dynamic",
+    "target_offset": "0.01",
+}
+
+
+def parse_ffmpeg_args(args):
+    """
+    Split an ffmpeg command line into inputs [(format, path)], options and the outputs
+    [(path, options given just before it)]; the last output is the command's last argument.
+    """
+    inputs = []
+    options = {}
+    outputs = []
+    output_options = {}
+    input_format = None
+    i = 0
+    while i < len(args) - 1:
+        arg = args[i]
+        value = args[i + 1]
+        if arg == "-i":
+            inputs.append((input_format, value))
+            input_format = None
+            output_options = {}
+        elif arg == "-f" and "-i" in args[i + 2:]:
+            input_format = value
+        elif arg in ("-y", "-nostats", "-hide_banner", "-shortest", "-vn", "-an", "-benchmark"):
+            options[arg] = True
+            i += 1
+            continue
+        elif arg.startswith("-"):
+            options[arg] = value
+            output_options[arg] = value
+        else:
+            outputs.append((arg, output_options))
+            output_options = {}
+            i += 1
+            continue
+        i += 2
+    if args:
+        outputs.append((args[-1], output_options))
+    return inputs, options, outputs
+
+
+def input_duration(input_format, path):
+    if input_format == "lavfi":
+        match = re.search(r"(?:^|:)d(?:uration)?=([0-9.]+)", path)
+        return float(match.group(1)) if match else 0.0
+    if input_format == "concat":
+        total = 0.0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith("duration "):
+                    total += float(line.split(None, 1)[1])
+                elif line.startswith("file "):
+                    info = read_media(line[5:].strip().strip("'").replace("'\\''", "'"))
+                    total += info.get("duration", 0.0) if info else 0.0
+        return total
+    info = read_media(path)
+    if info is None:
+        raise ValueError(f"{path}: No such file or directory")
+    return info.get("duration", 0.0)
+
+
+def output_duration(inputs, options):
+    durations = [input_duration(fmt, path) for fmt, path in inputs]
+    if "-to" in options:
+        return max(0.0, float(options["-to"]) - float(options.get("-ss", 0)))
+    if "-t" in options:
+        return float(options["-t"])
+    positive = [d for d in durations if d > 0]
+    if not positive:
+        return 0.0
+    if "-shortest" in options:
+        return min(positive)
+    crossfade = re.findall(r"acrossfade=d=([0-9.]+)", options.get("-filter_complex", ""))
+    if crossfade:
+        return max(0.0, sum(positive) - sum(float(d) for d in crossfade))
+    if "-filter_complex" in options:
+        return sum(positive)
+    # A seek without -t/-to runs from there to the end of the input
+    return max(0.0, max(positive) - float(options.get("-ss", 0)))
+
+
+def output_info(output, duration, options):
+    ext = os.path.splitext(output)[1].lower()
+    if ext in IMAGE_EXTENSIONS:
+        match = re.search(r"scale=(\d+):(\d+)", options.get("-vf", ""))
+        width, height = (int(match.group(1)), int(match.group(2))) if match else (640, 480)
+        return {"kind": "image", "codec": ext.lstrip("."), "duration": 0.0, "width": width, "height": height}, 0
+    if ext in (".mp4", ".mkv", ".mov", ".avi", ".webm"):
+        return {"kind": "video", "duration": duration, "width": 1920, "height": 1080}, 2500
+    bitrate = options.get("-b:a", "192k")
+    kbps = int(bitrate.rstrip("k")) if bitrate.rstrip("k").isdigit() else 192
+    if ext == ".wav":
+        kbps = 1411
+    elif ext == ".flac":
+        kbps = 900 - 25 * int(options.get("-compression_level", 5))
+    codec = {".m4a": "aac"}.get(ext, ext.lstrip("."))
+    return {"kind": "audio", "codec": codec, "duration": duration,
+        "sample_rate": sample_rate(options), "channels": 2, "bit_rate": kbps * 1000}, kbps
+
+
+def sample_rate(options):
+    if "-ar" in options:
+        return int(options["-ar"])
+    match = re.search(r"aresample=(\d+)", options.get("-filter_complex", ""))
+    return int(match.group(1)) if match else 44100
+
+
+def format_out_time(seconds):
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{secs:09.6f}"
+
+
+def ffmpeg(args):
+    start = time.perf_counter()
+    for line in BANNER:
+        sys.stderr.write(line + "\n")
+    inputs, options, outputs = parse_ffmpeg_args(args)
+    output = outputs[-1][0] if outputs else None
+    if not inputs or not output:
+        sys.stderr.write("At least one output file must be specified\n")
+        return 1
+    try:
+        duration = output_duration(inputs, options)
+    except (OSError, ValueError) as e:
+        sys.stderr.write(f"{e}\n")
+        return 1
+    for index, (_fmt, path) in enumerate(inputs):
+        sys.stderr.write(f"Input #{index}, from '{path}':\n")
+    written = []
+    for index, (path, own_options) in enumerate(outputs):
+        sys.stderr.write(f"Output #{index}, to '{path}':\n")
+        written.append((path,) + output_info(path, duration, dict(options, **own_options)))
+    _path, info, kbps = written[-1]
+    kbps = sum(output_kbps for _path, _info, output_kbps in written)
+    progress = options.get("-progress") == "pipe:1"
+    speed = float(os.environ.get("XTRACK_STUB_SPEED") or 0)
+    if speed and "copy" in (options.get("-c"), options.get("-c:a")):
+        speed *= COPY_SPEEDUP  # remuxing without re-encoding runs at disk speed
+    reported_speed = speed or UNTHROTTLED_SPEED
+    step = PROGRESS_PERIOD * reported_speed
+    video = info["kind"] != "audio"
+    position = 0.0
+    frame = 0
+    while True:
+        previous = position
+        position = min(duration, position + step)
+        finished = position >= duration
+        if speed:
+            time.sleep((position - previous) / speed)
+        if progress:
+            total_size = int(position * kbps * 125)
+            out_time_us = int(position * 1000000)
+            lines = []
+            if video:
+                frame = int(position * 25) if duration else 1
+                lines += [f"frame={frame}", f"fps={25.0 * reported_speed:.2f}", "stream_0_0_q=28.0"]
+            lines += [
+                f"bitrate={kbps:.1f}kbits/s" if position else "bitrate=N/A",
+                f"total_size={total_size}",
+                f"out_time_us={out_time_us}",
+                f"out_time_ms={out_time_us}",
+                f"out_time={format_out_time(position)}",
+                "dup_frames=0",
+                "drop_frames=0",
+                f"speed={reported_speed:.3g}x",
+                "progress=end" if finished else "progress=continue",
+            ]
+            sys.stdout.write("\n".join(lines) + "\n")
+            sys.stdout.flush()
+        if finished:
+            break
+    for path, media_info, _kbps in written:
+        if path != "-":  # -f null -
+            write_stub(path, media_info)
+    if "silencedetect" in options.get("-af", ""):
+        # One short pause a little after the middle of the decoded range
+        pause = duration / 2 + 0.7
+        sys.stderr.write(f"[silencedetect @ 0x0] silence_start: {pause:.3f}\n")
+        sys.stderr.write(f"[silencedetect @ 0x0] silence_end: {pause + 0.4:.3f} | silence_duration: 0.400\n")
+    if "print_format=json" in options.get("-af", ""):
+        # loudnorm analysis pass
+        sys.stderr.write("[Parsed_loudnorm_0 @ 0x0] \n" + json.dumps(LOUDNORM_MEASUREMENT, indent=1) + "\n")
+    sys.stderr.write(f"size={int(duration * kbps * 125 / 1024)}kB time={format_out_time(duration)} "
+        f"bitrate={kbps:.1f}kbits/s speed={reported_speed:.3g}x\n")
+    if "-benchmark" in options:
+        cpu = time.process_time()
+        sys.stderr.write(f"bench: utime={cpu:.3f}s stime=0.000s rtime={time.perf_counter() - start:.3f}s\n")
+        sys.stderr.write("bench: maxrss=24576KiB\n")
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in ("ffmpeg", "ffprobe"):
+        sys.stderr.write("usage: stub_ffmpeg.py ffmpeg|ffprobe [arguments]\n")
+        return 2
+    return ffmpeg(argv[1:]) if argv[0] == "ffmpeg" else ffprobe(argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
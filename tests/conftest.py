@@ -0,0 +1,8 @@
+# tests/conftest.py
+# The add-on's engine modules import as the "xTrack" package from addon/globalPlugins,
+# as they do for "python -m xTrack"; neither NVDA, wx nor ffmpeg is needed.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "addon", "globalPlugins"))
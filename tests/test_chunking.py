@@ -0,0 +1,224 @@
+# tests/test_chunking.py
+
+import subprocess
+
+import pytest
+
+from xTrack.engine import ConvertAudioSpec
+from xTrack.engine import chunking
+from xTrack.scheduler import JobScheduler
+from xTrack.xTrackCore import ProcessResult, find_tool
+from xTrack.engine.commands import build_audio_chunk_command, FLAC_CHUNK_FRAME_SIZE, output_sample_rate
+
+DURATION = 2 * 3600 + 0.123
+
+
+@pytest.fixture
+def quiet_points(monkeypatch):
+    monkeypatch.setattr(chunking, "find_split_point",
+        lambda ffmpeg_path, input_path, nominal, policy=None, group=None: nominal + 0.37)
+
+
+def kept_samples(spec, ranges, pieces):
+    """Samples of each chunk the join keeps."""
+    rate = output_sample_rate(spec, spec.format)
+    kept = []
+    for (start, _end), (_seek, _length, inpoint, outpoint, samples) in zip(ranges, pieces):
+        if samples is not None:
+            kept.append(samples)
+        elif outpoint is not None:
+            kept.append(round((outpoint - (inpoint or 0.0)) * rate))
+        else:
+            kept.append(round((DURATION - start) * rate))
+    return kept
+
+
+def test_parse_silences():
+    stderr = "\n".join([
+        "[silencedetect @ 0x1] silence_start: 3.5",
+        "[silencedetect @ 0x1] silence_end: 4.25 | silence_duration: 0.75",
+        "size=N/A time=00:00:10.00 bitrate=N/A",
+        "[silencedetect @ 0x1] silence_start: -0.01",
+        "[silencedetect @ 0x1] silence_end: 0.5 | silence_duration: 0.51",
+        "[silencedetect @ 0x1] silence_start: 28",
+    ])
+    assert chunking.parse_silences(stderr, 30.0) == [(3.5, 4.25), (0.0, 0.5), (28.0, 30.0)]
+
+
+def test_parse_silences_ignores_end_without_start():
+    assert chunking.parse_silences("silence_end: 2.0 | silence_duration: 1.0", 30.0) == []
+
+
+def test_chunk_count():
+    spec = ConvertAudioSpec(["a.wav"], format="mp3")
+    assert chunking.chunk_count(spec, DURATION, 6) == 6
+    assert chunking.chunk_count(spec, DURATION, 1) == 0
+    assert chunking.chunk_count(spec, 10 * 60, 6) == 0
+    assert chunking.chunk_count(spec, DURATION, 6, copied=1) == 0
+    # Never chunks shorter than MIN_CHUNK_SECONDS
+    assert chunking.chunk_count(spec, 31 * 60, 16) == 6
+    multi = ConvertAudioSpec(["a.wav"], format="mp3", extra_outputs=[{"format": "wav"}])
+    assert chunking.chunk_count(multi, DURATION, 6) == 0
+    dynamic = ConvertAudioSpec(["a.wav"], format="mp3", loudness_target=-16.0)
+    assert chunking.chunk_count(dynamic, DURATION, 6) == 0
+    assert chunking.chunk_count(dynamic, DURATION, 6, loudness={"input_i": -20.0}) == 6
+
+
+@pytest.mark.parametrize("output_format", ["mp3", "aac", "opus", "flac", "wav"])
+def test_plan_chunks_covers_input_on_frame_boundaries(quiet_points, output_format):
+    spec = ConvertAudioSpec(["a.wav"], format=output_format)
+    ranges = chunking.plan_chunks("ffmpeg", spec, "a.wav", DURATION, 6)
+    assert len(ranges) == 6
+    assert ranges[0][0] == 0.0 and ranges[-1][1] == DURATION
+    frame_samples = chunking.CODEC_FRAME_SAMPLES.get(output_format, 1)
+    rate = output_sample_rate(spec, output_format)
+    for (_start, end), (next_start, _next_end) in zip(ranges, ranges[1:]):
+        assert end == next_start
+        samples = end * rate
+        assert samples == pytest.approx(round(samples / frame_samples) * frame_samples, abs=1e-6)
+
+
+@pytest.mark.parametrize("output_format", ["mp3", "aac", "opus", "flac", "wav"])
+def test_joined_chunks_have_the_samples_of_one_encode(quiet_points, output_format):
+    spec = ConvertAudioSpec(["a.wav"], format=output_format)
+    ranges = chunking.plan_chunks("ffmpeg", spec, "a.wav", DURATION, 6)
+    pieces = chunking.chunk_pieces(spec, ranges)
+    rate = output_sample_rate(spec, output_format)
+    assert sum(kept_samples(spec, ranges, pieces)) == round(DURATION * rate)
+
+
+@pytest.mark.parametrize("output_format", ["mp3", "aac", "opus"])
+def test_lossy_chunks_are_cut_between_packets(quiet_points, output_format):
+    spec = ConvertAudioSpec(["a.wav"], format=output_format)
+    ranges = chunking.plan_chunks("ffmpeg", spec, "a.wav", DURATION, 6)
+    pieces = chunking.chunk_pieces(spec, ranges)
+    frame = chunking.CODEC_FRAME_SAMPLES[output_format] / output_sample_rate(spec, output_format)
+    assert pieces[0][2] is None
+    for (start, end), (seek, length, inpoint, outpoint, samples) in zip(ranges[:-1], pieces[:-1]):
+        assert samples is None
+        # The warm-up and the kept part are whole packets, and the encode runs past outpoint
+        assert (inpoint or 0.0) / frame == pytest.approx(round((inpoint or 0.0) / frame))
+        assert outpoint / frame == pytest.approx(round(outpoint / frame))
+        assert seek + (inpoint or 0.0) == pytest.approx(start)
+        assert length > outpoint
+    assert pieces[-1][1] is None and pieces[-1][3] is None
+
+
+def test_flac_chunks_are_whole_blocks(quiet_points):
+    spec = ConvertAudioSpec(["a.wav"], format="flac")
+    pieces = chunking.chunk_pieces(spec, chunking.plan_chunks("ffmpeg", spec, "a.wav", DURATION, 6))
+    for _seek, _length, inpoint, outpoint, samples in pieces[:-1]:
+        assert inpoint is None and outpoint is None
+        assert samples % FLAC_CHUNK_FRAME_SIZE == 0
+    assert pieces[-1][4] is None
+
+
+def test_chunk_commands():
+    mp3 = ConvertAudioSpec(["a.wav"], format="mp3")
+    cmd = build_audio_chunk_command("ffmpeg", mp3, "a.wav", 10.0, 20.0, "c.mp3")
+    assert cmd[cmd.index("-i") - 4:cmd.index("-i")] == ["-ss", "10.000000", "-t", "20.000000"]
+    assert cmd[-3:] == ["-reservoir", "0", "c.mp3"]
+    flac = ConvertAudioSpec(["a.wav"], format="flac")
+    cmd = build_audio_chunk_command("ffmpeg", flac, "a.wav", 10.0, None, "c.flac", samples=4096)
+    assert "-t" not in cmd
+    assert cmd[cmd.index("-af") + 1].endswith(",aresample=48000,atrim=end_sample=4096")
+    assert cmd[-3:] == ["-frame_size", "4096", "c.flac"]
+
+
+class FakeProcess:
+    """Stands in for an FFmpegProcess that exits successfully as soon as it is waited on."""
+    def __init__(self, cmd, on_finish=None):
+        self.cmd = cmd
+        self.on_finish = on_finish
+        self.returncode = None
+
+    def poll(self):
+        return self.returncode
+
+    def terminate(self):
+        self.returncode = -15
+
+    def send_signal(self, sig):
+        pass
+
+    def wait(self):
+        if self.returncode is None:
+            self.returncode = 0
+        if self.on_finish:
+            self.on_finish(self)
+        return ProcessResult(self.returncode, "")
+
+
+def run_chunked(tmp_path, monkeypatch, on_finish):
+    """Run convert_chunked in a job on a one-worker scheduler; returns (job, commands run)."""
+    started = []
+
+    def fake_run_process(cmd, on_stdout_line=None, policy=None, operation=None):
+        process = FakeProcess(cmd, lambda process: on_finish(job, process))
+        started.append(process)
+        return process
+
+    monkeypatch.setattr(chunking, "run_process", fake_run_process)
+    spec = ConvertAudioSpec(["a.wav"], format="mp3")
+    output = str(tmp_path / "a.mp3")
+    scheduler = JobScheduler(max_workers=1)
+    job = scheduler.submit(lambda job: chunking.convert_chunked("ffmpeg", spec, "a.wav", output, DURATION, 6, job=job),
+        group="test")
+    assert job.wait(10)
+    return job, [process.cmd for process in started]
+
+
+def test_cancel_between_chunks_stops_the_conversion(quiet_points, tmp_path, monkeypatch):
+    # The first chunk has exited and the next has not started: no process is alive
+    job, cmds = run_chunked(tmp_path, monkeypatch, lambda job, process: job.cancel())
+    assert len(cmds) == 1
+    assert job.result.returncode == -1
+    assert job.state == job.CANCELLED
+
+
+def test_cancel_while_planning_runs_no_encode(tmp_path, monkeypatch):
+    # The first silencedetect pass is cancelled; no further pass, chunk or join runs
+    job, cmds = run_chunked(tmp_path, monkeypatch, lambda job, process: job.cancel())
+    assert len(cmds) == 1
+    assert "silencedetect" in " ".join(cmds[0])
+    assert job.result.returncode == -1
+
+
+FFMPEG = find_tool(None, "ffmpeg")
+real_ffmpeg = pytest.mark.skipif(FFMPEG is None, reason="ffmpeg not found; set XTRACK_FFMPEG or put it on the PATH")
+
+
+def decode(path):
+    """The decoded audio of path as mono 16-bit PCM."""
+    return subprocess.run([FFMPEG, "-v", "error", "-i", path, "-ac", "1", "-f", "s16le", "-"], stdout=subprocess.PIPE,
+        check=True).stdout
+
+
+@real_ffmpeg
+@pytest.mark.parametrize("output_format", ["wav", "flac", "mp3", "aac", "opus"])
+def test_chunked_round_trip(tmp_path, monkeypatch, output_format):
+    monkeypatch.setenv("XTRACK_CONFIG_DIR", str(tmp_path))
+    duration = 20.0
+    input_path = str(tmp_path / "input.wav")
+    subprocess.run([FFMPEG, "-v", "error", "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=44100:duration={duration}",
+        input_path], check=True)
+    spec = ConvertAudioSpec([input_path], format=output_format)
+    output = str(tmp_path / f"chunked.{output_format}")
+    job = JobScheduler(max_workers=2).submit(lambda job: chunking.convert_chunked(FFMPEG, spec, input_path, output,
+        duration, 3, job=job), group="test")
+    assert job.wait(120)
+    assert job.result.returncode == 0, job.result.stderr
+    samples = len(decode(output)) // 2
+    rate = output_sample_rate(spec, output_format)
+    if output_format in chunking.LOSSLESS_FORMATS:
+        # Sample-exact: the same audio as one process encoding the whole input
+        single = str(tmp_path / f"single.{output_format}")
+        subprocess.run(build_audio_chunk_command(FFMPEG, spec, input_path, 0.0, None, single), check=True,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        assert samples == round(duration * rate)
+        assert decode(output) == decode(single)
+    else:
+        # Up to encoder priming (at most 2112 samples, first chunk only) and end padding (under
+        # a frame) the length matches the input; a warm-up kept twice would add whole frames
+        frame_samples = chunking.CODEC_FRAME_SAMPLES[output_format]
+        assert abs(samples - round(duration * rate)) < frame_samples + 2112
@@ -0,0 +1,88 @@
+# tests/test_commands.py
+
+import os
+
+import pytest
+
+from xTrack.xTrackCore import MediaInfo, StreamInfo
+from xTrack.engine import ConvertAudioSpec
+from xTrack.engine.commands import can_copy_audio, convert_audio_command, convert_audio_output_paths
+
+
+def media(codec_name, sample_rate=48000, bit_rate=0, video=False):
+    streams = [StreamInfo(0, "video", "h264")] if video else []
+    streams.append(StreamInfo(len(streams), "audio", codec_name, sample_rate, 2, bit_rate=bit_rate))
+    return MediaInfo("in", 60.0, streams=streams)
+
+
+def out(*names):
+    return [os.path.join("out", name) for name in names]
+
+
+@pytest.mark.parametrize("output_format, bitrate, info, expected", [
+    ("mp3", 192, media("mp3", bit_rate=192000), True),
+    ("mp3", 192, media("mp3", bit_rate=191600), True),
+    ("mp3", 192, media("mp3", bit_rate=128000), False),
+    ("mp3", 192, media("mp3", bit_rate=0), False),  # VBR without a bitrate
+    ("mp3", 192, media("mp3", 44100, 192000), False),
+    ("aac", 192, media("aac", bit_rate=192000), True),
+    ("flac", 0, media("flac"), True),
+    ("wav", 0, media("pcm_s16le"), True),
+    ("wav", 0, media("pcm_s24le"), False),
+    ("opus", 64, media("opus", bit_rate=64000), False),
+    ("mp3", 192, None, False),
+    ("original", 0, media("aac", video=True), True),
+    ("original", 0, None, True),
+])
+def test_can_copy_audio(output_format, bitrate, info, expected):
+    spec = ConvertAudioSpec(["in"], "out", output_format, bitrate)
+    assert can_copy_audio(spec, info) is expected
+
+
+def test_volume_and_loudness_prevent_copies_but_not_original():
+    info = media("mp3", bit_rate=192000)
+    assert not can_copy_audio(ConvertAudioSpec(["in"], "out", "mp3", 192, volume=0.5), info)
+    assert not can_copy_audio(ConvertAudioSpec(["in"], "out", "mp3", 192, loudness_target=-16.0), info)
+    assert can_copy_audio(ConvertAudioSpec(["in"], "out", "original", volume=0.5), info)
+
+
+def test_output_paths():
+    spec = ConvertAudioSpec(["song.wav"], "out", "mp3", 320)
+    assert convert_audio_output_paths(spec, "in/song.wav") == out("song.mp3")
+    # Same format as the input: not written over it
+    assert convert_audio_output_paths(spec, "in/song.mp3") == out("song_converted.mp3")
+    assert convert_audio_output_paths(ConvertAudioSpec(["a"], "out", "aac"), "in/song.wav") == out("song.m4a")
+    assert convert_audio_output_paths(ConvertAudioSpec(["a"], None, "flac"), os.path.join("in", "song.wav")) == \
+        [os.path.join("in", "song.flac")]
+
+
+def test_output_paths_of_several_profiles():
+    spec = ConvertAudioSpec(["a"], "out", "mp3", 320, extra_outputs=[
+        {"format": "mp3", "bitrate_kbps": 128}, {"format": "wav"}, {"format": "mp3", "bitrate_kbps": 320}])
+    assert convert_audio_output_paths(spec, "in/song.wav") == out("song_320k.mp3", "song_128k.mp3", "song_converted.wav")
+
+
+@pytest.mark.parametrize("codec_name, name", [
+    ("aac", "lecture.m4a"), ("opus", "lecture.opus"), ("mp3", "lecture.mp3"), ("flac", "lecture.flac"),
+    ("vorbis", "lecture.ogg"), ("truehd", "lecture.mka"),
+])
+def test_original_output_takes_the_container_of_the_codec(codec_name, name):
+    spec = ConvertAudioSpec(["a"], "out", "original")
+    assert convert_audio_output_paths(spec, "in/lecture.mp4", media(codec_name, video=True)) == out(name)
+
+
+def test_original_output_does_not_clash_with_an_encoded_one():
+    spec = ConvertAudioSpec(["a"], "out", "mp3", 128, extra_outputs=[{"format": "original"}])
+    assert convert_audio_output_paths(spec, "in/talk.mp3", media("mp3")) == \
+        out("talk_converted.mp3", "talk_converted_original.mp3")
+
+
+def test_convert_audio_command_copies_and_encodes_from_one_run():
+    spec = ConvertAudioSpec(["a"], "out", "original", extra_outputs=[{"format": "opus", "bitrate_kbps": 64}])
+    cmd, outputs, copied = convert_audio_command("ffmpeg", spec, "in/lecture.mp4", media("aac", video=True))
+    assert outputs == out("lecture.m4a", "lecture.opus")
+    assert copied == 1
+    copy_at = cmd.index(outputs[0])
+    assert cmd[copy_at - 4:copy_at] == ["-map", "0:a:0", "-c:a", "copy"]
+    assert cmd[cmd.index("-filter_complex") + 1] == "[0:a:0]volume=1.0,aresample=48000[a1]"
+    assert cmd[-1] == outputs[1]
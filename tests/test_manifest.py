@@ -0,0 +1,69 @@
+# tests/test_manifest.py
+
+import os
+
+from xTrack.engine import ConvertAudioSpec, ConvertVideoSpec
+from xTrack.engine.manifest import MANIFEST_FILE_NAME, BatchManifest, ManifestSet, open_manifests, settings_hash
+
+
+def write(path, data=b"audio"):
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+
+def test_settings_hash_ignores_which_files_a_batch_covers():
+    spec = ConvertAudioSpec(["a.wav"], "out", "mp3", 192)
+    other_batch = ConvertAudioSpec(["b.wav", "c.wav"], "elsewhere", "mp3", 192, incremental=True)
+    assert settings_hash(spec) == settings_hash(other_batch)
+    assert settings_hash(spec) != settings_hash(ConvertAudioSpec(["a.wav"], "out", "mp3", 128))
+    assert settings_hash(spec) != settings_hash(ConvertAudioSpec(["a.wav"], "out", "mp3", 192, encoder_profile="best"))
+    # Another job type with the same field values is not the same settings
+    assert settings_hash(ConvertVideoSpec(["a.mp4"])) != settings_hash(ConvertVideoSpec(["a.mp4"], container="mkv"))
+
+
+def test_open_manifests_only_for_incremental_specs():
+    assert open_manifests(ConvertAudioSpec(["a.wav"])) is None
+    assert isinstance(open_manifests(ConvertAudioSpec(["a.wav"], incremental=True)), ManifestSet)
+
+
+def test_recorded_source_is_current_until_it_changes(tmp_path):
+    spec = ConvertAudioSpec([], str(tmp_path), "mp3", incremental=True)
+    source = write(tmp_path / "song.wav")
+    output = write(tmp_path / "song.mp3")
+    manifests = ManifestSet(spec)
+    assert manifests.needs_conversion(source, [output])
+    manifests.record(source, [output])
+    assert manifests.is_current(source, [output])
+
+    # A new run reads the saved manifest
+    manifests.save()
+    assert os.path.exists(tmp_path / MANIFEST_FILE_NAME)
+    reloaded = ManifestSet(spec)
+    assert not reloaded.needs_conversion(source, [output])
+    # Other settings, a changed source or a deleted output all need a new conversion
+    assert ManifestSet(ConvertAudioSpec([], str(tmp_path), "mp3", 128, incremental=True)).needs_conversion(source, [output])
+    os.remove(output)
+    assert reloaded.needs_conversion(source, [output])
+    write(output)
+    write(source, b"edited audio")
+    assert ManifestSet(spec).needs_conversion(source, [output])
+
+
+def test_outputs_of_earlier_batches_are_not_taken_for_new_inputs(tmp_path):
+    spec = ConvertAudioSpec([], None, "mp3", incremental=True)
+    source = write(tmp_path / "talk.mp3")
+    output = write(tmp_path / "talk_converted.mp3")
+    manifests = ManifestSet(spec)
+    manifests.record(source, [output])
+    manifests.save()
+    reloaded = ManifestSet(spec)
+    assert reloaded.is_generated(output)
+    assert not reloaded.is_generated(source)
+    assert not reloaded.needs_conversion(output, [str(tmp_path / "talk_converted_converted.mp3")])
+
+
+def test_unreadable_manifest_starts_empty(tmp_path):
+    write(tmp_path / MANIFEST_FILE_NAME, b"{not json")
+    manifest = BatchManifest(str(tmp_path))
+    assert manifest.entries == {} and manifest.outputs == set()
@@ -0,0 +1,35 @@
+# tests/test_planner.py
+
+from xTrack.engine.planner import slice_command
+
+
+def test_slice_is_taken_from_the_middle_of_the_input():
+    cmd = ["ffmpeg", "-i", "in.wav", "-c:a", "libmp3lame", "out.mp3"]
+    assert slice_command(cmd, "in.wav", 100.0, "sample.mp3", 10.0) == [
+        "ffmpeg", "-ss", "45.000", "-t", "10.000", "-i", "in.wav", "-c:a", "libmp3lame", "sample.mp3"]
+
+
+def test_short_inputs_are_encoded_whole():
+    cmd = ["ffmpeg", "-i", "in.wav", "out.mp3"]
+    assert slice_command(cmd, "in.wav", 8.0, "sample.mp3", 10.0) == ["ffmpeg", "-i", "in.wav", "sample.mp3"]
+    assert slice_command(cmd, "in.png", 0.0, "sample.jpg", 10.0) == ["ffmpeg", "-i", "in.wav", "sample.jpg"]
+
+
+def test_existing_seek_and_length_are_kept():
+    cmd = ["ffmpeg", "-ss", "5", "-i", "in.wav", "-t", "20", "out.mp3"]
+    assert slice_command(cmd, "in.wav", 100.0, "sample.mp3", 10.0) == [
+        "ffmpeg", "-ss", "5", "-i", "in.wav", "-t", "20", "sample.mp3"]
+
+
+def test_multi_output_commands_slice_the_input_once():
+    cmd = ["ffmpeg", "-i", "in.wav", "-filter_complex", "[0:a:0]asplit=2[a0][a1]",
+        "-map", "[a0]", "a.mp3", "-map", "[a1]", "b.wav"]
+    sliced = slice_command(cmd, "in.wav", 60.0, "b_sample.wav", 10.0)
+    assert sliced[:6] == ["ffmpeg", "-ss", "25.000", "-t", "10.000", "-i"]
+    assert sliced.count("-t") == 1 and sliced[-1] == "b_sample.wav"
+
+
+def test_input_not_found_limits_the_output():
+    cmd = ["ffmpeg", "-f", "concat", "-i", "list.txt", "out.mp3"]
+    assert slice_command(cmd, "song.mp3", 60.0, "sample.mp3", 10.0) == [
+        "ffmpeg", "-f", "concat", "-i", "list.txt", "-t", "10.000", "sample.mp3"]
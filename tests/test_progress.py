@@ -0,0 +1,62 @@
+# tests/test_progress.py
+
+from xTrack.xTrackCore import ProgressReader
+
+BLOCK = [
+    "bitrate= 192.0kbits/s",
+    "total_size=240000",
+    "out_time_us=10000000",
+    "out_time_ms=10000000",
+    "out_time=00:00:10.000000",
+    "speed=5.00x",
+]
+
+
+def feed(reader, lines):
+    for line in lines:
+        reader.feed(line + "\n")
+
+
+def test_progress_block_becomes_a_snapshot():
+    updates = []
+    reader = ProgressReader(40.0, updates.append, min_interval=0)
+    feed(reader, BLOCK + ["progress=continue"])
+    assert len(updates) == 1
+    snapshot = updates[0]
+    assert snapshot.position == 10.0
+    assert snapshot.percent == 25
+    assert snapshot.speed == 5.0
+    assert snapshot.eta == 6.0
+    assert snapshot.total_size == 240000
+    assert snapshot.bitrate == "192.0kbits/s"
+    assert not snapshot.finished
+
+
+def test_updates_are_throttled_but_the_end_is_always_delivered():
+    updates = []
+    reader = ProgressReader(40.0, updates.append, min_interval=3600)
+    feed(reader, BLOCK + ["progress=continue"])
+    feed(reader, BLOCK + ["progress=continue"])
+    feed(reader, ["out_time_us=40000000", "speed=4x", "progress=end"])
+    assert len(updates) == 2
+    assert updates[-1].finished and updates[-1].percent == 100 and updates[-1].eta == 0
+    assert reader.snapshot is updates[-1]
+
+
+def test_out_time_ms_and_unknown_values():
+    updates = []
+    reader = ProgressReader(0, updates.append, min_interval=0)
+    feed(reader, ["out_time_ms=2500000", "speed=N/A", "total_size=N/A", "not a field", "progress=continue"])
+    snapshot = updates[0]
+    assert snapshot.position == 2.5
+    assert snapshot.speed == 0.0 and snapshot.total_size == 0
+    # Without a duration there is no percentage or ETA
+    assert snapshot.percent == 0 and snapshot.eta is None
+
+
+def test_fields_do_not_leak_into_the_next_block():
+    updates = []
+    reader = ProgressReader(40.0, updates.append, min_interval=0)
+    feed(reader, BLOCK + ["progress=continue"])
+    feed(reader, ["out_time_us=20000000", "progress=continue"])
+    assert updates[-1].position == 20.0 and updates[-1].speed == 0.0
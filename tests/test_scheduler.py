@@ -0,0 +1,100 @@
+# tests/test_scheduler.py
+
+import threading
+
+from xTrack.scheduler import Job, JobScheduler
+
+TIMEOUT = 5
+
+
+class FakeProcess:
+    def __init__(self):
+        self.terminated = False
+
+    def poll(self):
+        return 0 if self.terminated else None
+
+    def terminate(self):
+        self.terminated = True
+
+
+def hold_worker(scheduler):
+    """Submit a job that keeps the scheduler's only worker busy until the returned event is set."""
+    started = threading.Event()
+    release = threading.Event()
+
+    def block(job):
+        started.set()
+        release.wait(TIMEOUT)
+
+    job = scheduler.submit(block, group="hold")
+    assert started.wait(TIMEOUT)
+    return job, release
+
+
+def test_groups_share_workers_round_robin():
+    scheduler = JobScheduler(1)
+    blocker, release = hold_worker(scheduler)
+    order = []
+    jobs = [scheduler.submit(lambda job, name=name: order.append(name), group=name[0])
+        for name in ("a1", "a2", "a3", "b1", "b2")]
+    release.set()
+    for job in jobs + [blocker]:
+        assert job.wait(TIMEOUT)
+    assert order == ["a1", "b1", "a2", "b2", "a3"]
+    assert all(job.state == Job.DONE for job in jobs)
+
+
+def test_result_and_failure():
+    scheduler = JobScheduler(2)
+    done = []
+    ok = scheduler.submit(lambda job: 42, on_done=done.append)
+
+    def fail(job):
+        raise ValueError("broken")
+
+    failed = scheduler.submit(fail, on_done=done.append)
+    assert ok.wait(TIMEOUT) and failed.wait(TIMEOUT)
+    assert ok.state == Job.DONE and ok.result == 42
+    assert failed.state == Job.FAILED and isinstance(failed.error, ValueError)
+    assert set(done) == {ok, failed}
+
+
+def test_cancel_group_cancels_pending_and_running_jobs():
+    scheduler = JobScheduler(1)
+    process = FakeProcess()
+    running = threading.Event()
+
+    def run(job):
+        job.process = process
+        running.set()
+        while not job.cancelled:
+            job.wait(0.01)
+        return "stopped"
+
+    first = scheduler.submit(run, group="batch")
+    assert running.wait(TIMEOUT)
+    ran = []
+    pending = scheduler.submit(lambda job: ran.append(job), group="batch")
+    other = scheduler.submit(lambda job: "other", group="other")
+    scheduler.cancel_group("batch")
+    assert pending.state == Job.CANCELLED and pending.finished
+    assert first.wait(TIMEOUT) and first.state == Job.CANCELLED
+    assert process.terminated
+    assert other.wait(TIMEOUT) and other.result == "other"
+    assert ran == []
+    assert scheduler.pending_count("batch") == 0
+
+
+def test_run_pending_runs_a_queued_job_on_the_calling_thread():
+    scheduler = JobScheduler(1)
+    blocker, release = hold_worker(scheduler)
+    threads = []
+    job = scheduler.submit(lambda job: threads.append(threading.current_thread()), group="chunks")
+    assert scheduler.run_pending(job)
+    assert job.state == Job.DONE and threads == [threading.current_thread()]
+    # Already run: not run twice
+    assert not scheduler.run_pending(job)
+    release.set()
+    assert blocker.wait(TIMEOUT)
+    assert job.scheduler is scheduler